@@ -0,0 +1,474 @@
+import argparse
+import collections
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+import banking
+import shards
+try:
+    import numpy
+except ImportError:  # only this module needs NumPy, the bank runs without it
+    numpy = None
+# Columnar analytics and month-end statements over the transactions log
+
+
+CHUNK_BYTES = 64 * 1024 * 1024  # bytes of the log parsed at a time
+CHUNK_ROWS = 1000000  # rows of the database read at a time
+WRITE_ROWS = 10000  # statements joined before a write
+DAY_MICROS = 24 * 60 * 60 * 1000000
+
+# The transactions as columns, row i of every array is one transaction.
+# type_code indexes type_names, amount_cents is always positive and
+# time_micros counts microseconds since 1970-01-01.
+Columns = collections.namedtuple('Columns', ['transaction_id', 'account_id', 'type_code', 'receiver_id',
+                                             'amount_cents', 'time_micros', 'type_names'])
+
+
+def require_numpy():
+    """
+    Raises an ImportError explaining that the analytics need NumPy.
+    """
+    if numpy is None:
+        raise ImportError("The analytics need NumPy, install it with 'pip install numpy'.")
+
+
+def _columns(parts, typeNames):
+    """
+    returns the Columns made of the arrays parsed in several parts.
+    """
+    if not parts:
+        empty = numpy.zeros(0, numpy.int64)
+        return Columns(empty, empty, empty, empty, empty, empty, tuple(typeNames))
+    return Columns(*[numpy.concatenate([part[k] for part in parts]) for k in range(6)], tuple(typeNames))
+
+
+def _type_codes(types, typeNames):
+    """
+    returns the codes of an array of transaction types, adding new types to typeNames.
+    """
+    names, inverse = numpy.unique(types, return_inverse=True)
+    lookup = []
+    for name in names.tolist():
+        name = name.decode() if isinstance(name, bytes) else name
+        if name not in typeNames:
+            typeNames.append(name)
+        lookup.append(typeNames.index(name))
+    return numpy.array(lookup, numpy.int64)[inverse.reshape(-1)]
+
+
+def parse_chunk(data, typeNames):
+    """
+    returns the columns of the complete lines of a piece of the transactions file.
+
+    Parameters
+    ----------
+    data : bytes
+        lines of the transactions file.
+    typeNames : list
+        names of the transaction types met so far, new types are appended.
+
+    Returns
+    -------
+    tuple: transaction_id, account_id, type_code, receiver_id, amount_cents and time_micros arrays
+    """
+    # The files written on Windows end their lines with \r\n.
+    lines = data.replace(b'\r', b'').split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    # One split of all the lines, field k of row i is at 7 * i + k.
+    fields = b','.join(lines).split(b',')
+    if len(fields) != 7 * len(lines):
+        # Empty or damaged lines are left out, slower but rare.
+        lines = [line for line in lines if line.count(b',') == 6]
+        fields = b','.join(lines).split(b',')
+    if not lines:
+        return None
+    return (numpy.array(fields[0::7]).astype(numpy.int64),
+            numpy.array(fields[1::7]).astype(numpy.int64),
+            _type_codes(numpy.array(fields[2::7]), typeNames),
+            numpy.array(fields[4::7]).astype(numpy.int64),
+            numpy.rint(numpy.array(fields[5::7]).astype(numpy.float64) * 100).astype(numpy.int64),
+            # datetime64 also reads times without microseconds.
+            numpy.array(fields[6::7]).astype('datetime64[us]').astype(numpy.int64))
+
+
+def load_log(path):
+    """
+    Loads a transactions file into columns.
+
+    A line left incomplete by a crash (without its newline) is not loaded.
+
+    Parameters
+    ----------
+    path : str
+        path of the transactions file.
+
+    Returns
+    -------
+    Columns
+    """
+    require_numpy()
+    typeNames = list(banking.BALANCE_SIGNS)
+    parts = []
+    with open(path, 'rb') as log:
+        rest = b''
+        while True:
+            data = log.read(CHUNK_BYTES)
+            if not data:
+                break
+            data = rest + data
+            end = data.rfind(b'\n') + 1
+            rest = data[end:]
+            part = parse_chunk(data[:end], typeNames)
+            if part is not None:
+                parts.append(part)
+    return _columns(parts, typeNames)
+
+
+def load_database(path):
+    """
+    Loads the transactions of a SQLite bank into columns.
+
+    Parameters
+    ----------
+    path : str
+        path of the database file.
+
+    Returns
+    -------
+    Columns
+    """
+    require_numpy()
+    typeNames = list(banking.BALANCE_SIGNS)
+    parts = []
+    connection = sqlite3.connect(path)
+    try:
+        cursor = connection.execute("SELECT transaction_id, account_id, transaction_type, receiver_id, amount_cents, "
+                                    "time_micros FROM transactions ORDER BY transaction_id")
+        while True:
+            rows = cursor.fetchmany(CHUNK_ROWS)
+            if not rows:
+                break
+            transactionIds, accountIds, types, receiverIds, amounts, times = zip(*rows)
+            parts.append((numpy.array(transactionIds, numpy.int64), numpy.array(accountIds, numpy.int64),
+                          _type_codes(numpy.array(types), typeNames), numpy.array(receiverIds, numpy.int64),
+                          numpy.array(amounts, numpy.int64), numpy.array(times, numpy.int64)))
+    finally:
+        connection.close()
+    return _columns(parts, typeNames)
+
+
+def load_bank(path='.'):
+    """
+    Loads the transactions of the bank in a directory, from bank.db if it exists.
+
+    Returns
+    -------
+    Columns
+    """
+    databasePath = os.path.join(path, banking.DATABASE_FILE)
+    if os.path.exists(databasePath):
+        return load_database(databasePath)
+    return load_log(os.path.join(path, banking.TRANSACTION_FILE))
+
+
+def load_account_ids(path='.'):
+    """
+    returns the IDs of the accounts of the bank in a directory, in order.
+
+    The bank must not be used by another program while it is read.
+    """
+    require_numpy()
+    with banking.Bank().open(path) as bank:
+        return numpy.array([account.account_id for account in bank.index.all_accounts()], numpy.int64)
+
+
+def _group(keys):
+    """
+    returns the distinct keys and the group number of every row.
+    """
+    unique, inverse = numpy.unique(keys, return_inverse=True)
+    return unique, inverse.reshape(-1)
+
+
+def _sums(groups, size, values=None):
+    """
+    returns the number of rows (or the sum of values) of every group as integers.
+    """
+    return numpy.rint(numpy.bincount(groups, values, minlength=size)).astype(numpy.int64)
+
+
+def _order(high, low):
+    """
+    returns the order sorting the rows by high then low, both non-negative integers.
+    """
+    shift = int(low.max()).bit_length() if len(low) else 0
+    if len(high) and int(high.max()).bit_length() + shift > 62:
+        return numpy.lexsort((low, high))
+    # One sort key is faster than sorting on two.
+    return numpy.argsort((high << shift) | low)
+
+
+def totals_by_type(columns):
+    """
+    returns the number and the amount of the transactions of every account, by type.
+
+    Parameters
+    ----------
+    columns : Columns
+        the transactions.
+
+    Returns
+    -------
+    tuple: account IDs, counts and cents, one row per account and one column per type of columns.type_names
+    """
+    accountIds, groups = _group(columns.account_id)
+    types = len(columns.type_names)
+    cells = groups * types + columns.type_code
+    size = len(accountIds) * types
+    return (accountIds, _sums(cells, size).reshape(-1, types),
+            _sums(cells, size, columns.amount_cents).reshape(-1, types))
+
+
+def daily_volumes(columns):
+    """
+    returns the number and the amount of the transactions of every day, by type.
+
+    Returns
+    -------
+    tuple: days (datetime64[D]), counts and cents, one row per day and one column per type
+    """
+    days, groups = _group(columns.time_micros // DAY_MICROS)
+    types = len(columns.type_names)
+    cells = groups * types + columns.type_code
+    size = len(days) * types
+    return (days.astype('datetime64[D]'), _sums(cells, size).reshape(-1, types),
+            _sums(cells, size, columns.amount_cents).reshape(-1, types))
+
+
+def top_counterparties(columns, top=3):
+    """
+    returns the receivers each account transferred the most money to.
+
+    Parameters
+    ----------
+    columns : Columns
+        the transactions.
+    top : int
+        number of receivers kept for each account.
+
+    Returns
+    -------
+    tuple: account IDs, receiver IDs, number of transfers and cents, ordered by account then cents
+    """
+    transfer = columns.type_code == columns.type_names.index('Transfer')
+    accountIds, receiverIds = columns.account_id[transfer], columns.receiver_id[transfer]
+    # A pair of IDs as one key, the receiver in the low bits.
+    shift = int(receiverIds.max()).bit_length() if len(receiverIds) else 0
+    pairs, groups = _group((accountIds << shift) | receiverIds)
+    counts, cents = _sums(groups, len(pairs)), _sums(groups, len(pairs), columns.amount_cents[transfer])
+    pairAccounts, pairReceivers = pairs >> shift, pairs & ((1 << shift) - 1)
+    order = numpy.lexsort((pairReceivers, -cents, pairAccounts))
+    pairAccounts, pairReceivers, counts, cents = pairAccounts[order], pairReceivers[order], counts[order], cents[order]
+    # Rank of a pair among the pairs of its account.
+    starts = numpy.flatnonzero(numpy.r_[True, pairAccounts[1:] != pairAccounts[:-1]])
+    rank = numpy.arange(len(pairs)) - numpy.repeat(starts, numpy.diff(numpy.r_[starts, len(pairs)]))
+    keep = rank < top
+    return pairAccounts[keep], pairReceivers[keep], counts[keep], cents[keep]
+
+
+def balance_entries(columns, shard=None, shard_count=None):
+    """
+    returns the balance changes made by the transactions, a Transfer giving two.
+
+    The credit of a Transfer to its receiver has the type TransferIn. Types
+    without a sign in banking.BALANCE_SIGNS do not change the balance.
+
+    Parameters
+    ----------
+    columns : Columns
+        the transactions.
+    shard : int
+        number of the shard the log belongs to, None if the bank is not split.
+    shard_count : int
+        number of shards.
+
+    Returns
+    -------
+    tuple: account_id, signed cents, type_code, counterparty, time_micros and transaction_id arrays,
+    ordered by account then transaction ID
+    """
+    signs = numpy.array([banking.BALANCE_SIGNS.get(name, 0) for name in columns.type_names], numpy.int64)
+    credit = columns.type_code == columns.type_names.index('Transfer')
+    if shard is not None:
+        # In a shard, a receiver held by another shard is credited there by a TransferIn.
+        receivers, positions = numpy.unique(columns.receiver_id, return_inverse=True)
+        owners = numpy.array([shards.shard_of(receiverId, shard_count) for receiverId in receivers.tolist()], numpy.int64)
+        credit &= owners[positions] == shard
+    incoming = numpy.full(int(credit.sum()), columns.type_names.index('TransferIn'), numpy.int64)
+    accountIds = numpy.concatenate([columns.account_id, columns.receiver_id[credit]])
+    transactionIds = numpy.concatenate([columns.transaction_id, columns.transaction_id[credit]])
+    order = _order(accountIds, transactionIds)
+    return (accountIds[order],
+            numpy.concatenate([signs[columns.type_code] * columns.amount_cents, columns.amount_cents[credit]])[order],
+            numpy.concatenate([columns.type_code, incoming])[order],
+            numpy.concatenate([columns.receiver_id, columns.account_id[credit]])[order],
+            numpy.concatenate([columns.time_micros, columns.time_micros[credit]])[order],
+            transactionIds[order])
+
+
+def write_statements(columns, year, month, out, fmt='json', items=True, shard=None, shard_count=None,
+                     account_ids=None):
+    """
+    Writes the statement of every account for a month, in one pass over the accounts.
+
+    Balances are replayed from the transactions. Every account of account_ids
+    gets a statement, its balance unchanged if it had no transaction in the
+    month, and so does every account with a transaction before the end of
+    the month.
+
+    Parameters
+    ----------
+    columns : Columns
+        the transactions.
+    year : int
+        year of the statements.
+    month : int
+        month of the statements.
+    out : file
+        text file the statements are written to.
+    fmt : str
+        'json' for one JSON object per line, 'csv' for one row per account
+        (CSV statements have the totals but not the transactions).
+    items : bool
+        if True, JSON statements list the transactions of the month.
+    shard : int
+        number of the shard the log belongs to, None if the bank is not split.
+    shard_count : int
+        number of shards.
+    account_ids : array
+        IDs of the accounts of the bank, as returned by load_account_ids().
+
+    Returns
+    -------
+    int: number of statements written
+    """
+    start = banking.to_micros(datetime.datetime(year, month, 1))
+    end = banking.to_micros(datetime.datetime(year + month // 12, month % 12 + 1, 1))
+    accountIds, cents, codes, counterparties, times, transactionIds = balance_entries(columns, shard, shard_count)
+    before = times < end
+    accountIds, cents, codes, counterparties, times, transactionIds = (
+        accountIds[before], cents[before], codes[before], counterparties[before], times[before], transactionIds[before])
+    accounts, groups = _group(accountIds)
+    if account_ids is not None:
+        # Accounts without a transaction have a group of no rows.
+        accounts = numpy.union1d(accounts, numpy.asarray(account_ids, numpy.int64))
+        groups = numpy.searchsorted(accounts, accountIds)
+    count, types = len(accounts), len(columns.type_names)
+    opening = _sums(groups[times < start], count, cents[times < start])
+    period = times >= start
+    periodGroups, periodCents, periodCodes = groups[period], cents[period], codes[period]
+    closing = opening + _sums(periodGroups, count, periodCents)
+    cells = periodGroups * types + periodCodes
+    totals = _sums(cells, count * types, numpy.abs(periodCents)).reshape(-1, types)
+    numbers = _sums(periodGroups, count)
+    label = f"{year:04d}-{month:02d}"
+
+    # Every statement is cut from the same arrays, converted to lists once.
+    accountList, openingList, closingList, numberList = (
+        accounts.tolist(), (opening / 100).tolist(), (closing / 100).tolist(), numbers.tolist())
+    totalList = (totals / 100).tolist()
+    if fmt == 'csv':
+        out.write(",".join(['account_id', 'period', 'opening_balance', 'closing_balance', 'transactions']
+                           + list(columns.type_names)) + "\n")
+    elif items:
+        bounds = numpy.searchsorted(periodGroups, numpy.arange(count + 1)).tolist()
+        # The items are formatted at once, the names of the types being the only strings to escape.
+        typeNames = [json.dumps(name) for name in columns.type_names]
+        itemLines = [f'{{"transaction_id": {transactionId}, "type": {typeNames[code]}, "counterparty": {counterparty}, '
+                     f'"amount": {amount!r}, "time": "{time[:10]} {time[11:]}"}}'
+                     for transactionId, code, counterparty, amount, time in zip(
+                         transactionIds[period].tolist(), periodCodes.tolist(), counterparties[period].tolist(),
+                         (periodCents / 100).tolist(),
+                         numpy.datetime_as_string(times[period].astype('datetime64[us]')).tolist())]
+    lines = []
+    for k in range(count):
+        if fmt == 'csv':
+            lines.append(f"{accountList[k]},{label},{openingList[k]:.2f},{closingList[k]:.2f},{numberList[k]},"
+                         + ",".join([f"{total:.2f}" for total in totalList[k]]) + "\n")
+        else:
+            statement = {'account_id': accountList[k], 'period': label, 'opening_balance': openingList[k],
+                         'closing_balance': closingList[k], 'transactions': numberList[k],
+                         'totals': {name: total for name, total in zip(columns.type_names, totalList[k]) if total}}
+            if items:
+                lines.append(json.dumps(statement)[:-1] + ', "items": [' + ", ".join(itemLines[bounds[k]:bounds[k + 1]]) + "]}\n")
+            else:
+                lines.append(json.dumps(statement) + "\n")
+        if len(lines) == WRITE_ROWS:
+            out.write("".join(lines))
+            lines = []
+    out.write("".join(lines))
+    return count
+
+
+def write_rows(out, header, rows, fmt='csv'):
+    """
+    Writes a report as CSV rows or as one JSON object per line.
+    """
+    if fmt == 'csv':
+        out.write(",".join(header) + "\n")
+        out.write("".join([",".join([str(x) for x in row]) + "\n" for row in rows]))
+    else:
+        out.write("".join([json.dumps(dict(zip(header, row))) + "\n" for row in rows]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reports and month-end statements from the transactions log.")
+    parser.add_argument('report', choices=['totals', 'daily', 'counterparties', 'statements'], help="what to write")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--month', default=None, help="month of the statements as YYYY-MM, by default the last one")
+    parser.add_argument('--format', default='csv', choices=['csv', 'json'], help="CSV rows or JSON lines")
+    parser.add_argument('--no-items', action='store_true', help="leave the transactions out of JSON statements")
+    parser.add_argument('--top', type=int, default=3, help="receivers listed for each account")
+    parser.add_argument('--out', default=None, help="file written, by default the standard output")
+    arguments = parser.parse_args()
+
+    columns = load_bank(arguments.bank)
+    out = open(arguments.out, 'w') if arguments.out else sys.stdout
+    try:
+        names = list(columns.type_names)
+        if arguments.report == 'totals':
+            accountIds, counts, cents = totals_by_type(columns)
+            write_rows(out, ['account_id'] + [f'{name}_count' for name in names] + [f'{name}_amount' for name in names],
+                       [[accountId] + countRow + [x / 100 for x in centRow] for accountId, countRow, centRow
+                        in zip(accountIds.tolist(), counts.tolist(), cents.tolist())], arguments.format)
+        elif arguments.report == 'daily':
+            days, counts, cents = daily_volumes(columns)
+            write_rows(out, ['day'] + [f'{name}_count' for name in names] + [f'{name}_amount' for name in names],
+                       [[day] + countRow + [x / 100 for x in centRow] for day, countRow, centRow
+                        in zip(numpy.datetime_as_string(days).tolist(), counts.tolist(), cents.tolist())],
+                       arguments.format)
+        elif arguments.report == 'counterparties':
+            write_rows(out, ['account_id', 'receiver_id', 'transfers', 'amount'],
+                       [[accountId, receiverId, count, x / 100] for accountId, receiverId, count, x
+                        in zip(*[array.tolist() for array in top_counterparties(columns, arguments.top)])],
+                       arguments.format)
+        else:
+            accountIds = load_account_ids(arguments.bank)
+            if arguments.month:
+                year, month = [int(x) for x in arguments.month.split('-')]
+            elif len(columns.time_micros):
+                last = numpy.datetime64(int(columns.time_micros.max()), 'us').astype(datetime.datetime)
+                year, month = last.year, last.month
+            else:
+                # An empty log has no last month, only the header is written.
+                today = datetime.date.today()
+                year, month, accountIds = today.year, today.month, None
+            write_statements(columns, year, month, out, arguments.format, not arguments.no_items,
+                             account_ids=accountIds)
+    finally:
+        if out is not sys.stdout:
+            out.close()
@@ -1,574 +1,3596 @@
-import datetime
-# Functional bank system using OOP
-
-
-class Account(object):
-    """
-    A class to represent an Account.
-
-    ...
-
-    Attributes
-    ----------
-    first_name : str
-        first name of account holder.
-    last_name : str
-        last name of the account holder.
-    age : int
-        age of the account holder.
-    account_id : int
-        Unique ID of the account.
-    customer_id : int
-        Id of the customer with the account.
-    account_type : str
-        Type of the account based on the age.
-    account_balance : float
-        Balance in the account.
-
-    Methods
-    -------
-    menu():
-        prints a menu for the customer.
-    balance():
-        returns the balance of the account.
-    deposit(amount):
-        Deposits the given amount in the account.
-    transfer(amount, receiver):
-        Transfers amount from current account to the receiver.
-    withdraw(amount):
-        Withdraws the given amount.
-    """
-
-    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance):
-        """
-        Constructs all the necessary attributes for the Account object.
-
-        Parameters
-        ----------
-            first_name : str
-                first name of account holder.
-            last_name : str
-                last name of the account holder.
-            age : int
-                age of the account holder.
-            account_id : int
-                Unique ID of the account.
-            customer_id : int
-                Id of the customer with the account.
-            account_type : str
-                Type of the account based on the age.
-            account_balance : float
-                Balance in the account.
-        """
-        self.first_name = first_name
-        self.last_name = last_name
-        self.age = age
-        self.account_id = account_id
-        self.customer_id = customer_id
-        self.account_type = account_type
-        self.account_balance = account_balance
-
-    @staticmethod  # does not receive any arguments
-    def menu():
-        print("Welcome to THIS Bank!\n"
-              "-----------------------\n"
-              "1. Create an account\n"
-              "2. View transactions and balance of account\n"
-              "3. Perform tasks with account\n"
-              "4. Delete your account\n"
-              "5. Exit\n")
-        userinput = int(input("Select an option: "))  # user input required for menu selection
-        return userinput
-
-
-class Customer(object):
-    """
-    A class to represent a Customer.
-
-    ...
-
-    Attributes
-    ----------
-    first_name : str
-        first name of customer.
-    last_name : str
-        last name of the customer.
-    age : int
-        age of the customer.
-    cust_id : int
-        Id of the customer.
-    """
-
-    def __init__(self, first_name, last_name, age, cust_id):
-        """
-        Constructs all the necessary attributes for the Account object.
-
-        Parameters
-        ----------
-            first_name : str
-                first name of customer.
-            last_name : str
-                last name of the customer.
-            age : int
-                age of the customer.
-            cust_id : int
-                Id of the customer.
-        """
-        self.first_name = first_name
-        self.last_name = last_name
-        self.age = age
-        self.cust_id = cust_id
-        
-    def __str__(self):
-        return f"Customer ID: {self.cust_id}, Name: {self.first_name} {self.last_name}, Age: {self.age}"
-
-
-class SavingAccount(Account):
-    """
-    A class to represent a SavingAccount.
-
-    ...
-
-    Attributes
-    ----------
-    See Parent Class (Account) for Docstring.
-
-    Methods
-    -------
-    balance():
-        returns the balance of the account.
-    deposit(amount):
-        Deposits the given amount in the account.
-    transfer(amount, receiver, lastTransaction=None):
-        Transfers amount from current account to the receiver.
-    withdraw(amount, lastTransaction=None):
-        Withdraws the given amount.
-    """
-
-    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance):
-        """
-            Constructs all the attributes for Parent Class.
-        """
-        super().__init__(first_name, last_name, age, account_id, customer_id, account_type, account_balance)  # function to make Saving Account subclass of class Account
-
-    def balance(self):
-        """
-        returns the balance of the account.
-
-        Parameters
-        ----------
-        None
-
-        Returns
-        -------
-        None
-        """
-        return self.account_balance
-
-    def deposit(self, amount):
-        """
-        Adds the given amount in the account balance.
-
-        Parameters
-        ----------
-        amount : float
-            deposit amount
-
-        Returns
-        -------
-        True
-        """
-        self.account_balance += amount
-        return True
-
-    def transfer(self, amount, receiver, lastTransaction=None):
-        """
-        Transfer the given amount to the receiver's account..
-
-        Parameters
-        ----------
-        amount : float
-            transfer amount
-        receiver: account
-            account to transfer the amount
-        lastTransaction: list
-            last transaction for this account for transfer.
-
-        Returns
-        -------
-        True, False: True if successful else False
-        """
-        
-        # If a last transaction was passed in the argument
-        if lastTransaction:
-            # Checking if the transaction was less than a month ago.
-            if datetime.datetime.strptime(lastTransaction[6], '%Y-%m-%d %H:%M:%S.%f') >= datetime.datetime.now() - datetime.timedelta(days=30):
-                print("Already a transfer this month, cannot transfer")
-                return False
-        # If the transferring will result in less than 0 balance for this account.
-        if (self.account_balance - amount) < 0:
-            print("Limit Reached on the Negative Balance, cannot transfer")
-            return False
-        self.account_balance -= amount
-        receiver.account_balance += amount
-        return True
-
-    def withdraw(self, amount, lastTransaction=None):
-        """
-        Withdraw the amount from the account.
-
-        Parameters
-        ----------
-        amount : float
-            transfer amount
-        lastTransaction: list
-            last transaction for this account for withdraw.
-
-        Returns
-        -------
-        True, False: True if successful else False
-        """
-        if lastTransaction:
-            # Checking if withdraw occurred from this account in this month.
-            if datetime.datetime.strptime(lastTransaction[6], '%Y-%m-%d %H:%M:%S.%f') >= datetime.datetime.now() - datetime.timedelta(days=30):
-                print("Already withdrew this month, cannot withdraw")
-                return False
-        # If not sufficient balance to withdraw.
-        if (self.account_balance - amount) < 0:
-            print("Limit Reached on the Negative Balance, cannot withdraw")
-            return False
-        self.account_balance -= amount
-        return True
-
-    def __str__(self):
-        return f"Account Type: {self.account_type}, Customer Name: {self.first_name} {self.last_name}, Balance: {self.account_balance}"
-
-
-class CheckingAccount(Account):
-    """
-    A class to represent a SavingAccount.
-
-    ...
-
-    Attributes
-    ----------
-    See Parent Class (Account) for Docstring.
-    _LIMIT: int
-        negative balance allowed.
-
-    Methods
-    -------
-    balance():
-        returns the balance of the account.
-    deposit(amount):
-        Deposits the given amount in the account.
-    transfer(amount, receiver):
-        Transfers amount from current account to the receiver.
-    withdraw(amount):
-        Withdraws the given amount.
-    """
-
-    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance):
-        """
-            Constructs all the attributes for Parent Class.
-        """
-        super().__init__(first_name, last_name, age, account_id, customer_id, account_type, account_balance)  # function to make Checking Account subclass of class Account
-        self._LIMIT = -200
-        
-    def balance(self):
-        """
-        returns the balance of the account.
-
-        Parameters
-        ----------
-        None
-
-        Returns
-        -------
-        None
-        """
-        return self.account_balance
-
-    def deposit(self, amount):
-        """
-        Adds the given amount in the account balance.
-
-        Parameters
-        ----------
-        amount : float
-            deposit amount
-
-        Returns
-        -------
-        True
-        """
-        self.account_balance += amount
-        return True
-
-    def transfer(self, amount, receiver):
-        """
-        Transfer the given amount to the receiver's account.
-
-        Parameters
-        ----------
-        amount : float
-            transfer amount
-        receiver: account
-            account to transfer the amount
-
-        Returns
-        -------
-        True, False: True if successful else False
-        """
-        
-        # checking if transfer will result in balance less than the allowed limit
-        if (self.account_balance - amount) < self._LIMIT:
-            print("Limit Reached on the Negative Balance, cannot transfer")
-            return False
-        self.account_balance -= amount
-        receiver.account_balance += amount
-        return True
-
-    def withdraw(self, amount):
-        """
-        Withdraw the amount from the account.
-
-        Parameters
-        ----------
-        amount : float
-            transfer amount
-
-        Returns
-        -------
-        True, False: True if successful else False
-        """
-        # checking if transfer will result in balance less than the allowed limit
-        if (self.account_balance - amount) < self._LIMIT:
-            print("Limit Reached on the Negative Balance, cannot withdraw")
-            return False
-        self.account_balance -= amount
-        return True
-
-    def __str__(self):
-        return f"Account Type: {self.account_type}, Customer Name: {self.first_name} {self.last_name}, Balance: {self.account_balance}"
-
-
-CUSTOMER_FILE = 'customers.txt'
-ACCOUNTS_FILE = 'accounts.txt'
-TRANSACTION_FILE = 'accountsTransactions.txt'
-
-with open(CUSTOMER_FILE, 'a+') as f:
-    pass
-with open(ACCOUNTS_FILE, 'a+') as f:
-    pass
-with open(TRANSACTION_FILE, 'a+') as f:
-    pass
-customers = []
-accounts = []
-transactions = []
-
-# Reading all the files and adding them to our lists at the start of the program.
-with open(CUSTOMER_FILE, 'r') as customerFile:
-    for line in customerFile.readlines():
-        line = line.strip()
-        name, lastName, age, customerID = line.split(',')
-        customers.append(Customer(name, lastName, age, customerID))
-
-with open(ACCOUNTS_FILE, 'r') as accountsFile:
-    for line in accountsFile.readlines():
-        line = line.strip()
-        name, lastName, age, accountId, customerID, accountType, account_balance = line.split(',')
-        if accountType == 'Savings':
-            accounts.append(SavingAccount(name, lastName, age, accountId, customerID, accountType, float(account_balance)))
-        else:
-            accounts.append(CheckingAccount(name, lastName, age, accountId, customerID, accountType, float(account_balance)))
-        
-with open(TRANSACTION_FILE, 'r') as transactionsFile:
-    for line in transactionsFile.readlines():
-        line = line.strip()
-        transactionID, accountID, transactionType, customerID, receiverID, amount, time = line.split(',')
-        transactions.append([transactionID, accountID, transactionType, customerID, receiverID, amount, time])
-
-currentCustomer = None
-
-# Starting a loop which will run our main program.
-while True:
-    # Making the customer to login to the system with their id.
-    print("Welcome.\n1. New customer.\n2. Old Customer.\n3. Exit.")
-    customerInput = int(input('Enter your choice: '))
-    if customerInput == 1:  # If new customer, adding them in our data
-        print('Please enter your details.')
-        name = input("Please enter your first name: ")
-        lastName = input("Please enter your last name: ")
-        age = int(input("Please enter your age: "))
-        id = len(customers) + 1
-        customers.append(Customer(name, lastName, age, id))
-        customer = customers[-1]
-        with open(CUSTOMER_FILE, 'a') as f:
-            f.write(f"{customer.first_name},{customer.last_name},{customer.age},{customer.cust_id}\n")  
-        print("Your customer ID is " + str(id))
-        currentCustomer = customers[-1]
-    elif customerInput == 2:  # If an already customer, asking about the id and then moving forward.
-        print("Enter you customer ID to login.")
-        customerID = input("Customer ID: ")
-        foundCustomer = [customer for customer in customers if int(customer.cust_id) == int(customerID)]
-        if len(foundCustomer) == 0:
-            print(f"No customer found with ID {customerID}")
-        else:
-            currentCustomer = foundCustomer[0]
-    elif customerInput == 3:  # Exit out of the system.
-        break
-    else:  # Invalid Input.
-        print('Wrong Input.')
-        
-    if not currentCustomer:
-        continue
-    while True:  # If a customer was found.
-        userInput = Account.menu()  # Showing the Accounts menu.
-        if userInput == 1:  # If user input 1, creating an account.
-            foundCustomer = [account for account in accounts if account.customer_id == currentCustomer.cust_id]
-            # If the customer has already an account showing error and going back.
-            if len(foundCustomer) > 0:
-                print("You already have an account setup.")
-                continue
-            # Else checking if the customer is 18 or older than 18 years.
-            if int(currentCustomer.age) >= 18:
-                # Making a CheckingAccount for the customer.
-                accountID = len(accounts) + 1
-                accounts.append(CheckingAccount(currentCustomer.first_name, currentCustomer.last_name, currentCustomer.age, accountID, currentCustomer.cust_id, "Checking", 0.0))
-                account = accounts[-1]
-                with open(ACCOUNTS_FILE, 'a') as f:
-                    f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-                print("A checking account was created.")
-            # Else if the customer is older than 14.
-            elif int(currentCustomer.age) >= 14:
-                # Creating a savings account.
-                accountID = len(accounts) + 1
-                accounts.append(SavingAccount(currentCustomer.first_name, currentCustomer.last_name, currentCustomer.age, accountID, currentCustomer.cust_id, "Savings", 0.0))
-                account = accounts[-1]                
-                with open(ACCOUNTS_FILE, 'a') as f:
-                    f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-                print("A savings account was created.")
-            else:
-                print("You are too young to create an account.")
-                
-        elif userInput == 2:  # Showing details of the accounts for the customer.
-            openedAccounts = [account for account in accounts if account.customer_id == currentCustomer.cust_id]
-            # If there are no accounts for the customer, showing error.
-            if len(openedAccounts) == 0:
-                print("You have no accounts setup.")
-                continue
-            currentAccount = openedAccounts[0]
-            print(f"{currentAccount.account_type} Account ID; ID {currentAccount.account_id}")
-            while True:
-                # Asking whether to check for balance or transactions.
-                print("Menu.\n1.Balance.\n2.Transactions.\n3.Back.")
-                choiceInput = int(input("Enter: "))
-                if choiceInput == 1:  # Printing the balance of the account.
-                    print("The account balance is: $" + str(currentAccount.account_balance))
-                elif choiceInput == 2:  # Printing all the transactions that happened with this account.
-                    accountTransactions = [transaction for transaction in transactions if transaction[1] == currentAccount.account_id]
-                    print(f"{'Transaction ID': <15}{'Account ID': <11}{'Transaction Type': <20}{'Customer ID': <12}{'Receiver ID': <12}{'Amount': <10}{'Time': <15}")
-                    for transaction in accountTransactions:
-                        print(f"{transaction[0]: <15}{transaction[1]: <11}{transaction[2]: <20}{transaction[3]: <12}{transaction[4]: <12}{transaction[5]: <10}{transaction[6]: <15}")
-                elif choiceInput == 3:
-                    break
-                else:
-                    print("Wrong Input, Please try again.")
-        elif userInput == 3:  # Performing operations with account.
-            openedAccounts = [account for account in accounts if account.customer_id == currentCustomer.cust_id]
-            if len(openedAccounts) == 0:
-                print("You have no accounts setup.")
-                continue
-            currentAccount = openedAccounts[-1]
-            while True:  # Asking if the user wants to deposit, withdraw or transfer.
-                print("Menu.\n1.Deposit.\n2.Withdraw.\n3.Transfer.\n4.Back.")
-                choiceInput = int(input("Enter: "))
-                if choiceInput == 1:  # If depositing
-                    amount = float(input("Enter the amount to add: "))
-                    result = currentAccount.deposit(amount)  # calling the deposit function.
-                    if result:  # If successful.
-                        print("Transaction completed successfully")
-                        transactionID = len(transactions) + 1
-                        # Adding the transaction and updating account.
-                        transactions.append([transactionID, currentAccount.account_id, "Deposit", currentCustomer.cust_id, 0, amount, str(datetime.datetime.now())])
-                        with open(TRANSACTION_FILE, 'a') as f:
-                            f.write(",".join([str(x) for x in transactions[-1]]) + "\n")        
-                        with open(ACCOUNTS_FILE, 'w') as f:
-                            for account in accounts:
-                                f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-                    else:
-                        print("error")
-                elif choiceInput == 2:  # If withdraw
-                    amount = float(input("Enter the amount to withdraw: "))
-                    # If savings account, checking for the last transaction(if it's already been done this month)
-                    if currentAccount.account_type == "Savings":
-                        lastWithdrawTransaction = [transaction for transaction in transactions if transaction[1] == currentAccount.account_id and transaction[2] == "Withdraw"]
-                        if len(lastWithdrawTransaction) == 0:
-                            lastWithdrawTransaction = None
-                        else:
-                            lastWithdrawTransaction = lastWithdrawTransaction[-1]
-                        # Calling withdraw function, with the last transaction.
-                        result = currentAccount.withdraw(amount, lastWithdrawTransaction)
-                    else:  # else if checking account, just withdrawing simply.
-                        result = currentAccount.withdraw(amount)
-                    if result:
-                        # If withdraw successful
-                        print("Transaction completed successfully")
-                        transactionID = len(transactions) + 1
-                        transactions.append([transactionID, currentAccount.account_id, "Withdraw", currentCustomer.cust_id, 0, amount, str(datetime.datetime.now())])
-                        with open(TRANSACTION_FILE, 'a') as f:
-                            f.write(",".join([str(x) for x in transactions[-1]]) + "\n")     
-                        with open(ACCOUNTS_FILE, 'w') as f:
-                            for account in accounts:
-                                f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-                
-                elif choiceInput == 3:  # If transferring
-                    # Asking for the amount and the account Id to transfer to.
-                    amount = float(input("Enter the amount to transfer: "))
-                    receiverId = input("Enter the ID of the account to transfer: ")
-                    receiver = [account for account in accounts if int(account.account_id) == int(receiverId)]
-                    if len(receiver) == 0:
-                        print("Wrong ID")
-                        continue
-                    receiver = receiver[0]
-                    # Same as before, if savings, getting last transactions this time for transfer.
-                    if currentAccount.account_type == "Savings":
-                        lastTransferTransaction = [transaction for transaction in transactions if transaction[1] == currentAccount.account_id and transaction[2] == "Transfer"]
-                        if len(lastTransferTransaction) == 0:
-                            lastTransferTransaction = None
-                        else:
-                            lastTransferTransaction = lastTransferTransaction[-1]
-                        result = currentAccount.transfer(amount, receiver, lastTransferTransaction)
-                    else:
-                        result = currentAccount.transfer(amount, receiver)
-                    if result:  # If successful, saving the data for accounts and transactions file.
-                        print("Transaction completed successfully")
-                        transactionID = len(transactions) + 1
-                        transactions.append([transactionID, currentAccount.account_id, "Transfer", currentCustomer.cust_id, receiver.account_id, amount, str(datetime.datetime.now())])
-                        with open(TRANSACTION_FILE, 'a') as f:
-                            f.write(",".join([str(x) for x in transactions[-1]]) + "\n")     
-                        with open(ACCOUNTS_FILE, 'w') as f:
-                            for account in accounts:
-                                f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-                elif choiceInput == 4:
-                    break
-                else:
-                    print("Wrong Input, Please try again.")
-
-        elif userInput == 4:  # If deleting account.
-            openedAccounts = [account for account in accounts if account.customer_id == currentCustomer.cust_id]
-            if len(openedAccounts) == 0:
-                print("You have no accounts setup.")
-                continue
-            currentAccount = openedAccounts[-1]
-            print("Account deleted Successfully!")
-            # Updating the list and the file.
-            accounts = [account for account in accounts if currentAccount.customer_id != account.customer_id]
-            with open(ACCOUNTS_FILE, 'w') as f:
-                for account in accounts:
-                    f.write(f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n")
-        elif userInput == 5:
-            break    
-        else:
-            print("Wrong Input, Please try again.")    
+import abc
+import array
+import collections
+import contextlib
+import datetime
+import math
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+import binarystore
+import customersearch
+import metrics
+# Functional bank system using OOP
+
+
+class Account(object):
+    """
+    A class to represent an Account.
+
+    ...
+
+    Accounts use __slots__ and keep the balance in integer cents, so that
+    sums of deposits are exact. The name and age of the holder are read from
+    the shared Customer object instead of being copied in every account.
+
+    Attributes
+    ----------
+    holder : Customer
+        customer holding the account.
+    first_name : str
+        first name of account holder, read from the holder.
+    last_name : str
+        last name of the account holder, read from the holder.
+    age : int
+        age of the account holder, read from the holder.
+    account_id : int
+        Unique ID of the account.
+    customer_id : int
+        Id of the customer with the account.
+    account_type : str
+        Type of the account based on the age.
+    balance_cents : int
+        Balance in the account in cents.
+    account_balance : float
+        Balance in the account, read from and written to balance_cents.
+
+    Methods
+    -------
+    menu():
+        prints a menu for the customer.
+    balance():
+        returns the balance of the account.
+    deposit(amount):
+        Deposits the given amount in the account.
+    transfer(amount, receiver):
+        Transfers amount from current account to the receiver.
+    withdraw(amount):
+        Withdraws the given amount.
+    """
+
+    __slots__ = ('holder', 'account_id', 'customer_id', 'account_type', 'balance_cents')
+
+    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance, holder=None):
+        """
+        Constructs all the necessary attributes for the Account object.
+
+        Parameters
+        ----------
+            first_name : str
+                first name of account holder.
+            last_name : str
+                last name of the account holder.
+            age : int
+                age of the account holder.
+            account_id : int
+                Unique ID of the account.
+            customer_id : int
+                Id of the customer with the account.
+            account_type : str
+                Type of the account based on the age.
+            account_balance : float
+                Balance in the account.
+            holder : Customer
+                customer holding the account, shared with the index; made
+                from the names and age only when None.
+        """
+        self.holder = holder if holder is not None else Customer(first_name, last_name, age, customer_id)
+        self.account_id = account_id
+        self.customer_id = customer_id
+        self.account_type = sys.intern(account_type)
+        self.balance_cents = to_cents(account_balance)
+
+    @property
+    def first_name(self):
+        return self.holder.first_name
+
+    @property
+    def last_name(self):
+        return self.holder.last_name
+
+    @property
+    def age(self):
+        return self.holder.age
+
+    @property
+    def account_balance(self):
+        return self.balance_cents / 100
+
+    @account_balance.setter
+    def account_balance(self, amount):
+        self.balance_cents = to_cents(amount)
+
+    @staticmethod  # does not receive any arguments
+    def menu():
+        print("Welcome to THIS Bank!\n"
+              "-----------------------\n"
+              "1. Create an account\n"
+              "2. View transactions and balance of account\n"
+              "3. Perform tasks with account\n"
+              "4. Delete your account\n"
+              "5. Exit\n")
+        userinput = int(input("Select an option: "))  # user input required for menu selection
+        return userinput
+
+
+class Customer(object):
+    """
+    A class to represent a Customer.
+
+    ...
+
+    Attributes
+    ----------
+    first_name : str
+        first name of customer.
+    last_name : str
+        last name of the customer.
+    age : int
+        age of the customer.
+    cust_id : int
+        Id of the customer.
+    """
+
+    __slots__ = ('first_name', 'last_name', 'age', 'cust_id')
+
+    def __init__(self, first_name, last_name, age, cust_id):
+        """
+        Constructs all the necessary attributes for the Account object.
+
+        Parameters
+        ----------
+            first_name : str
+                first name of customer.
+            last_name : str
+                last name of the customer.
+            age : int
+                age of the customer.
+            cust_id : int
+                Id of the customer.
+        """
+        self.first_name = first_name
+        self.last_name = last_name
+        self.age = age
+        self.cust_id = cust_id
+
+    def __str__(self):
+        return f"Customer ID: {self.cust_id}, Name: {self.first_name} {self.last_name}, Age: {self.age}"
+
+
+class SavingAccount(Account):
+    """
+    A class to represent a SavingAccount.
+
+    ...
+
+    Attributes
+    ----------
+    See Parent Class (Account) for Docstring.
+
+    Methods
+    -------
+    balance():
+        returns the balance of the account.
+    deposit(amount):
+        Deposits the given amount in the account.
+    transfer_error(amount, lastTransaction=None, lastTime=None):
+        returns why the transfer is not allowed or None.
+    transfer(amount, receiver, lastTransaction=None, lastTime=None):
+        Transfers amount from current account to the receiver.
+    withdraw_error(amount, lastTransaction=None, lastTime=None):
+        returns why the withdraw is not allowed or None.
+    withdraw(amount, lastTransaction=None, lastTime=None):
+        Withdraws the given amount.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance, holder=None):
+        """
+            Constructs all the attributes for Parent Class.
+        """
+        super().__init__(first_name, last_name, age, account_id, customer_id, account_type, account_balance, holder)  # function to make Saving Account subclass of class Account
+
+    def balance(self):
+        """
+        returns the balance of the account.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        return self.account_balance
+
+    def deposit(self, amount):
+        """
+        Adds the given amount in the account balance.
+
+        Parameters
+        ----------
+        amount : float
+            deposit amount
+
+        Returns
+        -------
+        True
+        """
+        self.balance_cents += to_cents(amount)
+        return True
+
+    def transfer_error(self, amount, lastTransaction=None, lastTime=None):
+        """
+        Checks if the given amount can be transferred.
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+        lastTransaction: list
+            last transaction for this account for transfer.
+        lastTime: datetime
+            time of the last transfer, used instead of parsing lastTransaction.
+
+        Returns
+        -------
+        str, None: the reason the transfer is refused else None
+        """
+        # If a last transaction was passed in the argument
+        if lastTime is None and lastTransaction:
+            lastTime = transaction_time(lastTransaction)
+        # Checking if the transaction was less than a month ago.
+        if lastTime and lastTime >= datetime.datetime.now() - datetime.timedelta(days=30):
+            return "Already a transfer this month, cannot transfer"
+        # If the transferring will result in less than 0 balance for this account.
+        if self.balance_cents - to_cents(amount) < 0:
+            return "Limit Reached on the Negative Balance, cannot transfer"
+        return None
+
+    def transfer(self, amount, receiver, lastTransaction=None, lastTime=None):
+        """
+        Transfer the given amount to the receiver's account..
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+        receiver: account
+            account to transfer the amount
+        lastTransaction: list
+            last transaction for this account for transfer.
+        lastTime: datetime
+            time of the last transfer, used instead of parsing lastTransaction.
+
+        Returns
+        -------
+        True, False: True if successful else False
+        """
+        error = self.transfer_error(amount, lastTransaction, lastTime)
+        if error:
+            print(error)
+            return False
+        self.balance_cents -= to_cents(amount)
+        receiver.balance_cents += to_cents(amount)
+        return True
+
+    def withdraw_error(self, amount, lastTransaction=None, lastTime=None):
+        """
+        Checks if the given amount can be withdrawn.
+
+        Parameters
+        ----------
+        amount : float
+            withdraw amount
+        lastTransaction: list
+            last transaction for this account for withdraw.
+        lastTime: datetime
+            time of the last withdraw, used instead of parsing lastTransaction.
+
+        Returns
+        -------
+        str, None: the reason the withdraw is refused else None
+        """
+        if lastTime is None and lastTransaction:
+            lastTime = transaction_time(lastTransaction)
+        # Checking if withdraw occurred from this account in this month.
+        if lastTime and lastTime >= datetime.datetime.now() - datetime.timedelta(days=30):
+            return "Already withdrew this month, cannot withdraw"
+        # If not sufficient balance to withdraw.
+        if self.balance_cents - to_cents(amount) < 0:
+            return "Limit Reached on the Negative Balance, cannot withdraw"
+        return None
+
+    def withdraw(self, amount, lastTransaction=None, lastTime=None):
+        """
+        Withdraw the amount from the account.
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+        lastTransaction: list
+            last transaction for this account for withdraw.
+        lastTime: datetime
+            time of the last withdraw, used instead of parsing lastTransaction.
+
+        Returns
+        -------
+        True, False: True if successful else False
+        """
+        error = self.withdraw_error(amount, lastTransaction, lastTime)
+        if error:
+            print(error)
+            return False
+        self.balance_cents -= to_cents(amount)
+        return True
+
+    def __str__(self):
+        return f"Account Type: {self.account_type}, Customer Name: {self.first_name} {self.last_name}, Balance: {self.account_balance}"
+
+
+class CheckingAccount(Account):
+    """
+    A class to represent a SavingAccount.
+
+    ...
+
+    Attributes
+    ----------
+    See Parent Class (Account) for Docstring.
+    _LIMIT: int
+        negative balance allowed.
+
+    Methods
+    -------
+    balance():
+        returns the balance of the account.
+    deposit(amount):
+        Deposits the given amount in the account.
+    transfer_error(amount):
+        returns why the transfer is not allowed or None.
+    transfer(amount, receiver):
+        Transfers amount from current account to the receiver.
+    withdraw_error(amount):
+        returns why the withdraw is not allowed or None.
+    withdraw(amount):
+        Withdraws the given amount.
+    """
+
+    __slots__ = ()
+    _LIMIT = -200
+
+    def __init__(self, first_name, last_name, age, account_id, customer_id, account_type, account_balance, holder=None):
+        """
+            Constructs all the attributes for Parent Class.
+        """
+        super().__init__(first_name, last_name, age, account_id, customer_id, account_type, account_balance, holder)  # function to make Checking Account subclass of class Account
+
+    def balance(self):
+        """
+        returns the balance of the account.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        return self.account_balance
+
+    def deposit(self, amount):
+        """
+        Adds the given amount in the account balance.
+
+        Parameters
+        ----------
+        amount : float
+            deposit amount
+
+        Returns
+        -------
+        True
+        """
+        self.balance_cents += to_cents(amount)
+        return True
+
+    def transfer_error(self, amount):
+        """
+        Checks if the given amount can be transferred.
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        str, None: the reason the transfer is refused else None
+        """
+        # checking if transfer will result in balance less than the allowed limit
+        if self.balance_cents - to_cents(amount) < self._LIMIT * 100:
+            return "Limit Reached on the Negative Balance, cannot transfer"
+        return None
+
+    def transfer(self, amount, receiver):
+        """
+        Transfer the given amount to the receiver's account.
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+        receiver: account
+            account to transfer the amount
+
+        Returns
+        -------
+        True, False: True if successful else False
+        """
+        error = self.transfer_error(amount)
+        if error:
+            print(error)
+            return False
+        self.balance_cents -= to_cents(amount)
+        receiver.balance_cents += to_cents(amount)
+        return True
+
+    def withdraw_error(self, amount):
+        """
+        Checks if the given amount can be withdrawn.
+
+        Parameters
+        ----------
+        amount : float
+            withdraw amount
+
+        Returns
+        -------
+        str, None: the reason the withdraw is refused else None
+        """
+        # checking if withdraw will result in balance less than the allowed limit
+        if self.balance_cents - to_cents(amount) < self._LIMIT * 100:
+            return "Limit Reached on the Negative Balance, cannot withdraw"
+        return None
+
+    def withdraw(self, amount):
+        """
+        Withdraw the amount from the account.
+
+        Parameters
+        ----------
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        True, False: True if successful else False
+        """
+        error = self.withdraw_error(amount)
+        if error:
+            print(error)
+            return False
+        self.balance_cents -= to_cents(amount)
+        return True
+
+    def __str__(self):
+        return f"Account Type: {self.account_type}, Customer Name: {self.first_name} {self.last_name}, Balance: {self.account_balance}"
+
+
+class Transaction(object):
+    """
+    A class to represent a Transaction.
+
+    ...
+
+    Transactions use __slots__ and keep the amount in integer cents and the
+    time in integer microseconds since 1970-01-01. They can still be read
+    like the rows of the transactions file: transaction[0] is the ID and
+    transaction[6] the time as text.
+
+    Attributes
+    ----------
+    transaction_id : int
+        Unique ID of the transaction.
+    account_id : int
+        Unique ID of the account.
+    transaction_type : str
+        type of the transaction (Deposit, Withdraw, Transfer).
+    customer_id : int
+        Id of the customer with the account.
+    receiver_id : int
+        Unique ID of the receiving account, 0 if none.
+    amount_cents : int
+        amount of the transaction in cents.
+    time_micros : int
+        time of the transaction in microseconds since 1970-01-01.
+    amount : float
+        amount of the transaction, read from amount_cents.
+    time : datetime
+        time of the transaction, read from time_micros.
+    """
+
+    __slots__ = ('transaction_id', 'account_id', 'transaction_type', 'customer_id', 'receiver_id', 'amount_cents', 'time_micros')
+
+    def __init__(self, transaction_id, account_id, transaction_type, customer_id, receiver_id, amount_cents, time_micros):
+        """
+        Constructs all the necessary attributes for the Transaction object.
+
+        Parameters
+        ----------
+            transaction_id : int
+                Unique ID of the transaction.
+            account_id : int
+                Unique ID of the account.
+            transaction_type : str
+                type of the transaction (Deposit, Withdraw, Transfer).
+            customer_id : int
+                Id of the customer with the account.
+            receiver_id : int
+                Unique ID of the receiving account, 0 if none.
+            amount_cents : int
+                amount of the transaction in cents.
+            time_micros : int
+                time of the transaction in microseconds since 1970-01-01.
+        """
+        self.transaction_id = transaction_id
+        self.account_id = account_id
+        self.transaction_type = sys.intern(transaction_type)
+        self.customer_id = customer_id
+        self.receiver_id = receiver_id
+        self.amount_cents = amount_cents
+        self.time_micros = time_micros
+
+    @property
+    def amount(self):
+        return self.amount_cents / 100
+
+    @property
+    def time(self):
+        return EPOCH + datetime.timedelta(microseconds=self.time_micros)
+
+    def _row(self):
+        """
+        returns the fields as they are written in the transactions file.
+        """
+        return (self.transaction_id, self.account_id, self.transaction_type, self.customer_id, self.receiver_id,
+                self.amount, str(self.time))
+
+    def __getitem__(self, position):
+        return self._row()[position]
+
+    def __iter__(self):
+        return iter(self._row())
+
+    def __len__(self):
+        return 7
+
+    def __str__(self):
+        return f"Transaction ID: {self.transaction_id}, Type: {self.transaction_type}, Amount: {self.amount}, Time: {self.time}"
+
+
+class BankIndex(object):
+    """
+    A class to keep hash indexes over customers and accounts.
+
+    ...
+
+    Every lookup made by the menus goes through this class, so that finding a
+    customer or an account costs O(1) instead of a scan of the whole list.
+    Transactions are indexed by the TransactionLog.
+
+    Attributes
+    ----------
+    customers : dict
+        cust_id -> Customer.
+    accounts : dict
+        account_id -> Account.
+    customer_accounts : dict
+        customer_id -> list of the customer's accounts, in creation order.
+    store : AccountStore
+        optional store the accounts are loaded from on demand.
+    first_account_id : int
+        ID of the first account, 1 unless the accounts are split in shards.
+    account_id_step : int
+        gap between two account IDs, the number of shards when split.
+    highest_customer_id : int
+        highest customer ID ever given, it never goes down.
+    highest_account_id : int
+        highest account ID ever given, closing the account does not lower it.
+
+    Methods
+    -------
+    add_customer(customer):
+        Adds a customer to the index.
+    find_customer(cust_id):
+        returns the customer with the given ID or None.
+    add_account(account):
+        Adds an account to the index.
+    remove_account(account):
+        Removes an account from the index.
+    find_account(account_id):
+        returns the account with the given ID or None.
+    find_customer_accounts(cust_id):
+        returns the list of accounts of the customer.
+    all_accounts():
+        returns every account, in account ID order.
+    mark_used(customer_id=0, account_id=0):
+        Records IDs as given, so they are never given again.
+    next_customer_id():
+        returns the ID for a new customer.
+    next_account_id():
+        returns the ID for a new account.
+    """
+
+    def __init__(self):
+        """
+        Constructs empty indexes.
+        """
+        self.customers = {}
+        self.accounts = {}
+        self.customer_accounts = {}
+        self.store = None
+        self.first_account_id = 1
+        self.account_id_step = 1
+        self.highest_customer_id = 0
+        self.highest_account_id = 0
+        self._loaded_customers = set()  # customers whose accounts were loaded from the store
+
+    def add_customer(self, customer):
+        """
+        Adds a customer to the index.
+
+        Parameters
+        ----------
+        customer : Customer
+            customer to add.
+
+        Returns
+        -------
+        None
+        """
+        self.customers[int(customer.cust_id)] = customer
+        self.mark_used(customer_id=int(customer.cust_id))
+
+    def find_customer(self, cust_id):
+        """
+        returns the customer with the given ID.
+
+        Parameters
+        ----------
+        cust_id : int
+            Id of the customer.
+
+        Returns
+        -------
+        Customer, None: the customer if found else None
+        """
+        return self.customers.get(int(cust_id))
+
+    def add_account(self, account):
+        """
+        Adds an account to the index.
+
+        Parameters
+        ----------
+        account : Account
+            account to add.
+
+        Returns
+        -------
+        None
+        """
+        self._share_holder(account)
+        self.accounts[int(account.account_id)] = account
+        self.customer_accounts.setdefault(int(account.customer_id), []).append(account)
+        self.mark_used(account_id=int(account.account_id))
+
+    def _share_holder(self, account):
+        """
+        Makes the account use the indexed customer instead of its own copy.
+        """
+        customer = self.customers.get(int(account.customer_id))
+        if customer is not None:
+            account.holder = customer
+
+    def remove_account(self, account):
+        """
+        Removes an account from the index.
+
+        Parameters
+        ----------
+        account : Account
+            account to remove.
+
+        Returns
+        -------
+        None
+        """
+        self.accounts.pop(int(account.account_id), None)
+        self.mark_used(account_id=int(account.account_id))
+        openedAccounts = self.customer_accounts.get(int(account.customer_id), [])
+        if account in openedAccounts:
+            openedAccounts.remove(account)
+        if not openedAccounts:
+            self.customer_accounts.pop(int(account.customer_id), None)
+
+    def find_account(self, account_id):
+        """
+        returns the account with the given ID.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+
+        Returns
+        -------
+        Account, None: the account if found else None
+        """
+        account = self.accounts.get(int(account_id))
+        # Accounts kept in a store are only loaded the first time they are needed.
+        if account is None and self.store is not None:
+            account = self.store.load_account(account_id)
+            if account is not None:
+                # Another thread may have loaded it meanwhile, the first one wins.
+                self._share_holder(account)
+                loaded = self.accounts.setdefault(int(account_id), account)
+                if loaded is account:
+                    self.customer_accounts.setdefault(int(account.customer_id), []).append(account)
+                account = loaded
+        return account
+
+    def find_customer_accounts(self, cust_id):
+        """
+        returns the accounts of the customer.
+
+        Parameters
+        ----------
+        cust_id : int
+            Id of the customer.
+
+        Returns
+        -------
+        list: accounts of the customer, oldest first
+        """
+        if self.store is not None and int(cust_id) not in self._loaded_customers:
+            self._loaded_customers.add(int(cust_id))
+            for accountId in self.store.customer_account_ids(cust_id):
+                self.find_account(accountId)
+        return self.customer_accounts.get(int(cust_id), [])
+
+    def all_accounts(self):
+        """
+        returns every account, loading the ones kept in the store.
+
+        Returns
+        -------
+        list: the accounts in account ID order
+        """
+        if self.store is None:
+            return sorted(self.accounts.values(), key=lambda account: account.account_id)
+        return [account for account in map(self.find_account, range(1, self.store.max_account_id() + 1))
+                if account is not None]
+
+    def mark_used(self, customer_id=0, account_id=0):
+        """
+        Records IDs as given, so they are never given again.
+
+        Parameters
+        ----------
+        customer_id : int
+            a customer ID in use or reserved.
+        account_id : int
+            an account ID in use, closed or reserved.
+
+        Returns
+        -------
+        None
+        """
+        if customer_id > self.highest_customer_id:
+            self.highest_customer_id = customer_id
+        if account_id > self.highest_account_id:
+            self.highest_account_id = account_id
+
+    def next_customer_id(self):
+        """
+        returns the ID for a new customer.
+        """
+        return self.highest_customer_id + 1
+
+    def next_account_id(self):
+        """
+        returns the ID for a new account, never one of a closed account.
+        """
+        highest = self.highest_account_id
+        if self.store is not None:
+            highest = max(highest, self.store.max_account_id())
+        if highest < self.first_account_id:
+            return self.first_account_id
+        return highest + self.account_id_step - (highest - self.first_account_id) % self.account_id_step
+
+
+class TransactionLog(object):
+    """
+    A class to represent the transactions file and its offset index.
+
+    ...
+
+    The transactions file is never loaded as a whole. A sidecar index file
+    keeps one fixed-width record (account_id, type code, byte offset) per
+    line of the transactions file, and transactions are read from their
+    offset when they are needed. The sidecar is read the first time an
+    account's history is needed, so opening the log costs the same whatever
+    the size of the history.
+
+    The sidecar header holds the length of the transactions file it covers;
+    lines written after it (by a crash or by an older version of the
+    program) are indexed when the log is opened. A partial last line left
+    by a crash during a write was never acknowledged, it is cut off when
+    the log is opened so that the next transaction starts a line of its own.
+
+    Attributes
+    ----------
+    path : str
+        path of the transactions file.
+    index_path : str
+        path of the sidecar index file.
+    last_id : int
+        ID of the last transaction written.
+    batching : bool
+        if True, writes are only flushed by flush().
+    bytes_written : int
+        bytes written to the transactions file and the sidecar since opened.
+
+    Methods
+    -------
+    append(transaction):
+        Writes a transaction at the end of the log.
+    flush():
+        Flushes the transactions file and the sidecar index.
+    sync():
+        Flushes the transactions file and forces it to disk.
+    last_transaction(account_id, transaction_type):
+        returns the last transaction of the given type for the account or None.
+    last_time(account_id, transaction_type):
+        returns the time of the last transaction of the given type or None.
+    page(account_id, page=0, page_size=20):
+        returns a page of the transactions of the account, newest first.
+    history(account_id):
+        returns all the transactions of the account, oldest first.
+    transactions_after(transaction_id):
+        returns the transactions written after the given one, oldest first.
+    close():
+        Flushes and closes the files.
+    """
+
+    RECORD = struct.Struct('<qbq')  # account_id, type code, offset of the line
+    HEADER = struct.Struct('<8sq')  # magic, length of the transactions file covered
+    MAGIC = b'BANKTXI1'
+
+    def __init__(self, path, index_path, loader=None):
+        """
+        Constructs all the necessary attributes for the TransactionLog object.
+
+        Parameters
+        ----------
+            path : str
+                path of the transactions file.
+            index_path : str
+                path of the sidecar index file, created if missing.
+            loader : ParallelLoader
+                indexes the lines the sidecar does not cover with a pool of processes, None to index them here.
+        """
+        self.path = path
+        self.index_path = index_path
+        self._loader = loader
+        self.batching = False
+        self.bytes_written = 0
+        self._lock = threading.RLock()
+        self._offsets = None  # account_id -> array of line offsets, loaded on first use
+        self._types = None  # account_id -> array of type codes, same order as _offsets
+        self._last_times = {}  # account_id -> {transaction type -> time of the last one}
+        self._pending = []  # packed sidecar records not written yet
+        self._file = open(path, 'ab')
+        self._size = self._file.seek(0, os.SEEK_END)
+        self._reader = open(path, 'rb')
+        self._trim_partial_line()
+        self._open_index()
+        self.last_id = self._read_last_id()
+
+    def _trim_partial_line(self):
+        """
+        Cuts a partial last line off the transactions file.
+        """
+        chunk = min(self._size, 4096)
+        while chunk:
+            self._reader.seek(self._size - chunk)
+            end = self._reader.read(chunk).rfind(b'\n')
+            if end >= 0 or chunk == self._size:
+                break
+            chunk = min(self._size, chunk * 2)
+        complete = self._size - chunk + end + 1 if chunk else 0
+        if complete < self._size:
+            self._file.truncate(complete)
+            self._size = complete
+
+    def _open_index(self):
+        """
+        Opens the sidecar index and indexes the lines it does not cover yet.
+        """
+        if not os.path.exists(self.index_path):
+            with open(self.index_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, 0))
+        self._index = open(self.index_path, 'r+b')
+        magic, covered = self.HEADER.unpack(self._index.read(self.HEADER.size))
+        records = (self._index.seek(0, os.SEEK_END) - self.HEADER.size) // self.RECORD.size
+        if magic != self.MAGIC or covered > self._size:
+            records, covered = 0, 0  # not our file or the log was replaced, rebuilding
+        # Records written after the last header update are dropped and rebuilt below.
+        while records:
+            self._index.seek(self.HEADER.size + (records - 1) * self.RECORD.size)
+            if self.RECORD.unpack(self._index.read(self.RECORD.size))[2] < covered:
+                break
+            records -= 1
+        self._index.truncate(self.HEADER.size + records * self.RECORD.size)
+        if covered < self._size and self._loader is not None and self._size - covered > self._loader.chunk_bytes:
+            records, offset = self._loader.transaction_records(self.path, covered, self._size)
+            self._pending.append(records)
+            self._flush_index(offset)
+        elif covered < self._size:
+            self._reader.seek(covered)
+            offset = covered
+            for line in self._reader:
+                if not line.endswith(b'\n'):
+                    break
+                fields = line.split(b',', 3)
+                if len(fields) == 4:  # not an empty line
+                    self._pending.append(self.RECORD.pack(int(fields[1]), TYPE_CODES.get(fields[2].decode(), 0), offset))
+                offset += len(line)
+            self._flush_index(offset)
+
+    def _flush_index(self, covered):
+        """
+        Appends the pending records to the sidecar and updates its header.
+        """
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(b''.join(self._pending))
+        self.bytes_written += sum(map(len, self._pending)) + self.HEADER.size
+        self._pending = []
+        self._index.seek(0)
+        self._index.write(self.HEADER.pack(self.MAGIC, covered))
+        self._index.flush()
+
+    def _read_last_id(self):
+        """
+        returns the ID of the last transaction, read from the end of the file.
+        """
+        if self._size == 0:
+            return 0
+        chunk = min(self._size, 4096)
+        while True:
+            self._reader.seek(self._size - chunk)
+            lines = self._reader.read(chunk).rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or chunk == self._size:
+                return int(lines[-1].split(b',', 1)[0])
+            chunk = min(self._size, chunk * 2)
+
+    def _load(self):
+        """
+        Reads the sidecar index into per-account arrays of offsets and types.
+        """
+        self.flush()
+        offsets, types = {}, {}
+        self._index.seek(self.HEADER.size)
+        for accountId, typeCode, offset in self.RECORD.iter_unpack(self._index.read()):
+            if accountId not in offsets:
+                offsets[accountId] = array.array('q')
+                types[accountId] = array.array('b')
+            offsets[accountId].append(offset)
+            types[accountId].append(typeCode)
+        self._offsets, self._types = offsets, types
+
+    def _read(self, offset):
+        """
+        returns the transaction written at the offset.
+        """
+        self._reader.seek(offset)
+        return parse_transaction(self._reader.readline().decode())
+
+    def append(self, transaction, time=None):
+        """
+        Writes a transaction at the end of the log.
+
+        Parameters
+        ----------
+        transaction : Transaction
+            the transaction to write, its ID must follow last_id.
+        time : datetime
+            time of the transaction, if already known.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            line = transaction_line(transaction).encode()
+            typeCode = TYPE_CODES.get(transaction.transaction_type, 0)
+            self._file.write(line)
+            self._pending.append(self.RECORD.pack(transaction.account_id, typeCode, self._size))
+            if self._offsets is not None:
+                if transaction.account_id not in self._offsets:
+                    self._offsets[transaction.account_id] = array.array('q')
+                    self._types[transaction.account_id] = array.array('b')
+                self._offsets[transaction.account_id].append(self._size)
+                self._types[transaction.account_id].append(typeCode)
+            self._size += len(line)
+            self.bytes_written += len(line)
+            self.last_id = transaction.transaction_id
+            self._last_times.setdefault(transaction.account_id, {})[transaction.transaction_type] = time or transaction.time
+            if not self.batching:
+                self.flush()
+
+    def flush(self):
+        """
+        Flushes the transactions file and the sidecar index.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._file.flush()
+            if self._pending:
+                self._flush_index(self._size)
+
+    def sync(self):
+        """
+        Flushes the transactions file and forces it to disk.
+
+        The sidecar index is written after the transactions it covers are on
+        disk, so it never points past the durable end of the file.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if self._pending:
+                self._flush_index(self._size)
+
+    def last_transaction(self, account_id, transaction_type):
+        """
+        returns the last transaction of the given type for the account.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        transaction_type : str
+            type of the transaction (Deposit, Withdraw, Transfer).
+
+        Returns
+        -------
+        Transaction, None: the last transaction if any else None
+        """
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+            self._file.flush()
+            typeCode = TYPE_CODES.get(transaction_type, 0)
+            offsets = self._offsets.get(int(account_id), ())
+            types = self._types.get(int(account_id), ())
+            for position in range(len(offsets) - 1, -1, -1):
+                if types[position] != typeCode:
+                    continue
+                transaction = self._read(offsets[position])
+                # Types without a code share code 0, the line tells them apart.
+                if typeCode or transaction.transaction_type == transaction_type:
+                    return transaction
+            return None
+
+    def last_time(self, account_id, transaction_type):
+        """
+        returns the time of the last transaction of the given type for the account.
+
+        The time is cached per account and type and set by every append, so
+        the savings rules only read the file once per account.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        transaction_type : str
+            type of the transaction (Deposit, Withdraw, Transfer).
+
+        Returns
+        -------
+        datetime, None: the time of the last transaction if any else None
+        """
+        times = self._last_times.get(int(account_id))
+        if times is not None and transaction_type in times:
+            return times[transaction_type]
+        lastTransaction = self.last_transaction(account_id, transaction_type)
+        time = lastTransaction.time if lastTransaction else None
+        with self._lock:
+            self._last_times.setdefault(int(account_id), {}).setdefault(transaction_type, time)
+        return time
+
+    def page(self, account_id, page=0, page_size=20):
+        """
+        returns a page of the transactions of the account, newest first.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        page : int
+            number of the page, 0 is the newest.
+        page_size : int
+            number of transactions per page.
+
+        Returns
+        -------
+        list: transactions of the page, newest first
+        """
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+            self._file.flush()
+            offsets = self._offsets.get(int(account_id), ())
+            end = len(offsets) - page * page_size
+            start = max(0, end - page_size)
+            return [self._read(offsets[position]) for position in range(end - 1, start - 1, -1)]
+
+    def history(self, account_id):
+        """
+        returns all the transactions of the account, oldest first.
+        """
+        with self._lock:
+            if self._offsets is None:
+                self._load()
+            self._file.flush()
+            return [self._read(offset) for offset in self._offsets.get(int(account_id), ())]
+
+    def transactions_after(self, transaction_id):
+        """
+        returns the transactions written after the given one, oldest first.
+
+        The end of the file is read back in growing chunks until it reaches
+        the given transaction, so a short tail costs the same whatever the
+        size of the log.
+
+        Parameters
+        ----------
+        transaction_id : int
+            ID of the last transaction not returned.
+
+        Returns
+        -------
+        list: the transactions with a greater ID
+        """
+        with self._lock:
+            self.flush()
+            if self._size == 0 or self.last_id <= transaction_id:
+                return []
+            chunk = min(self._size, 4096)
+            while True:
+                self._reader.seek(self._size - chunk)
+                lines = self._reader.read(chunk).rstrip(b'\n').split(b'\n')
+                if chunk == self._size:
+                    break
+                # The first line of a chunk can be cut, the chunk reaches far enough once the next one is not returned.
+                lines = lines[1:]
+                if lines and int(lines[0].split(b',', 1)[0]) <= transaction_id:
+                    break
+                chunk = min(self._size, chunk * 2)
+            return [parse_transaction(line.decode()) for line in lines if int(line.split(b',', 1)[0]) > transaction_id]
+
+    def close(self):
+        """
+        Flushes and closes the files.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self.flush()
+            self._file.close()
+            self._reader.close()
+            self._index.close()
+
+
+class AccountJournal(object):
+    """
+    A class to represent the append-only journal of account changes.
+
+    ...
+
+    Every account change is appended to the journal instead of rewriting the
+    whole accounts file, so a posting costs the same whatever the number of
+    accounts. Every `checkpoint_every` records the journal is folded into a
+    new accounts snapshot by a background thread.
+
+    The snapshot is built from the files, the previous snapshot with the
+    journal records applied, never from the accounts in memory: their
+    balances can already hold postings not written yet, and the snapshot
+    must only hold what the journal holds.
+
+    Journal records are one per line:
+        A,<account line>      account opened
+        B,account_id,balance  new balance of the account
+        D,account_id          account closed, a tombstone until the next checkpoint
+        L,transaction_id      the balances above hold the transactions up to this one
+
+    Records hold absolute values, so replaying a record twice is harmless.
+    The L record lets the storage redo the transactions of the log that a
+    crash kept out of the journal.
+
+    Attributes
+    ----------
+    accounts_file : str
+        path of the accounts snapshot.
+    journal_file : str
+        path of the active journal.
+    checkpoint_every : int
+        number of records after which a checkpoint is started.
+    covered : int
+        ID of the last transaction the journaled balances hold, None if unknown.
+    bytes_written : int
+        bytes written to the journal and the snapshots since opened.
+
+    Methods
+    -------
+    replay(index):
+        Applies the journal tail on top of the loaded snapshot.
+    record_open(account):
+        Appends an account opening to the journal.
+    record_balance(account):
+        Appends the new balance of the account to the journal.
+    record_balances(accounts, covered=None):
+        Appends the new balances of several accounts with one write.
+    record_balance_cents(balances, covered=None):
+        Appends balances captured when they were posted, with one write.
+    record_delete(account):
+        Appends an account deletion to the journal.
+    sync():
+        Forces the journal to disk.
+    checkpoint(wait=False):
+        Folds the journal into a new accounts snapshot.
+    close():
+        Waits for a running checkpoint and closes the journal.
+    """
+
+    def __init__(self, accounts_file, journal_file, checkpoint_every=1000):
+        """
+        Constructs all the necessary attributes for the AccountJournal object.
+
+        Parameters
+        ----------
+            accounts_file : str
+                path of the accounts snapshot.
+            journal_file : str
+                path of the active journal.
+            checkpoint_every : int
+                number of records after which a checkpoint is started.
+        """
+        self.accounts_file = accounts_file
+        self.journal_file = journal_file
+        self.checkpoint_every = checkpoint_every
+        self.covered = None
+        self.bytes_written = 0
+        self._folding_file = journal_file + '.old'  # journal being folded by a checkpoint
+        self._records = 0
+        self._thread = None
+        self._file = None
+
+    def replay(self, index):
+        """
+        Applies the journal tail on top of the snapshot already in the index.
+
+        Parameters
+        ----------
+        index : BankIndex
+            indexes holding the accounts of the snapshot.
+
+        Returns
+        -------
+        int: number of records replayed
+        """
+        replayed = 0
+        # A journal left by an unfinished checkpoint is older than the active one.
+        for path in (self._folding_file, self.journal_file):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as journalFile:
+                for line in journalFile:
+                    # A crash during a write can leave a partial last line.
+                    if not line.endswith('\n'):
+                        break
+                    record = line.rstrip('\n').split(',', 1)
+                    if record[0] == 'A':
+                        account = parse_account(record[1], index.customers)
+                        previous = index.find_account(account.account_id)
+                        if previous is not None:
+                            index.remove_account(previous)
+                        index.add_account(account)
+                    elif record[0] == 'B':
+                        accountId, account_balance = record[1].split(',')
+                        account = index.find_account(accountId)
+                        if account is not None:
+                            account.account_balance = float(account_balance)
+                    elif record[0] == 'D':
+                        account = index.find_account(record[1])
+                        if account is not None:
+                            index.remove_account(account)
+                    elif record[0] == 'L':
+                        self.covered = int(record[1])
+                        continue  # not a change, nothing to fold
+                    replayed += 1
+        self._records = replayed
+        return replayed
+
+    def _append(self, record, count=1):
+        """
+        Appends records to the active journal.
+        """
+        if self._file is None:
+            self._file = open(self.journal_file, 'a')
+        self._file.write(record)
+        self._file.flush()
+        self._records += count
+        self.bytes_written += len(record)
+
+    def record_open(self, account):
+        """
+        Appends an account opening to the journal.
+
+        Parameters
+        ----------
+        account : Account
+            the opened account.
+
+        Returns
+        -------
+        None
+        """
+        self._append('A,' + account_line(account))
+
+    def record_balance(self, account):
+        """
+        Appends the new balance of the account to the journal.
+
+        Parameters
+        ----------
+        account : Account
+            the account whose balance changed.
+
+        Returns
+        -------
+        None
+        """
+        self._append(f"B,{account.account_id},{account.account_balance}\n")
+
+    def _covering(self, records, count, covered):
+        """
+        Appends balance records followed by the ID of the last transaction they hold, with one write.
+        """
+        if covered is not None:
+            records.append(f"L,{covered}\n")
+            self.covered = covered
+        if records:
+            self._append("".join(records), count)
+
+    def record_balances(self, accounts, covered=None):
+        """
+        Appends the new balances of several accounts with a single write.
+
+        Parameters
+        ----------
+        accounts : list
+            the accounts whose balance changed.
+        covered : int
+            ID of the last transaction the balances hold, if known.
+
+        Returns
+        -------
+        None
+        """
+        self._covering([f"B,{account.account_id},{account.account_balance}\n" for account in accounts], len(accounts), covered)
+
+    def record_balance_cents(self, balances, covered=None):
+        """
+        Appends balances captured when they were posted with a single write.
+
+        Parameters
+        ----------
+        balances : dict
+            account_id -> balance in cents.
+        covered : int
+            ID of the last transaction the balances hold, if known.
+
+        Returns
+        -------
+        None
+        """
+        self._covering([f"B,{accountId},{cents / 100}\n" for accountId, cents in balances.items()], len(balances), covered)
+
+    def record_delete(self, account):
+        """
+        Appends an account deletion to the journal.
+
+        Parameters
+        ----------
+        account : Account
+            the deleted account.
+
+        Returns
+        -------
+        None
+        """
+        self._append(f"D,{account.account_id}\n")
+
+    def due(self):
+        """
+        returns True if enough records were written to start a checkpoint.
+        """
+        return self._records >= self.checkpoint_every
+
+    def sync(self):
+        """
+        Forces the records appended so far to disk.
+
+        Returns
+        -------
+        None
+        """
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def checkpoint(self, wait=False):
+        """
+        Folds the journal into a new accounts snapshot.
+
+        The active journal is renamed so that new records go to a fresh one,
+        then the previous snapshot and the renamed journal are merged into a
+        temporary file renamed over the accounts file in a background thread.
+        The folded journal is removed only once the new snapshot is in place.
+
+        Parameters
+        ----------
+        wait : bool
+            if True, waits for the snapshot to be written.
+
+        Returns
+        -------
+        None
+        """
+        # Only one checkpoint at a time, the previous one has to finish first.
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.journal_file):
+            if os.path.exists(self._folding_file):
+                # A checkpoint stopped by a crash, its journal is folded with this one.
+                with open(self._folding_file, 'a') as foldingFile, open(self.journal_file, 'r') as journalFile:
+                    foldingFile.write(journalFile.read())
+                    foldingFile.flush()
+                    os.fsync(foldingFile.fileno())
+                os.remove(self.journal_file)
+            else:
+                os.replace(self.journal_file, self._folding_file)
+        self._records = 0
+        if self.covered is not None:
+            # The fresh journal starts with what the snapshot will hold.
+            self._append(f"L,{self.covered}\n", 0)
+        self._thread = threading.Thread(target=self._write_snapshot, daemon=True)
+        self._thread.start()
+        if wait:
+            self._thread.join()
+            self._thread = None
+
+    def _folded_changes(self):
+        """
+        returns account_id -> change of the folded journal: the fields of an
+        opened account, the new balance of an account of the snapshot, or
+        None for a closed account.
+        """
+        changes = {}
+        if not os.path.exists(self._folding_file):
+            return changes
+        with open(self._folding_file, 'r') as journalFile:
+            for line in journalFile:
+                if not line.endswith('\n'):
+                    break
+                record = line.rstrip('\n').split(',', 1)
+                if record[0] == 'A':
+                    fields = record[1].split(',')
+                    changes[int(fields[3])] = fields
+                elif record[0] == 'B':
+                    accountId, account_balance = record[1].split(',')
+                    change = changes.get(int(accountId), '')
+                    if isinstance(change, list):
+                        change[6] = account_balance
+                    elif change is not None:
+                        changes[int(accountId)] = account_balance
+                elif record[0] == 'D':
+                    changes[int(record[1])] = None
+        return changes
+
+    def _write_snapshot(self):
+        """
+        Writes the previous snapshot with the folded journal applied and drops the folded journal.
+        """
+        changes = self._folded_changes()
+        temporaryFile = self.accounts_file + '.tmp'
+        written = 0
+        with open(self.accounts_file, 'r') as accountsFile, open(temporaryFile, 'w') as f:
+            for line in accountsFile:
+                fields = line.rstrip('\n').split(',')
+                if len(fields) != 7:
+                    continue
+                change = changes.pop(int(fields[3]), '')
+                if change is None:
+                    continue  # closed, the tombstone is dropped with the account
+                if isinstance(change, list):
+                    fields = change
+                elif change:
+                    fields[6] = change
+                line = ",".join(fields) + "\n"
+                f.write(line)
+                written += len(line)
+            # Accounts opened since the previous snapshot, balances of accounts never opened are ignored like replay() does.
+            for accountId in sorted(accountId for accountId, change in changes.items() if isinstance(change, list)):
+                line = ",".join(changes[accountId]) + "\n"
+                f.write(line)
+                written += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.bytes_written += written
+        os.replace(temporaryFile, self.accounts_file)
+        if os.path.exists(self._folding_file):
+            os.remove(self._folding_file)
+
+    def close(self):
+        """
+        Waits for a running checkpoint and closes the journal.
+
+        Returns
+        -------
+        None
+        """
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+CUSTOMER_FILE = 'customers.txt'
+ACCOUNTS_FILE = 'accounts.txt'
+TRANSACTION_FILE = 'accountsTransactions.txt'
+TRANSACTION_INDEX_FILE = 'accountsTransactions.idx'
+JOURNAL_FILE = 'accountsJournal.txt'
+ACCOUNTS_BINARY_FILE = 'accounts.bin'
+DATABASE_FILE = 'bank.db'
+IDS_FILE = 'ids.txt'
+
+
+EPOCH = datetime.datetime(1970, 1, 1)
+# Codes of the transaction types in the sidecar index, other types use 0.
+TYPE_CODES = {"Deposit": 1, "Withdraw": 2, "Transfer": 3}
+# Effect of a transaction on the balance of its account, a Transfer also credits its receiver.
+BALANCE_SIGNS = {"Deposit": 1, "Withdraw": -1, "Transfer": -1, "TransferIn": 1, "Interest": 1, "Fee": -1}
+
+
+def to_cents(amount):
+    """
+    returns the amount in integer cents.
+    """
+    return int(round(float(amount) * 100))
+
+
+def to_micros(time):
+    """
+    returns the datetime as integer microseconds since 1970-01-01.
+    """
+    return (time - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def account_line(account):
+    """
+    returns the line stored in the accounts file for the account.
+    """
+    return f"{account.first_name},{account.last_name},{account.age},{account.account_id},{account.customer_id},{account.account_type},{account.account_balance}\n"
+
+
+def make_account(name, lastName, age, accountId, customerID, accountType, account_balance, holder=None):
+    """
+    returns a SavingAccount or a CheckingAccount depending on the account type, held by the holder if given.
+    """
+    if accountType == 'Savings':
+        return SavingAccount(name, lastName, int(age), int(accountId), int(customerID), accountType, float(account_balance), holder)
+    return CheckingAccount(name, lastName, int(age), int(accountId), int(customerID), accountType, float(account_balance), holder)
+
+
+def build_account(holder, account_id, customer_id, account_type, balance_cents):
+    """
+    returns the account of a holder already built, with the balance in cents, without parsing any field.
+    """
+    accountClass = SavingAccount if account_type == 'Savings' else CheckingAccount
+    account = accountClass.__new__(accountClass)
+    account.holder = holder
+    account.account_id = account_id
+    account.customer_id = customer_id
+    account.account_type = account_type
+    account.balance_cents = balance_cents
+    return account
+
+
+def parse_account(line, customers=None):
+    """
+    returns the account stored in a line of the accounts file, held by its customer in customers if there.
+    """
+    fields = line.strip().split(',')
+    return make_account(*fields, holder=customers.get(int(fields[4])) if customers is not None else None)
+
+
+def customer_line(customer):
+    """
+    returns the line stored in the customers file for the customer.
+    """
+    return f"{customer.first_name},{customer.last_name},{customer.age},{customer.cust_id}\n"
+
+
+def transaction_line(transaction):
+    """
+    returns the line stored in the transactions file for the transaction.
+    """
+    return ",".join([str(x) for x in transaction]) + "\n"
+
+
+def transaction_time(transaction):
+    """
+    returns the time of the transaction as a datetime.
+    """
+    if isinstance(transaction, Transaction):
+        return transaction.time
+    # fromisoformat also reads times without microseconds, unlike strptime with %f.
+    return datetime.datetime.fromisoformat(transaction[6])
+
+
+def parse_transaction(line):
+    """
+    returns the transaction stored in a line of the transactions file.
+    """
+    transactionID, accountID, transactionType, customerID, receiverID, amount, time = line.strip().split(',')
+    return Transaction(int(transactionID), int(accountID), transactionType, int(customerID), int(receiverID),
+                       to_cents(amount), to_micros(datetime.datetime.fromisoformat(time)))
+
+
+def amount_error(amount):
+    """
+    returns why the amount cannot be posted, or None if it is a positive number of whole cents.
+    """
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        return f"Invalid amount {amount!r}"
+    if not math.isfinite(amount) or amount <= 0:
+        return "The amount must be greater than 0"
+    if round(amount, 2) != amount:
+        return "The amount cannot have more than 2 decimals"
+    return None
+
+
+class Storage(abc.ABC):
+    """
+    A class to represent where the bank keeps its customers, accounts and transactions.
+
+    ...
+
+    The Bank only reads and writes its data through these methods, so the
+    same bank can be kept in the text files (FileStorage) or in a SQLite
+    database (SQLiteStorage). Every method is abstract, a backend missing
+    one cannot be instantiated.
+
+    Attributes
+    ----------
+    last_id : int
+        ID of the last transaction written.
+    bytes_written : int
+        bytes written to the data files since opened (estimated by SQLiteStorage).
+
+    Methods
+    -------
+    load(index):
+        Fills the index with the customers and accounts.
+    add_customer(customer):
+        Stores a new customer.
+    record_open(account):
+        Stores a new account.
+    record_delete(account):
+        Removes a closed account.
+    record_balances(accounts):
+        Stores balances changed outside a posting.
+    save_ids(customer_id, account_id):
+        Stores the highest customer and account IDs given so far.
+    post(transaction, accounts, time=None):
+        Stores a transaction and the new balances of the accounts it changed.
+    begin_batch():
+        Defers the persistence of the postings until end_batch().
+    end_batch():
+        Persists the postings made since begin_batch().
+    commit():
+        Persists the deferred postings and forces every write to disk.
+    last_time(account_id, transaction_type):
+        returns the time of the last transaction of the given type or None.
+    page(account_id, page=0, page_size=20):
+        returns a page of the transactions of the account, newest first.
+    history(account_id):
+        returns all the transactions of the account, oldest first.
+    close():
+        Persists the pending writes and closes the storage.
+    """
+
+    last_id = 0
+    bytes_written = 0
+
+    @abc.abstractmethod
+    def load(self, index):
+        """
+        Fills the index with the customers and accounts.
+        """
+
+    @abc.abstractmethod
+    def add_customer(self, customer):
+        """
+        Stores a new customer.
+        """
+
+    @abc.abstractmethod
+    def record_open(self, account):
+        """
+        Stores a new account.
+        """
+
+    @abc.abstractmethod
+    def record_delete(self, account):
+        """
+        Removes a closed account, its transactions are kept.
+        """
+
+    @abc.abstractmethod
+    def record_balances(self, accounts):
+        """
+        Stores balances changed outside a posting, such as corrections.
+        """
+
+    @abc.abstractmethod
+    def save_ids(self, customer_id, account_id):
+        """
+        Stores the highest customer and account IDs given so far, load() marks them as used.
+        """
+
+    @abc.abstractmethod
+    def post(self, transaction, accounts, time=None):
+        """
+        Stores a transaction and the new balances of the accounts it changed.
+        """
+
+    @abc.abstractmethod
+    def begin_batch(self):
+        """
+        Defers the persistence of the postings until end_batch().
+        """
+
+    @abc.abstractmethod
+    def end_batch(self):
+        """
+        Persists the postings made since begin_batch().
+        """
+
+    @abc.abstractmethod
+    def commit(self):
+        """
+        Persists the deferred postings and forces every write to disk, a batch stays open.
+        """
+
+    @abc.abstractmethod
+    def last_time(self, account_id, transaction_type):
+        """
+        returns the time of the last transaction of the given type or None.
+        """
+
+    @abc.abstractmethod
+    def page(self, account_id, page=0, page_size=20):
+        """
+        returns a page of the transactions of the account, newest first.
+        """
+
+    @abc.abstractmethod
+    def history(self, account_id):
+        """
+        returns all the transactions of the account, oldest first.
+        """
+
+    @abc.abstractmethod
+    def close(self):
+        """
+        Persists the pending writes and closes the storage.
+        """
+
+
+class FileStorage(Storage):
+    """
+    A class to represent the bank kept in text files.
+
+    ...
+
+    Customers are appended to customers.txt, accounts live in accounts.txt
+    and its journal (or in accounts.bin when it exists) and transactions in
+    the transactions file and its sidecar index.
+
+    A closed account stays in the journal as a D record (a tombstone) and is
+    only dropped from accounts.txt by the next checkpoint. Before that, the
+    highest customer and account IDs are saved in ids.txt, so the ID of a
+    closed account is not given again once its tombstone is gone.
+
+    With a ParallelLoader, the customers and accounts files are parsed in
+    ranges by a pool of processes and the index is filled from the columns
+    they return, and the lines of the transactions file the sidecar does not
+    cover are indexed the same way.
+
+    Attributes
+    ----------
+    path : str
+        directory holding the data files.
+    loader : ParallelLoader
+        parses the files with a pool of processes, None to read them line by line.
+    accounts : AccountJournal, AccountStore
+        where the account changes are written.
+    log : TransactionLog
+        the transactions file.
+    bytes_written : int
+        bytes written to the customers and IDs files, the accounts and the log since opened.
+    """
+
+    def __init__(self, path, loader=None):
+        """
+        Constructs all the necessary attributes for the FileStorage object.
+
+        Parameters
+        ----------
+            path : str
+                directory holding the data files, missing files are created empty.
+            loader : ParallelLoader
+                parses the files with a pool of processes, None to read them line by line.
+        """
+        self.path = path
+        self.loader = loader
+        self.accounts = None
+        self.log = None
+        self._index = None
+        self._batch_accounts = None  # account_id -> balance in cents posted during a batch
+        self._customers = None  # customers file, opened on the first registration
+        self._small_bytes = 0  # customers and IDs files
+        for name in (CUSTOMER_FILE, ACCOUNTS_FILE, TRANSACTION_FILE):
+            with open(self._file(name), 'a+'):
+                pass
+
+    def _file(self, name):
+        """
+        returns the path of a data file of the bank.
+        """
+        return os.path.join(self.path, name)
+
+    @property
+    def last_id(self):
+        return self.log.last_id
+
+    @property
+    def bytes_written(self):
+        return (self._small_bytes + (self.accounts.bytes_written if self.accounts else 0)
+                + (self.log.bytes_written if self.log else 0))
+
+    def load(self, index):
+        """
+        Reads the customers, accounts and saved IDs and opens the transactions log.
+
+        Parameters
+        ----------
+        index : BankIndex
+            the index to fill.
+
+        Returns
+        -------
+        None
+        """
+        if self.loader is not None:
+            self._load_customer_columns(index)
+        else:
+            with open(self._file(CUSTOMER_FILE), 'r') as customerFile:
+                for line in customerFile:
+                    if line.count(',') != 3:
+                        continue  # empty line
+                    name, lastName, age, customerID = line.strip().split(',')
+                    index.add_customer(Customer(name, lastName, int(age), int(customerID)))
+        if os.path.exists(self._file(IDS_FILE)):
+            with open(self._file(IDS_FILE), 'r') as idsFile:
+                ids = dict(line.strip().split(',') for line in idsFile if line.count(',') == 1)
+            index.mark_used(int(ids.get('customer', 0)), int(ids.get('account', 0)))
+
+        if os.path.exists(self._file(ACCOUNTS_BINARY_FILE)):
+            # With a binary accounts file, accounts are read on demand and updated in place.
+            customers = index.customers
+
+            def make_held_account(*fields):
+                # Accounts read from the store share the customer already indexed.
+                return make_account(*fields, holder=customers.get(int(fields[4])))
+
+            self.accounts = binarystore.AccountStore(self._file(ACCOUNTS_BINARY_FILE), make_held_account)
+            index.store = self.accounts
+        else:
+            if self.loader is not None:
+                self._load_account_columns(index)
+            else:
+                with open(self._file(ACCOUNTS_FILE), 'r') as accountsFile:
+                    for line in accountsFile:
+                        if line.count(',') != 6:
+                            continue  # empty line
+                        index.add_account(parse_account(line, index.customers))
+            # Applying the account changes made since the last snapshot.
+            self.accounts = AccountJournal(self._file(ACCOUNTS_FILE), self._file(JOURNAL_FILE))
+            self._index = index
+            if self.accounts.replay(index):
+                self._checkpoint()
+
+        # Transactions are only read when needed, through the offsets of the sidecar index.
+        self.log = TransactionLog(self._file(TRANSACTION_FILE), self._file(TRANSACTION_INDEX_FILE), self.loader)
+        self._redo(index)
+        self._index = index
+
+    def _redo(self, index):
+        """
+        Applies the transactions of the log that the journaled balances do not hold yet.
+
+        A transaction is logged before its balances are journaled, a crash
+        between the two writes leaves balances behind the log.
+        """
+        covered = self.accounts.covered
+        if covered is None or self.log.last_id <= covered:
+            return
+        changed = {}
+        for transaction in self.log.transactions_after(covered):
+            cents = transaction.amount_cents
+            account = index.find_account(transaction.account_id)
+            if account is not None:
+                account.balance_cents += BALANCE_SIGNS.get(transaction.transaction_type, 0) * cents
+                changed[account.account_id] = account
+            receiver = index.find_account(transaction.receiver_id) if transaction.transaction_type == 'Transfer' else None
+            if receiver is not None:
+                receiver.balance_cents += cents
+                changed[receiver.account_id] = receiver
+        self.accounts.record_balances(list(changed.values()), self.log.last_id)
+
+    def _load_customer_columns(self, index):
+        """
+        Fills the index with the customers parsed by the loader.
+        """
+        ids, firstNames, lastNames, ages = self.loader.customers(self._file(CUSTOMER_FILE))
+        began = time.perf_counter()
+        for customer in map(Customer, firstNames, lastNames, ages, ids):
+            index.add_customer(customer)
+        self.loader.report[CUSTOMER_FILE]['build_seconds'] = round(time.perf_counter() - began, 3)
+
+    def _load_account_columns(self, index):
+        """
+        Fills the index with the accounts parsed by the loader, sharing the customers already indexed.
+        """
+        ids, customerIds, firstNames, lastNames, ages, accountTypes, cents = self.loader.accounts(self._file(ACCOUNTS_FILE))
+        began = time.perf_counter()
+        customers = index.customers
+        for accountId, customerId, name, lastName, age, accountType, balanceCents in zip(
+                ids, customerIds, firstNames, lastNames, ages, accountTypes, cents):
+            holder = customers.get(customerId) or Customer(name, lastName, age, customerId)
+            index.add_account(build_account(holder, accountId, customerId, accountType, balanceCents))
+        self.loader.report[ACCOUNTS_FILE]['build_seconds'] = round(time.perf_counter() - began, 3)
+
+    def _checkpoint(self):
+        """
+        Saves the highest IDs, then folds the journal and its tombstones into a new snapshot.
+        """
+        self.save_ids(self._index.highest_customer_id, self._index.highest_account_id)
+        self.accounts.checkpoint()
+
+    def add_customer(self, customer):
+        line = customer_line(customer)
+        if self._customers is None:
+            self._customers = open(self._file(CUSTOMER_FILE), 'a')
+        self._customers.write(line)
+        self._customers.flush()
+        self._small_bytes += len(line)
+
+    def record_open(self, account):
+        self.accounts.record_open(account)
+
+    def record_delete(self, account):
+        self.accounts.record_delete(account)
+
+    def record_balances(self, accounts):
+        if self._batch_accounts is not None:
+            for account in accounts:
+                self._batch_accounts[account.account_id] = account.balance_cents
+            return
+        self.accounts.record_balances(accounts)
+
+    def save_ids(self, customer_id, account_id):
+        """
+        Replaces ids.txt with the highest customer and account IDs and forces it to disk.
+        """
+        data = f"customer,{customer_id}\naccount,{account_id}\n"
+        temporaryFile = self._file(IDS_FILE) + '.tmp'
+        with open(temporaryFile, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporaryFile, self._file(IDS_FILE))
+        self._small_bytes += len(data)
+
+    def post(self, transaction, accounts, time=None):
+        """
+        Appends the transaction to the log and the balances to the journal.
+
+        Parameters
+        ----------
+        transaction : Transaction
+            the transaction to write, its ID must follow last_id.
+        accounts : list
+            the accounts whose balance the transaction changed.
+        time : datetime
+            time of the transaction, if already known.
+
+        Returns
+        -------
+        None
+        """
+        self.log.append(transaction, time)
+        if self._batch_accounts is not None:
+            # In a batch, balances are journaled once when the batch ends, as they were when posted:
+            # by then other postings may have changed the accounts without being written yet.
+            for account in accounts:
+                self._batch_accounts[account.account_id] = account.balance_cents
+            return
+        self.accounts.record_balances(accounts, transaction.transaction_id)
+        # Folding the journal into a new snapshot once it grew enough.
+        if self.accounts.due():
+            self._checkpoint()
+
+    def begin_batch(self):
+        self.log.batching = True
+        self._batch_accounts = {}
+
+    def end_batch(self):
+        self.log.batching = False
+        self.log.flush()
+        self.accounts.record_balance_cents(self._batch_accounts, self.log.last_id)
+        self._batch_accounts = None
+        if self.accounts.due():
+            self._checkpoint()
+
+    def commit(self):
+        """
+        Writes the deferred transactions and balances, then forces the files to disk.
+
+        Files are forced in the order they refer to each other: the
+        customers, the transactions, then the journal of the balances those
+        transactions made, written only once the transactions are on disk.
+        A checkpoint is only started once they are all on disk, so a
+        snapshot never holds a balance whose transaction could be lost.
+
+        Returns
+        -------
+        None
+        """
+        if self._customers is not None:
+            os.fsync(self._customers.fileno())
+        self.log.sync()
+        if self._batch_accounts:
+            self.accounts.record_balance_cents(self._batch_accounts, self.log.last_id)
+            self._batch_accounts = {}
+        self.accounts.sync()
+        if self.accounts.due():
+            self._checkpoint()
+
+    def last_time(self, account_id, transaction_type):
+        return self.log.last_time(account_id, transaction_type)
+
+    def page(self, account_id, page=0, page_size=20):
+        return self.log.page(account_id, page, page_size)
+
+    def history(self, account_id):
+        return self.log.history(account_id)
+
+    def close(self):
+        if self.accounts is not None:
+            self.accounts.close()
+        if self.log is not None:
+            self.log.close()
+        if self._customers is not None:
+            self._customers.close()
+        self.accounts = None
+        self.log = None
+        self._customers = None
+
+
+class SQLiteStorage(Storage):
+    """
+    A class to represent the bank kept in a SQLite database.
+
+    ...
+
+    The database runs in WAL mode, so readers (history pages, lookups) do not
+    wait for the writer. Accounts are read on demand like the binary store,
+    through the primary key and the index on customer_id, and the last
+    transaction of a type is found through the (account_id, type, time)
+    index. The SQL statements are constants, so sqlite3 prepares each of
+    them once per connection and reuses it.
+
+    A posting inserts the transaction and updates the balances of all the
+    accounts it changed in one database transaction, so a transfer is never
+    stored half done. In a batch the database transaction is only committed
+    by end_batch() or commit().
+
+    With synchronous='FULL' every commit is forced to disk, the default
+    'NORMAL' leaves it to the WAL checkpoints.
+
+    Closing an account deletes its row and raises the highest account ID of
+    the ids table in the same database transaction, so the ID of a closed
+    account is not given again.
+
+    Attributes
+    ----------
+    path : str
+        path of the database file, created if missing.
+    last_id : int
+        ID of the last transaction written.
+    batching : bool
+        if True, postings are only committed by end_batch().
+    bytes_written : int
+        estimated bytes of the rows written since opened, the pages SQLite writes are not counted.
+
+    Methods
+    -------
+    load_account(account_id):
+        returns the account with the given ID or None.
+    customer_account_ids(cust_id):
+        returns the IDs of the accounts of the customer.
+    max_account_id():
+        returns the highest account ID ever stored.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS customers (
+            cust_id INTEGER PRIMARY KEY, first_name TEXT NOT NULL, last_name TEXT NOT NULL, age INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS accounts (
+            account_id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL REFERENCES customers (cust_id),
+            account_type TEXT NOT NULL, balance_cents INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS accounts_customer ON accounts (customer_id);
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id INTEGER PRIMARY KEY, account_id INTEGER NOT NULL, transaction_type TEXT NOT NULL,
+            customer_id INTEGER NOT NULL, receiver_id INTEGER NOT NULL, amount_cents INTEGER NOT NULL,
+            time_micros INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS transactions_account ON transactions (account_id, transaction_id);
+        CREATE INDEX IF NOT EXISTS transactions_account_type ON transactions (account_id, transaction_type, time_micros);
+        CREATE TABLE IF NOT EXISTS ids (kind TEXT PRIMARY KEY, highest INTEGER NOT NULL);
+    """
+    SELECT_ACCOUNT = ("SELECT c.first_name, c.last_name, c.age, a.account_id, a.customer_id, a.account_type, a.balance_cents "
+                      "FROM accounts a JOIN customers c ON c.cust_id = a.customer_id WHERE a.account_id = ?")
+    SELECT_CUSTOMER_ACCOUNTS = "SELECT account_id FROM accounts WHERE customer_id = ? ORDER BY account_id"
+    INSERT_CUSTOMER = "INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?)"
+    INSERT_ACCOUNT = "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)"
+    DELETE_ACCOUNT = "DELETE FROM accounts WHERE account_id = ?"
+    SAVE_ID = ("INSERT INTO ids VALUES (?, ?) "
+               "ON CONFLICT (kind) DO UPDATE SET highest = MAX(highest, excluded.highest)")
+    SELECT_MAX_ACCOUNT_ID = ("SELECT MAX(IFNULL((SELECT MAX(account_id) FROM accounts), 0), "
+                             "IFNULL((SELECT highest FROM ids WHERE kind = 'account'), 0))")
+    UPDATE_BALANCE = "UPDATE accounts SET balance_cents = ? WHERE account_id = ?"
+    INSERT_TRANSACTION = "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)"
+    SELECT_LAST_TIME = ("SELECT MAX(time_micros) FROM transactions "
+                        "WHERE account_id = ? AND transaction_type = ?")
+    SELECT_PAGE = ("SELECT * FROM transactions WHERE account_id = ? "
+                   "ORDER BY transaction_id DESC LIMIT ? OFFSET ?")
+    SELECT_HISTORY = "SELECT * FROM transactions WHERE account_id = ? ORDER BY transaction_id"
+
+    def __init__(self, path, synchronous='NORMAL'):
+        """
+        Constructs all the necessary attributes for the SQLiteStorage object.
+
+        Parameters
+        ----------
+            path : str
+                path of the database file, created if missing.
+            synchronous : str
+                'FULL' to force every commit to disk, 'NORMAL' otherwise.
+        """
+        if synchronous not in ('NORMAL', 'FULL'):
+            raise ValueError(f"Unknown synchronous mode {synchronous}")
+        self.path = path
+        self.batching = False
+        self.bytes_written = 0
+        self._lock = threading.RLock()  # one connection shared by the threads of the bank
+        self._customers = {}  # cust_id -> Customer of the index, shared by the accounts read
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={synchronous}")
+        self._connection.executescript(self.SCHEMA)
+        self.last_id = self._connection.execute("SELECT MAX(transaction_id) FROM transactions").fetchone()[0] or 0
+
+    def load(self, index):
+        """
+        Reads the customers, accounts are read on demand through the index.
+
+        Parameters
+        ----------
+        index : BankIndex
+            the index to fill.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            for name, lastName, age, customerID in self._connection.execute("SELECT first_name, last_name, age, cust_id FROM customers"):
+                index.add_customer(Customer(name, lastName, age, customerID))
+            ids = dict(self._connection.execute("SELECT kind, highest FROM ids"))
+        index.mark_used(ids.get('customer', 0), ids.get('account', 0))
+        index.store = self
+        self._customers = index.customers
+
+    def load_account(self, account_id):
+        """
+        returns the account with the given ID or None.
+        """
+        with self._lock:
+            row = self._connection.execute(self.SELECT_ACCOUNT, (int(account_id),)).fetchone()
+        if row is None:
+            return None
+        return make_account(*row[:6], row[6] / 100, holder=self._customers.get(row[4]))
+
+    def customer_account_ids(self, cust_id):
+        """
+        returns the IDs of the accounts of the customer.
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute(self.SELECT_CUSTOMER_ACCOUNTS, (int(cust_id),))]
+
+    def max_account_id(self):
+        """
+        returns the highest account ID ever stored, closed accounts included.
+        """
+        with self._lock:
+            return self._connection.execute(self.SELECT_MAX_ACCOUNT_ID).fetchone()[0]
+
+    def _commit(self):
+        """
+        Commits the open database transaction unless a batch is running.
+        """
+        if not self.batching:
+            self._connection.commit()
+
+    def add_customer(self, customer):
+        with self._lock:
+            self._connection.execute(self.INSERT_CUSTOMER, (customer.cust_id, customer.first_name, customer.last_name, int(customer.age)))
+            self._commit()
+            self.bytes_written += 16 + len(customer.first_name) + len(customer.last_name)
+
+    def record_open(self, account):
+        with self._lock:
+            self._connection.execute(self.INSERT_ACCOUNT, (account.account_id, account.customer_id, account.account_type, account.balance_cents))
+            self._commit()
+            self.bytes_written += 24 + len(account.account_type)
+
+    def record_delete(self, account):
+        with self._lock:
+            self._connection.execute(self.DELETE_ACCOUNT, (account.account_id,))
+            self._connection.execute(self.SAVE_ID, ('account', account.account_id))
+            self._commit()
+            self.bytes_written += 16
+
+    def record_balances(self, accounts):
+        with self._lock:
+            self._connection.executemany(self.UPDATE_BALANCE, [(account.balance_cents, account.account_id) for account in accounts])
+            self._commit()
+            self.bytes_written += 16 * len(accounts)
+
+    def save_ids(self, customer_id, account_id):
+        with self._lock:
+            self._connection.executemany(self.SAVE_ID, [('customer', customer_id), ('account', account_id)])
+            self._commit()
+            self.bytes_written += 32
+
+    def post(self, transaction, accounts, time=None):
+        """
+        Inserts the transaction and updates the balances in one database transaction.
+
+        Parameters
+        ----------
+        transaction : Transaction
+            the transaction to write, its ID must follow last_id.
+        accounts : list
+            the accounts whose balance the transaction changed.
+        time : datetime
+            unused, the time is part of the transaction.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            try:
+                self._connection.execute(self.INSERT_TRANSACTION, (
+                    transaction.transaction_id, transaction.account_id, transaction.transaction_type,
+                    transaction.customer_id, transaction.receiver_id, transaction.amount_cents, transaction.time_micros))
+                self._connection.executemany(self.UPDATE_BALANCE, [(account.balance_cents, account.account_id) for account in accounts])
+                self._commit()
+            except sqlite3.Error:
+                self._connection.rollback()
+                raise
+            self.last_id = transaction.transaction_id
+            # Six integers and the type, plus the balance and ID of every account.
+            self.bytes_written += 48 + len(transaction.transaction_type) + 16 * len(accounts)
+
+    def begin_batch(self):
+        with self._lock:
+            self.batching = True
+
+    def end_batch(self):
+        with self._lock:
+            self.batching = False
+            self._connection.commit()
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def last_time(self, account_id, transaction_type):
+        with self._lock:
+            micros = self._connection.execute(self.SELECT_LAST_TIME, (int(account_id), transaction_type)).fetchone()[0]
+        if micros is None:
+            return None
+        return EPOCH + datetime.timedelta(microseconds=micros)
+
+    def page(self, account_id, page=0, page_size=20):
+        with self._lock:
+            rows = self._connection.execute(self.SELECT_PAGE, (int(account_id), page_size, page * page_size)).fetchall()
+        return [Transaction(*row) for row in rows]
+
+    def history(self, account_id):
+        with self._lock:
+            rows = self._connection.execute(self.SELECT_HISTORY, (int(account_id),)).fetchall()
+        return [Transaction(*row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+
+class GroupCommit(object):
+    """
+    A class to represent the group commit of the bank's writes.
+
+    ...
+
+    The storage is kept in batch mode and writes are not forced to disk one
+    by one. A committer thread commits them in groups: once a write is
+    waiting it waits up to `window` seconds, or until `count` writes are
+    waiting, then commits the storage once (one write and one fsync per
+    file) and wakes up every caller of the group. Callers wait for their
+    group after releasing the account locks, so they are only answered once
+    their writes are on disk.
+
+    With a window of 0 a group is made of the writes that arrived while the
+    previous commit was running, which keeps the latency of a lone caller to
+    one fsync. A longer window makes bigger groups, so fewer fsyncs and more
+    postings per second, at the cost of the latency of every posting.
+
+    Attributes
+    ----------
+    storage : Storage
+        the storage committed.
+    lock : RLock
+        commit lock of the bank, held while the storage is written to.
+    window : float
+        seconds a group waits for more writes before being committed.
+    count : int
+        number of waiting writes that commits a group before the window ends.
+    on_commit : function
+        called with the lock held after each group is on disk, or None.
+
+    Methods
+    -------
+    enqueue():
+        returns the ticket of a write to commit, called with the lock held.
+    wait(ticket=None):
+        Waits until the write of the ticket is on disk.
+    close():
+        Commits the last group and stops the committer thread.
+    """
+
+    def __init__(self, storage, lock, window=0.0, count=100, on_commit=None):
+        """
+        Constructs all the necessary attributes for the GroupCommit object.
+
+        Parameters
+        ----------
+            storage : Storage
+                the storage committed, already in batch mode.
+            lock : RLock
+                commit lock of the bank, held while the storage is written to.
+            window : float
+                seconds a group waits for more writes before being committed.
+            count : int
+                number of waiting writes that commits a group before the window ends.
+            on_commit : function
+                called with the lock held after each group is on disk.
+        """
+        self.storage = storage
+        self.lock = lock
+        self.window = window
+        self.count = count
+        self.on_commit = on_commit
+        self._condition = threading.Condition()
+        self._issued = 0  # ticket of the last write enqueued
+        self._durable = 0  # ticket of the last write on disk
+        self._error = None  # error of a failed commit, raised to the waiting callers
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def enqueue(self):
+        """
+        returns the ticket of a write to commit, called with the lock held.
+        """
+        with self._condition:
+            self._issued += 1
+            self._condition.notify_all()
+            return self._issued
+
+    def wait(self, ticket=None):
+        """
+        Waits until the write of the ticket is on disk.
+
+        Parameters
+        ----------
+        ticket : int
+            ticket returned by enqueue(), by default every write enqueued so far.
+
+        Returns
+        -------
+        None
+        """
+        with self._condition:
+            if ticket is None:
+                ticket = self._issued
+            while self._durable < ticket:
+                if self._error is not None:
+                    raise self._error
+                self._condition.wait()
+
+    def _run(self):
+        """
+        Commits the groups of writes until closed.
+        """
+        while True:
+            with self._condition:
+                while self._issued == self._durable and not self._closed:
+                    self._condition.wait()
+                if self._issued == self._durable:
+                    return
+                # Letting the group grow until the window ends or enough writes wait.
+                deadline = time.monotonic() + self.window
+                while self._issued - self._durable < self.count and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+            try:
+                with self.lock:
+                    with self._condition:
+                        ticket = self._issued
+                    self.storage.commit()
+                    if self.on_commit is not None:
+                        self.on_commit()
+            except (OSError, sqlite3.Error) as error:
+                with self._condition:
+                    self._error = error
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._durable = ticket
+                self._condition.notify_all()
+
+    def close(self):
+        """
+        Commits the last group and stops the committer thread.
+
+        Returns
+        -------
+        None
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+def files_to_sqlite(path='.'):
+    """
+    Copies the bank kept in the text files of the directory into its database.
+
+    Parameters
+    ----------
+    path : str
+        directory holding the data files, the database is written next to them.
+
+    Returns
+    -------
+    tuple: number of customers, accounts and transactions copied
+    """
+    files = FileStorage(path)
+    index = BankIndex()
+    files.load(index)
+    database = SQLiteStorage(os.path.join(path, DATABASE_FILE))
+    database.begin_batch()
+    for customer in index.customers.values():
+        database.add_customer(customer)
+    if index.store is not None:
+        stored = [index.find_account(accountId) for accountId in range(1, index.store.max_account_id() + 1)]
+    else:
+        stored = list(index.accounts.values())
+    accounts = 0
+    for account in filter(None, stored):
+        # Accounts whose customer is missing keep the holder stored with them.
+        if index.find_customer(account.customer_id) is None:
+            database.add_customer(Customer(account.first_name, account.last_name, account.age, account.customer_id))
+        database.record_open(account)
+        accounts += 1
+    database.save_ids(index.highest_customer_id, index.highest_account_id)
+    transactions = 0
+    with open(files.log.path, 'r') as transactionFile:
+        for line in transactionFile:
+            try:
+                transaction = parse_transaction(line)
+            except ValueError:
+                continue  # partial line left by a crash
+            database.post(transaction, [])
+            transactions += 1
+    database.end_batch()
+    database.close()
+    files.close()
+    return len(index.customers), accounts, transactions
+
+
+# Outcome of a bank operation: success flag, message for the customer and the created object.
+Result = collections.namedtuple('Result', ['success', 'message', 'value'])
+
+
+class Bank(object):
+    """
+    A class to represent the bank engine.
+
+    ...
+
+    Nothing is read when the module is imported or the Bank is created, the
+    data files of the directory given to open() are read the first time they
+    are needed. Operations return a Result instead of printing, so the engine
+    can be used by the menus, by scripts and by services alike.
+
+    Operations can be called from several threads. Every posting holds the
+    locks of the accounts it touches, taken in ascending account ID order so
+    that two transfers can never wait on each other, and transaction IDs and
+    file writes are serialised by one short commit lock. Postings on
+    different accounts only share the commit lock.
+
+    A durable bank answers an operation only once its writes are on disk.
+    The writes of concurrent operations are forced to disk together by a
+    GroupCommit, tuned by commit_window and commit_count.
+
+    Attributes
+    ----------
+    path : str
+        directory holding the data files, None until opened.
+    backend : str
+        'files' or 'sqlite', the kind of storage of the bank.
+    durable : bool
+        if True, operations are answered once their writes are on disk.
+    loader : ParallelLoader
+        parses the text files with a pool of processes, None to read them line by line.
+    index : BankIndex
+        indexes over the loaded data, loaded on first access.
+    storage : Storage
+        where the customers, accounts and transactions are kept, opened on first access.
+    names : NameIndex
+        prefix index over the customer names, read on first search.
+    metrics : Metrics
+        measures of the operations, None unless enable_metrics() was called.
+    feed : ChangeFeed
+        feed the committed postings are published to, None unless enable_feed() was called.
+
+    Methods
+    -------
+    open(path='.', backend=None, durable=True, commit_window=0.0, commit_count=100, loader=None):
+        Opens the bank stored in the directory.
+    close():
+        Closes the bank.
+    register_customer(first_name, last_name, age):
+        Adds a new customer.
+    register_new_customer(first_name, last_name, age):
+        Adds a new customer unless one with the same names and age is registered.
+    find_customer(cust_id):
+        returns the customer with the given ID or None.
+    search_customers(last_name, first_name=None, age=None, limit=20):
+        returns the customers whose names start with the given ones.
+    find_duplicates(first_name, last_name, age):
+        returns the customers already registered with the same names and age.
+    find_accounts(cust_id):
+        returns the accounts of the customer.
+    find_account(account_id):
+        returns the account with the given ID or None.
+    history(account_id):
+        returns the transactions of the account.
+    history_page(account_id, page=0, page_size=20):
+        returns a page of the transactions of the account, newest first.
+    open_account(cust_id):
+        Opens an account for the customer.
+    close_account(account_id):
+        Closes the account.
+    deposit(account_id, amount):
+        Deposits the given amount in the account.
+    withdraw(account_id, amount):
+        Withdraws the given amount from the account.
+    transfer(account_id, receiver_id, amount):
+        Transfers the given amount between two accounts.
+    transfer_error(account_id, amount):
+        returns why the account cannot transfer the amount, or None.
+    transfer_out(account_id, receiver_id, amount):
+        Takes a transfer out of the account for a receiver kept elsewhere.
+    credit(account_id, amount, transaction_type, receiver_id=0):
+        Adds an amount decided by the bank itself to the account.
+    correct_balances(balances):
+        Sets the balances of accounts to corrected values.
+    post_adjustments(adjustments, time=None):
+        Posts amounts decided by the bank itself to many accounts at once.
+    batch():
+        Defers the persistence of the postings to the end of a block.
+    enable_metrics(recorder=None):
+        Starts measuring the operations.
+    disable_metrics():
+        Stops measuring the operations.
+    enable_feed(changes):
+        Publishes the committed postings to a change feed.
+    disable_feed():
+        Stops publishing the postings.
+    """
+
+    def __init__(self):
+        """
+        Constructs a bank that is not opened yet.
+        """
+        self.path = None
+        self.backend = None
+        self.durable = True
+        self.commit_window = 0.0
+        self.commit_count = 100
+        self.loader = None
+        self._index = None
+        self._storage = None
+        self._names = None
+        self._committer = None
+        self._batch = threading.local()  # batching: True in a thread running a batch block
+        self.metrics = None
+        self.feed = None
+        self._lock = threading.RLock()  # commit lock: loading, IDs, indexes and files
+        self._account_locks = {}  # account_id -> lock of the account
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def open(self, path='.', backend=None, durable=True, commit_window=0.0, commit_count=100, loader=None):
+        """
+        Opens the bank stored in the directory, the data is loaded lazily.
+
+        Parameters
+        ----------
+        path : str
+            directory holding the data files, created files are empty.
+        backend : str
+            'files' for the text files or 'sqlite' for the database, by
+            default 'sqlite' when the directory holds a database.
+        durable : bool
+            if True, operations are answered once their writes are on disk,
+            else writes are left to the operating system.
+        commit_window : float
+            seconds a group commit waits for more writes, 0 commits as soon
+            as the previous group is on disk.
+        commit_count : int
+            number of waiting writes that commits a group before the window ends.
+        loader : ParallelLoader
+            parses the text files with a pool of processes when the bank is
+            loaded, its report holds the time taken; None reads them line by line.
+
+        Returns
+        -------
+        Bank: the bank itself
+        """
+        if self.path is not None:
+            self.close()
+        if backend is None:
+            backend = 'sqlite' if os.path.exists(os.path.join(path, DATABASE_FILE)) else 'files'
+        if backend not in ('files', 'sqlite'):
+            raise ValueError(f"Unknown storage backend {backend}")
+        self.path = path
+        self.backend = backend
+        self.durable = durable
+        self.commit_window = commit_window
+        self.commit_count = commit_count
+        self.loader = loader
+        return self
+
+    def close(self):
+        """
+        Closes the bank, waiting for pending writes.
+
+        Returns
+        -------
+        None
+        """
+        if self._committer is not None:
+            self._committer.close()
+        if self._storage is not None:
+            if self._committer is not None:
+                self._storage.end_batch()
+            self._storage.close()
+        if self._names is not None:
+            self._names.save()
+        self._committer = None
+        self._storage = None
+        self._names = None
+        self._index = None
+        self.path = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load()
+        return self._index
+
+    @property
+    def storage(self):
+        if self._index is None:
+            self.index
+        return self._storage
+
+    @property
+    def names(self):
+        if self._names is None:
+            with self._lock:
+                if self._names is None:
+                    self._names = customersearch.NameIndex(os.path.join(self.path, customersearch.NAMES_FILE)).load(self.index)
+        return self._names
+
+    @contextlib.contextmanager
+    def _locked(self, *accounts):
+        """
+        Holds the locks of the accounts, taken in ascending account ID order.
+        """
+        with self._lock:
+            locks = [self._account_locks.setdefault(accountId, threading.Lock())
+                     for accountId in sorted({int(account.account_id) for account in accounts})]
+        with contextlib.ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            yield
+
+    def _load(self):
+        """
+        Opens the storage of the bank and reads the customers and accounts.
+        """
+        if self.path is None:
+            raise ValueError("The bank is not open")
+        index = BankIndex()
+        if self.backend == 'sqlite':
+            self._storage = SQLiteStorage(os.path.join(self.path, DATABASE_FILE), 'FULL' if self.durable else 'NORMAL')
+        else:
+            self._storage = FileStorage(self.path, self.loader)
+        self._storage.load(index)
+        if self.durable:
+            # Writes are deferred by the storage until the committer forces a group to disk.
+            self._storage.begin_batch()
+            self._committer = GroupCommit(self._storage, self._lock, self.commit_window, self.commit_count, self._committed)
+        self._index = index
+
+    @property
+    def _batching(self):
+        """
+        True in a thread running a batch block, other threads keep committing their own postings.
+        """
+        return getattr(self._batch, 'batching', False)
+
+    def _written(self):
+        """
+        Queues the writes just made for the next group commit, called with the commit lock held.
+        """
+        if self._committer is not None and not self._batching:
+            self._committer.enqueue()
+        elif self._committer is None and not self._batching:
+            self._committed()  # nothing more is done to persist the writes of a bank that is not durable
+
+    def _committed(self):
+        """
+        Publishes the postings written so far to the change feed, called with the commit lock held.
+        """
+        if self.feed is not None:
+            self.feed.publish()
+
+    def _sync(self):
+        """
+        Waits until the writes queued so far are on disk, called without any lock held.
+        """
+        if self._committer is not None and not self._batching:
+            self._committer.wait()
+
+    def register_customer(self, first_name, last_name, age, cust_id=None):
+        """
+        Adds a new customer.
+
+        Parameters
+        ----------
+        first_name : str
+            first name of customer.
+        last_name : str
+            last name of the customer.
+        age : int
+            age of the customer.
+        cust_id : int
+            ID given by a coordinator of shards, by default the one after the highest ID ever given.
+
+        Returns
+        -------
+        Customer: the new customer
+        """
+        with self._lock:
+            customer = self._add_customer(first_name, last_name, age, cust_id)
+        self._sync()
+        return customer
+
+    def _add_customer(self, first_name, last_name, age, cust_id=None):
+        """
+        Indexes and stores a new customer, called with the commit lock held.
+        """
+        customer = Customer(first_name, last_name, age, cust_id if cust_id is not None else self.index.next_customer_id())
+        self.index.add_customer(customer)
+        self.storage.add_customer(customer)
+        if self._names is not None:
+            self._names.add(customer)
+        self._written()
+        return customer
+
+    def register_new_customer(self, first_name, last_name, age):
+        """
+        Adds a new customer unless one with the same names and age is already registered.
+
+        The check and the registration are made under the commit lock, so two
+        clients registering the same person at the same time get one customer.
+
+        Parameters
+        ----------
+        first_name : str
+            first name of customer.
+        last_name : str
+            last name of the customer.
+        age : int
+            age of the customer.
+
+        Returns
+        -------
+        Result: the new customer as value, or the customers already registered if refused
+        """
+        with self._lock:
+            duplicates = self.find_duplicates(first_name, last_name, age)
+            if duplicates:
+                return Result(False, "A customer with these names and age is already registered.", duplicates)
+            customer = self._add_customer(first_name, last_name, age)
+        self._sync()
+        return Result(True, f"Your customer ID is {customer.cust_id}", customer)
+
+    def find_customer(self, cust_id):
+        """
+        returns the customer with the given ID or None.
+        """
+        return self.index.find_customer(cust_id)
+
+    def search_customers(self, last_name, first_name=None, age=None, limit=20):
+        """
+        returns the customers whose names start with the given ones, to find a forgotten ID.
+
+        Parameters
+        ----------
+        last_name : str
+            start of the last name, or the whole last name when first_name is given.
+        first_name : str
+            start of the first name, None to match any.
+        age : int
+            age of the customers, None to match any.
+        limit : int
+            most customers returned.
+
+        Returns
+        -------
+        list: customers ordered by last name, first name and age
+        """
+        return [self.index.find_customer(customerId) for customerId in self.names.search(last_name, first_name, age, limit)]
+
+    def find_duplicates(self, first_name, last_name, age):
+        """
+        returns the customers already registered with the same names and age, oldest first.
+        """
+        return [self.index.find_customer(customerId) for customerId in self.names.duplicates(first_name, last_name, age)]
+
+    def find_accounts(self, cust_id):
+        """
+        returns the accounts of the customer, oldest first.
+        """
+        return self.index.find_customer_accounts(cust_id)
+
+    def find_account(self, account_id):
+        """
+        returns the account with the given ID or None.
+        """
+        return self.index.find_account(account_id)
+
+    def history(self, account_id):
+        """
+        returns the transactions of the account, oldest first.
+        """
+        return self.storage.history(account_id)
+
+    def history_page(self, account_id, page=0, page_size=20):
+        """
+        returns a page of the transactions of the account, newest first.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        page : int
+            number of the page, 0 is the newest.
+        page_size : int
+            number of transactions per page.
+
+        Returns
+        -------
+        list: transactions of the page, newest first
+        """
+        return self.storage.page(account_id, page, page_size)
+
+    def open_account(self, cust_id):
+        """
+        Opens an account for the customer.
+
+        Customers of 18 or older get a checking account, customers of 14 or
+        older a savings account.
+
+        Parameters
+        ----------
+        cust_id : int
+            Id of the customer.
+
+        Returns
+        -------
+        Result: the opened account as value
+        """
+        customer = self.index.find_customer(cust_id)
+        if customer is None:
+            return Result(False, f"No customer found with ID {cust_id}", None)
+        with self._lock:
+            # If the customer has already an account showing error.
+            if len(self.index.find_customer_accounts(cust_id)) > 0:
+                return Result(False, "You already have an account setup.", None)
+            if int(customer.age) >= 18:
+                account = CheckingAccount(customer.first_name, customer.last_name, customer.age, self.index.next_account_id(), customer.cust_id, "Checking", 0.0, customer)
+                message = "A checking account was created."
+            elif int(customer.age) >= 14:
+                account = SavingAccount(customer.first_name, customer.last_name, customer.age, self.index.next_account_id(), customer.cust_id, "Savings", 0.0, customer)
+                message = "A savings account was created."
+            else:
+                return Result(False, "You are too young to create an account.", None)
+            self.index.add_account(account)
+            self.storage.record_open(account)
+            self._written()
+        self._sync()
+        return Result(True, message, account)
+
+    def close_account(self, account_id):
+        """
+        Closes the account, its transactions are kept.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+
+        Returns
+        -------
+        Result: the closed account as value
+        """
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        with self._locked(account), self._lock:
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            self.index.remove_account(account)
+            self.storage.record_delete(account)
+            # Threads still waiting on the lock find the account gone once they hold it.
+            self._account_locks.pop(int(account.account_id), None)
+            self._written()
+        self._sync()
+        return Result(True, "Account deleted Successfully!", account)
+
+    def _post(self, account, transactionType, amount, receiver=None, receiver_id=0, time=None):
+        """
+        Stores a successful posting and the new balances of its accounts.
+
+        Called with the locks of the accounts held, so the storage gets the
+        balances in the order they were changed. The transaction is dated now
+        unless a time is given.
+        """
+        with self._lock:
+            now = time or datetime.datetime.now()
+            transaction = Transaction(self.storage.last_id + 1, account.account_id, transactionType, account.customer_id,
+                                      receiver.account_id if receiver else receiver_id, to_cents(amount), to_micros(now))
+            self.storage.post(transaction, [account, receiver] if receiver else [account], now)
+            if self.feed is not None:
+                self.feed.stage(transaction)
+            self._written()
+        return transaction
+
+    def deposit(self, account_id, amount):
+        """
+        Deposits the given amount in the account.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        amount : float
+            deposit amount
+
+        Returns
+        -------
+        Result: the transaction as value
+        """
+        error = amount_error(amount)
+        if error:
+            return Result(False, error, None)
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        with self._locked(account):
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            account.deposit(amount)
+            transaction = self._post(account, "Deposit", amount)
+        self._sync()
+        return Result(True, "Transaction completed successfully", transaction)
+
+    def withdraw(self, account_id, amount):
+        """
+        Withdraws the given amount from the account.
+
+        Savings accounts can only withdraw once every 30 days.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        amount : float
+            withdraw amount
+
+        Returns
+        -------
+        Result: the transaction as value
+        """
+        error = amount_error(amount)
+        if error:
+            return Result(False, error, None)
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        with self._locked(account):
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            # If savings account, checking for the last transaction(if it's already been done this month)
+            if account.account_type == "Savings":
+                lastWithdrawTime = self.storage.last_time(account.account_id, "Withdraw")
+                error = account.withdraw_error(amount, lastTime=lastWithdrawTime)
+                if not error:
+                    account.withdraw(amount, lastTime=lastWithdrawTime)
+            else:
+                error = account.withdraw_error(amount)
+                if not error:
+                    account.withdraw(amount)
+            if error:
+                return Result(False, error, None)
+            transaction = self._post(account, "Withdraw", amount)
+        self._sync()
+        return Result(True, "Transaction completed successfully", transaction)
+
+    def transfer(self, account_id, receiver_id, amount):
+        """
+        Transfers the given amount from the account to the receiver.
+
+        Savings accounts can only transfer once every 30 days.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        receiver_id : int
+            Unique ID of the account receiving the amount.
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        Result: the transaction as value
+        """
+        error = amount_error(amount)
+        if error:
+            return Result(False, error, None)
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        receiver = self.index.find_account(receiver_id)
+        if receiver is None:
+            return Result(False, "Wrong ID", None)
+        with self._locked(account, receiver):
+            # Either account can have been closed while waiting for the locks.
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            if self.index.find_account(receiver_id) is not receiver:
+                return Result(False, "Wrong ID", None)
+            # Same as withdraw, if savings, getting last transactions this time for transfer.
+            if account.account_type == "Savings":
+                lastTransferTime = self.storage.last_time(account.account_id, "Transfer")
+                error = account.transfer_error(amount, lastTime=lastTransferTime)
+                if not error:
+                    account.transfer(amount, receiver, lastTime=lastTransferTime)
+            else:
+                error = account.transfer_error(amount)
+                if not error:
+                    account.transfer(amount, receiver)
+            if error:
+                return Result(False, error, None)
+            transaction = self._post(account, "Transfer", amount, receiver)
+        self._sync()
+        return Result(True, "Transaction completed successfully", transaction)
+
+    def transfer_error(self, account_id, amount):
+        """
+        returns why the account cannot transfer the amount, or None if it can.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        str, None: the error message or None
+        """
+        error = amount_error(amount)
+        if error:
+            return error
+        account = self.index.find_account(account_id)
+        if account is None:
+            return f"No account found with ID {account_id}"
+        if account.account_type == "Savings":
+            return account.transfer_error(amount, lastTime=self.storage.last_time(account.account_id, "Transfer"))
+        return account.transfer_error(amount)
+
+    def transfer_out(self, account_id, receiver_id, amount):
+        """
+        Takes a transfer out of the account for a receiver kept by another bank.
+
+        Used by the shards, the receiver is credited by the shard holding it.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        receiver_id : int
+            Unique ID of the account receiving the amount elsewhere.
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        Result: the transaction as value
+        """
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        with self._locked(account):
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            error = self.transfer_error(account_id, amount)
+            if error:
+                return Result(False, error, None)
+            account.balance_cents -= to_cents(amount)
+            transaction = self._post(account, "Transfer", amount, receiver_id=int(receiver_id))
+        self._sync()
+        return Result(True, "Transaction completed successfully", transaction)
+
+    def credit(self, account_id, amount, transaction_type, receiver_id=0):
+        """
+        Adds an amount decided by the bank itself to the account, without the customer limits.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        amount : float
+            amount credited.
+        transaction_type : str
+            type recorded for the transaction, such as TransferIn.
+        receiver_id : int
+            account on the other side of the transaction, 0 if none.
+
+        Returns
+        -------
+        Result: the transaction as value
+        """
+        account = self.index.find_account(account_id)
+        if account is None:
+            return Result(False, f"No account found with ID {account_id}", None)
+        with self._locked(account):
+            if self.index.find_account(account_id) is not account:
+                return Result(False, f"No account found with ID {account_id}", None)
+            account.balance_cents += to_cents(amount)
+            transaction = self._post(account, transaction_type, amount, receiver_id=int(receiver_id))
+        self._sync()
+        return Result(True, "Transaction completed successfully", transaction)
+
+    def correct_balances(self, balances):
+        """
+        Sets the balances of accounts to corrected values, without transactions.
+
+        Used by the reconciliation to repair balances that disagree with the
+        transactions log.
+
+        Parameters
+        ----------
+        balances : dict
+            account_id -> corrected balance in cents.
+
+        Returns
+        -------
+        int: number of accounts corrected
+        """
+        accounts = [account for account in map(self.index.find_account, balances) if account is not None]
+        with self._locked(*accounts), self._lock:
+            # Accounts closed while waiting for their locks are left out.
+            accounts = [account for account in accounts if self.index.find_account(account.account_id) is account]
+            for account in accounts:
+                account.balance_cents = int(balances[account.account_id])
+            self.storage.record_balances(accounts)
+            self._written()
+        self._sync()
+        return len(accounts)
+
+    def post_adjustments(self, adjustments, time=None):
+        """
+        Posts amounts decided by the bank itself, such as interest and fees, to many accounts at once.
+
+        Every adjustment is recorded as a transaction of its type and changes
+        the balance by the sign of the type in BALANCE_SIGNS, without the
+        customer limits. The postings are made in one batch, so the balances
+        are persisted (and forced to disk) once for the whole run.
+
+        Parameters
+        ----------
+        adjustments : iterable
+            (account_id, transaction_type, cents) of every posting, cents being positive.
+        time : datetime
+            time recorded for the transactions, now by default.
+
+        Returns
+        -------
+        int: number of transactions posted
+        """
+        posted = 0
+        with self.batch():
+            for accountId, transactionType, cents in adjustments:
+                account = self.index.find_account(accountId)
+                if account is None or cents <= 0:
+                    continue
+                with self._locked(account):
+                    account.balance_cents += BALANCE_SIGNS[transactionType] * cents
+                    self._post(account, transactionType, cents / 100, time=time)
+                posted += 1
+        return posted
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Defers the persistence of the postings made in the block.
+
+        With the text files, transactions are buffered by the log and the
+        final balance of every account touched is journaled with a single
+        write when the block ends. With the database, the whole block is
+        committed as one database transaction. A durable bank forces the
+        block to disk once, when it ends, instead of once per group; the
+        postings of other threads are still answered once on disk.
+
+        Returns
+        -------
+        Bank: the bank itself
+        """
+        self.index  # loading before the batch starts
+        if self._committer is not None:
+            # The storage is already deferring its writes, only the group commits are held back.
+            self._batch.batching = True
+            try:
+                yield self
+            finally:
+                self._batch.batching = False
+                with self._lock:
+                    self._written()
+                self._sync()
+            return
+        with self._lock:
+            self.storage.begin_batch()
+            self._batch.batching = True
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch.batching = False
+                self.storage.end_batch()
+                self._written()
+
+    def enable_metrics(self, recorder=None):
+        """
+        Starts measuring the operations of the bank: counts, latencies and bytes written.
+
+        Only this bank object is instrumented, banks without metrics are not
+        slowed down.
+
+        Parameters
+        ----------
+        recorder : Metrics
+            where the measures are kept, a new Metrics by default.
+
+        Returns
+        -------
+        Metrics: the measures, also kept in the metrics attribute
+        """
+        if self.metrics is None:
+            self.metrics = recorder or metrics.Metrics()
+            self.metrics.instrument(self)
+        return self.metrics
+
+    def disable_metrics(self):
+        """
+        Stops measuring the operations, the measures taken so far are returned.
+        """
+        recorder, self.metrics = self.metrics, None
+        if recorder is not None:
+            recorder.release()
+        return recorder
+
+    def enable_feed(self, changes):
+        """
+        Publishes every committed posting to a change feed, in transaction ID order.
+
+        A posting is published once it is on disk for a durable bank, once
+        written otherwise, and at the end of the block in a batch().
+
+        Parameters
+        ----------
+        changes : ChangeFeed
+            the feed, such as feed.ChangeFeed(os.path.join(path, feed.FEED_FILE)).
+
+        Returns
+        -------
+        ChangeFeed: the feed, also kept in the feed attribute
+        """
+        with self._lock:
+            self.feed = changes
+        return changes
+
+    def disable_feed(self):
+        """
+        Stops publishing the postings, the feed is returned after the last commit was published to it.
+        """
+        if self._committer is not None:
+            self._committer.wait()
+        with self._lock:
+            changes, self.feed = self.feed, None
+        return changes
+
+
+def main(path='.'):
+    """
+    Runs the interactive menus over the bank stored in the directory.
+
+    Parameters
+    ----------
+    path : str
+        directory holding the data files.
+
+    Returns
+    -------
+    None
+    """
+    bank = Bank().open(path)
+    currentCustomer = None
+
+    # Starting a loop which will run our main program.
+    while True:
+        # Making the customer to login to the system with their id.
+        print("Welcome.\n1. New customer.\n2. Old Customer.\n3. Exit.")
+        customerInput = int(input('Enter your choice: '))
+        if customerInput == 1:  # If new customer, adding them in our data
+            print('Please enter your details.')
+            name = input("Please enter your first name: ")
+            lastName = input("Please enter your last name: ")
+            age = int(input("Please enter your age: "))
+            # A customer registered with the same details is offered their existing ID.
+            duplicates = bank.find_duplicates(name, lastName, age)
+            if duplicates:
+                print("You are already registered with customer ID " + ", ".join(str(customer.cust_id) for customer in duplicates))
+            if duplicates and input("Enter y to login with it, anything else to register again: ") == 'y':
+                currentCustomer = duplicates[0]
+            else:
+                currentCustomer = bank.register_customer(name, lastName, age)
+                print("Your customer ID is " + str(currentCustomer.cust_id))
+        elif customerInput == 2:  # If an already customer, asking about the id and then moving forward.
+            print("Enter you customer ID to login.")
+            customerID = input("Customer ID (Enter if you forgot it): ")
+            if not customerID.strip():  # Finding the forgotten ID from the name and age.
+                lastName = input("Please enter your last name: ")
+                name = input("Please enter your first name: ")
+                age = int(input("Please enter your age: "))
+                matches = bank.search_customers(lastName, name, age)
+                if not matches:
+                    print("No customer found with these details.")
+                    continue
+                print("Your customer ID is " + ", ".join(str(customer.cust_id) for customer in matches))
+                customerID = matches[0].cust_id
+            foundCustomer = bank.find_customer(customerID)
+            if foundCustomer is None:
+                print(f"No customer found with ID {customerID}")
+            else:
+                currentCustomer = foundCustomer
+        elif customerInput == 3:  # Exit out of the system.
+            break
+        else:  # Invalid Input.
+            print('Wrong Input.')
+
+        if not currentCustomer:
+            continue
+        while True:  # If a customer was found.
+            userInput = Account.menu()  # Showing the Accounts menu.
+            if userInput == 1:  # If user input 1, creating an account.
+                print(bank.open_account(currentCustomer.cust_id).message)
+
+            elif userInput == 2:  # Showing details of the accounts for the customer.
+                openedAccounts = bank.find_accounts(currentCustomer.cust_id)
+                # If there are no accounts for the customer, showing error.
+                if len(openedAccounts) == 0:
+                    print("You have no accounts setup.")
+                    continue
+                currentAccount = openedAccounts[0]
+                print(f"{currentAccount.account_type} Account ID; ID {currentAccount.account_id}")
+                while True:
+                    # Asking whether to check for balance or transactions.
+                    print("Menu.\n1.Balance.\n2.Transactions.\n3.Back.")
+                    choiceInput = int(input("Enter: "))
+                    if choiceInput == 1:  # Printing the balance of the account.
+                        print("The account balance is: $" + str(currentAccount.account_balance))
+                    elif choiceInput == 2:  # Printing the transactions of this account, newest first, page by page.
+                        pageSize = input("Transactions per page (Enter for 10): ")
+                        pageSize = int(pageSize) if pageSize.strip() else 10
+                        page = 0
+                        while True:
+                            accountTransactions = bank.history_page(currentAccount.account_id, page, pageSize)
+                            print(f"{'Transaction ID': <15}{'Account ID': <11}{'Transaction Type': <20}{'Customer ID': <12}{'Receiver ID': <12}{'Amount': <10}{'Time': <15}")
+                            for transaction in accountTransactions:
+                                print(f"{transaction[0]: <15}{transaction[1]: <11}{transaction[2]: <20}{transaction[3]: <12}{transaction[4]: <12}{transaction[5]: <10}{transaction[6]: <15}")
+                            # Stopping at the oldest page or when the customer does not want more.
+                            if len(accountTransactions) < pageSize or input("Enter n for the next page: ") != 'n':
+                                break
+                            page += 1
+                    elif choiceInput == 3:
+                        break
+                    else:
+                        print("Wrong Input, Please try again.")
+            elif userInput == 3:  # Performing operations with account.
+                openedAccounts = bank.find_accounts(currentCustomer.cust_id)
+                if len(openedAccounts) == 0:
+                    print("You have no accounts setup.")
+                    continue
+                currentAccount = openedAccounts[-1]
+                while True:  # Asking if the user wants to deposit, withdraw or transfer.
+                    print("Menu.\n1.Deposit.\n2.Withdraw.\n3.Transfer.\n4.Back.")
+                    choiceInput = int(input("Enter: "))
+                    if choiceInput == 1:  # If depositing
+                        amount = float(input("Enter the amount to add: "))
+                        print(bank.deposit(currentAccount.account_id, amount).message)
+                    elif choiceInput == 2:  # If withdraw
+                        amount = float(input("Enter the amount to withdraw: "))
+                        print(bank.withdraw(currentAccount.account_id, amount).message)
+                    elif choiceInput == 3:  # If transferring
+                        # Asking for the amount and the account Id to transfer to.
+                        amount = float(input("Enter the amount to transfer: "))
+                        receiverId = input("Enter the ID of the account to transfer: ")
+                        print(bank.transfer(currentAccount.account_id, receiverId, amount).message)
+                    elif choiceInput == 4:
+                        break
+                    else:
+                        print("Wrong Input, Please try again.")
+
+            elif userInput == 4:  # If deleting account.
+                openedAccounts = bank.find_accounts(currentCustomer.cust_id)
+                if len(openedAccounts) == 0:
+                    print("You have no accounts setup.")
+                    continue
+                for account in list(openedAccounts):
+                    result = bank.close_account(account.account_id)
+                print(result.message)
+            elif userInput == 5:
+                break
+            else:
+                print("Wrong Input, Please try again.")
+    bank.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import json
+import time
+
+import banking
+# Non-interactive batch posting of deposits, withdrawals and transfers
+
+
+FIELDS = ['id', 'type', 'account', 'receiver', 'amount']
+RESULT_FIELDS = ['id', 'success', 'message', 'transaction_id']
+CHUNK_SIZE = 1000  # requests handed to the workers at a time
+
+
+def read_requests(path):
+    """
+    Yields the posting requests of a JSONL or CSV file one at a time.
+
+    CSV files need a header with the columns id, type, account, receiver and
+    amount. Lines that cannot be read are yielded as their error message.
+
+    Parameters
+    ----------
+    path : str
+        path of the requests file, .csv for CSV else JSON lines.
+
+    Returns
+    -------
+    generator: dict of the request or str of the error
+    """
+    with open(path, 'r', newline='') as requestsFile:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(requestsFile):
+                yield row
+        else:
+            for number, line in enumerate(requestsFile, 1):
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    yield f"Line {number} is not valid JSON"
+                    continue
+                yield request if isinstance(request, dict) else f"Line {number} is not a JSON object"
+
+
+def apply_request(bank, request):
+    """
+    Applies one posting request to the bank.
+
+    A request that cannot be applied, such as an invalid, negative or nan
+    amount, gives a failed result and posts nothing.
+
+    Parameters
+    ----------
+    bank : Bank
+        the bank to post to.
+    request : dict
+        the request with type, account, receiver and amount.
+
+    Returns
+    -------
+    Result: outcome of the posting
+    """
+    try:
+        transactionType = str(request['type']).capitalize()
+        accountId = int(request['account'])
+        amount = float(request['amount'])
+        if transactionType == 'Deposit':
+            return bank.deposit(accountId, amount)
+        if transactionType == 'Withdraw':
+            return bank.withdraw(accountId, amount)
+        if transactionType == 'Transfer':
+            return bank.transfer(accountId, int(request['receiver']), amount)
+        return banking.Result(False, f"Unknown transaction type {request['type']}", None)
+    except (KeyError, TypeError, ValueError, OverflowError) as error:
+        return banking.Result(False, f"Invalid request: {error}", None)
+
+
+def handle_request(bank, request):
+    """
+    returns the request ID and the outcome of a request read from the file.
+    """
+    if isinstance(request, str):
+        return None, banking.Result(False, request, None)
+    return request.get('id'), apply_request(bank, request)
+
+
+def run_batch(bank, requests_path, results_path, workers=1):
+    """
+    Applies every request of the requests file and writes one result per request.
+
+    The requests are read and the results written as a stream, and the whole
+    batch is persisted with a single flush when it ends.
+
+    Parameters
+    ----------
+    bank : Bank
+        the bank to post to.
+    requests_path : str
+        path of the requests file (.csv or JSON lines).
+    results_path : str
+        path of the results file (.csv or JSON lines).
+    workers : int
+        number of threads posting at the same time, results keep the
+        order of the requests.
+
+    Returns
+    -------
+    dict: number of requests, succeeded, failed and seconds taken
+    """
+    report = {'requests': 0, 'succeeded': 0, 'failed': 0}
+    start = time.perf_counter()
+    requests = read_requests(requests_path)
+    with open(results_path, 'w', newline='') as resultsFile, bank.batch(), \
+            concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        writer = csv.DictWriter(resultsFile, RESULT_FIELDS) if results_path.endswith('.csv') else None
+        if writer:
+            writer.writeheader()
+        # Handing the requests over in chunks keeps memory flat whatever the batch size.
+        while True:
+            chunk = list(itertools.islice(requests, CHUNK_SIZE))
+            if not chunk:
+                break
+            if workers > 1:
+                outcomes = executor.map(handle_request, itertools.repeat(bank), chunk)
+            else:
+                outcomes = map(handle_request, itertools.repeat(bank), chunk)
+            for requestId, result in outcomes:
+                report['requests'] += 1
+                report['succeeded' if result.success else 'failed'] += 1
+                row = {'id': requestId, 'success': result.success, 'message': result.message,
+                       'transaction_id': result.value[0] if result.success else None}
+                if writer:
+                    writer.writerow(row)
+                else:
+                    resultsFile.write(json.dumps(row) + "\n")
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply a file of postings to the bank.")
+    parser.add_argument('requests', help="requests file, .csv or JSON lines")
+    parser.add_argument('results', help="results file, .csv or JSON lines")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--workers', type=int, default=1, help="number of posting threads")
+    arguments = parser.parse_args()
+
+    with banking.Bank().open(arguments.bank) as bank:
+        report = run_batch(bank, arguments.requests, arguments.results, arguments.workers)
+    rate = report['requests'] / report['seconds'] if report['seconds'] else 0
+    print(f"{report['requests']} requests in {report['seconds']:.2f}s ({rate:.0f} postings/s), "
+          f"{report['succeeded']} succeeded, {report['failed']} failed.")
@@ -0,0 +1,260 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import banking
+import binarystore
+from loadgen import percentile
+try:
+    import resource
+except ImportError:  # not available on Windows, peak memory is then not reported
+    resource = None
+# Synthetic bank data and timings of the core operations
+
+
+FIRST_NAMES = ['Krystian', 'Patrick', 'Sylvia', 'Anna', 'John', 'Maria', 'Tomasz', 'Emma', 'Oliver', 'Sofia',
+               'Liam', 'Chloe', 'Noah', 'Julia', 'Adam', 'Grace', 'Lucas', 'Mia', 'Jakub', 'Zoe']
+LAST_NAMES = ['Pakos', 'Poo', 'Hart', 'Bake', 'Smith', 'Nowak', 'Brown', 'Kowalski', 'Wilson', 'Taylor',
+              'Lewis', 'Walker', 'Young', 'King', 'Wright', 'Green', 'Baker', 'Hill', 'Clark', 'Lee']
+START = datetime.datetime(2024, 1, 1)
+WRITE_LINES = 100000  # lines joined before a write
+
+
+def generate(path, customers=1000, transactions=10000, days=365, seed=0):
+    """
+    Writes a synthetic bank in the format of the data files.
+
+    The same arguments always give the same files. Every customer has one
+    account with the same ID, a savings account if under 18. Transactions
+    are spread evenly over the days after 2024-01-01, and the balances of
+    the accounts file are the ones the transactions add up to.
+
+    Parameters
+    ----------
+    path : str
+        directory the customers, accounts and transactions files are written to.
+    customers : int
+        number of customers (and accounts).
+    transactions : int
+        number of lines of the transactions file.
+    days : int
+        number of days the transactions are spread over.
+    seed : int
+        seed of the random numbers.
+
+    Returns
+    -------
+    None
+    """
+    rng = random.Random(seed)
+    ages = [rng.randint(10, 70) for _ in range(customers)]
+    names = [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(customers)]
+    balances = [0] * (customers + 1)  # cents, by account ID
+    step = days * 86400 * 1000000 // max(transactions, 1)  # microseconds between two transactions
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, banking.TRANSACTION_FILE), 'w') as log:
+        lines = []
+        for transactionId in range(1, transactions + 1):
+            accountId = rng.randint(1, customers)
+            cents = rng.randint(100, 50000)
+            choice = rng.random()
+            receiverId = 0
+            if choice < 0.5:
+                transactionType = 'Deposit'
+                balances[accountId] += cents
+            elif choice < 0.75:
+                transactionType = 'Withdraw'
+                balances[accountId] -= cents
+            else:
+                transactionType = 'Transfer'
+                receiverId = rng.randint(1, customers)
+                balances[accountId] -= cents
+                balances[receiverId] += cents
+            postedAt = START + datetime.timedelta(microseconds=(transactionId - 1) * step)
+            lines.append(f"{transactionId},{accountId},{transactionType},{accountId},{receiverId},{cents / 100},"
+                         f"{postedAt.isoformat(' ', 'microseconds')}\n")
+            if len(lines) == WRITE_LINES:
+                log.write("".join(lines))
+                lines = []
+        log.write("".join(lines))
+    with open(os.path.join(path, banking.CUSTOMER_FILE), 'w') as customerFile, \
+            open(os.path.join(path, banking.ACCOUNTS_FILE), 'w') as accountFile:
+        for start in range(0, customers, WRITE_LINES):
+            customerIds = range(start + 1, min(start + WRITE_LINES, customers) + 1)
+            customerFile.write("".join([f"{names[i - 1][0]},{names[i - 1][1]},{ages[i - 1]},{i}\n" for i in customerIds]))
+            accountFile.write("".join([f"{names[i - 1][0]},{names[i - 1][1]},{ages[i - 1]},{i},{i},"
+                                       f"{'Savings' if ages[i - 1] < 18 else 'Checking'},{balances[i] / 100}\n"
+                                       for i in customerIds]))
+
+
+def convert(path, backend):
+    """
+    Moves a generated bank to another kind of storage: 'binary' for accounts.bin, 'sqlite' for bank.db.
+    """
+    if backend == 'binary':
+        binarystore.text_to_binary(os.path.join(path, banking.ACCOUNTS_FILE), os.path.join(path, banking.ACCOUNTS_BINARY_FILE))
+    elif backend == 'sqlite':
+        banking.files_to_sqlite(path)
+
+
+def peak_rss_kb():
+    """
+    returns the peak resident memory of the process in KB, or None where it cannot be read.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # bytes on macOS, KB elsewhere
+
+
+def measure(operation, arguments):
+    """
+    Calls an operation once for each set of arguments and times every call.
+
+    Parameters
+    ----------
+    operation : function
+        the operation, returning a Result or a value that is None when it fails.
+    arguments : list
+        tuples of arguments, one per call.
+
+    Returns
+    -------
+    dict: operations, failures, operations per second, latency percentiles in ms and peak RSS
+    """
+    latencies = []
+    failures = 0
+    start = time.perf_counter()
+    for args in arguments:
+        began = time.perf_counter()
+        result = operation(*args)
+        latencies.append(time.perf_counter() - began)
+        if result is None or (isinstance(result, banking.Result) and not result.success):
+            failures += 1
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {'operations': len(latencies), 'failures': failures,
+            'operations_per_second': round(len(latencies) / seconds, 1) if seconds else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+            'p90_ms': round(percentile(latencies, 0.90) * 1000, 4),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+            'max_ms': round(latencies[-1] * 1000, 4) if latencies else 0.0,
+            'peak_rss_kb': peak_rss_kb()}
+
+
+def open_bank(path, durable):
+    """
+    Opens the bank and reads what it needs before its first operation.
+    """
+    bank = banking.Bank().open(path, durable=durable)
+    bank.index
+    bank.storage.last_id
+    return bank
+
+
+def run_benchmark(path, operations=1000, durable=True, seed=0):
+    """
+    Times the core operations on a bank, which they change.
+
+    Startup is timed twice: the first opening may index the transactions
+    file, the second one is a normal restart.
+
+    Parameters
+    ----------
+    path : str
+        directory of the bank.
+    operations : int
+        number of calls of each operation.
+    durable : bool
+        if False, writes are not forced to disk.
+    seed : int
+        seed of the random account IDs.
+
+    Returns
+    -------
+    dict: operation name -> measures, in the order they were run
+    """
+    rng = random.Random(seed)
+    results = {}
+    bank = None
+
+    def first_load():
+        open_bank(path, durable).close()
+        return True
+
+    def load():
+        nonlocal bank
+        bank = open_bank(path, durable)
+        return bank
+
+    results['first_load'] = measure(first_load, [()])
+    results['load'] = measure(load, [()])
+    try:
+        index = bank.index
+        highest = index.store.max_account_id() if index.store is not None else max(index.accounts, default=0)
+        customerIds = [rng.randint(1, len(index.customers)) for _ in range(operations)]
+        accountIds = [rng.randint(1, highest) for _ in range(operations)]
+        receiverIds = [rng.randint(1, highest) for _ in range(operations)]
+        candidates = [rng.randint(1, highest) for _ in range(operations * 20)]
+        savingsIds = [accountId for accountId in candidates
+                      if getattr(bank.find_account(accountId), 'account_type', None) == 'Savings'][:operations]
+        closedIds = rng.sample(range(1, highest + 1), min(operations, highest))
+
+        results['login'] = measure(lambda customerId: bank.find_customer(customerId) and bank.find_accounts(customerId),
+                                   [(customerId,) for customerId in customerIds])
+        results['history'] = measure(lambda accountId: bank.history_page(accountId, 0, 20),
+                                     [(accountId,) for accountId in accountIds])
+        results['deposit'] = measure(bank.deposit, [(accountId, 10.0) for accountId in accountIds])
+        results['withdraw'] = measure(bank.withdraw, [(accountId, 1.0) for accountId in accountIds])
+        results['savings_rule'] = measure(lambda accountId: bank.transfer_error(accountId, 1.0) or True,
+                                          [(accountId,) for accountId in savingsIds])
+        results['transfer'] = measure(bank.transfer, list(zip(accountIds, receiverIds, [1.0] * operations)))
+        results['close_account'] = measure(bank.close_account, [(accountId,) for accountId in closedIds])
+    finally:
+        bank.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate synthetic bank data and time the core operations.")
+    parser.add_argument('--customers', type=int, default=1000, help="customers and accounts generated")
+    parser.add_argument('--transactions', type=int, default=10000, help="lines of the generated transactions file")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the generated data and operations")
+    parser.add_argument('--operations', type=int, default=1000, help="calls of each timed operation")
+    parser.add_argument('--backend', default='files', choices=['files', 'binary', 'sqlite'], help="storage of the bank")
+    parser.add_argument('--no-fsync', action='store_true', help="do not force the writes to disk")
+    parser.add_argument('--generate', default=None, help="only write the generated data files to this directory")
+    parser.add_argument('--bank', default=None, help="time a copy of this bank instead of generated data")
+    parser.add_argument('--out', default=None, help="file the JSON report is written to, by default the standard output")
+    arguments = parser.parse_args()
+
+    if arguments.generate:
+        generate(arguments.generate, arguments.customers, arguments.transactions, seed=arguments.seed)
+        sys.exit(0)
+    with tempfile.TemporaryDirectory() as path:
+        # The operations change the bank, so they always run on a fresh copy.
+        started = time.perf_counter()
+        if arguments.bank:
+            shutil.copytree(arguments.bank, path, dirs_exist_ok=True)
+        else:
+            generate(path, arguments.customers, arguments.transactions, seed=arguments.seed)
+            convert(path, arguments.backend)
+        setup = time.perf_counter() - started
+        report = {'settings': {'customers': arguments.customers, 'transactions': arguments.transactions,
+                               'seed': arguments.seed, 'operations': arguments.operations,
+                               'backend': None if arguments.bank else arguments.backend, 'durable': not arguments.no_fsync,
+                               'bank': arguments.bank, 'python': sys.version.split()[0]},
+                  'setup_seconds': round(setup, 3),
+                  'results': run_benchmark(path, arguments.operations, not arguments.no_fsync, arguments.seed)}
+    report['peak_rss_kb'] = peak_rss_kb()
+    if arguments.out:
+        with open(arguments.out, 'w') as out:
+            json.dump(report, out, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
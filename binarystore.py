@@ -0,0 +1,399 @@
+import mmap
+import os
+import struct
+import sys
+# Fixed-width binary account store accessed through mmap
+
+
+# account_id, customer_id, first name, last name, age, type code, balance in cents.
+RECORD = struct.Struct('<qq32s32sHB5xq')
+HEADER = struct.Struct('<8sq')
+MAGIC = b'BANKACC1'
+BALANCE_OFFSET = 88  # offset of the balance inside a record
+TYPE_CODES = {"Checking": 1, "Savings": 2}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+NAME_BYTES = 32  # bytes of a name field, longer names are cut
+CUSTOMER_FIELD = struct.Struct('<8xq66xB13x')  # customer_id and type code of a record, the rest skipped
+
+
+def fit_name(name):
+    """
+    returns the name encoded in UTF-8, cut to NAME_BYTES without splitting a character.
+    """
+    encoded = str(name).encode()
+    if len(encoded) <= NAME_BYTES:
+        return encoded
+    # A character cut in half at the end is dropped, not stored as invalid bytes.
+    return encoded[:NAME_BYTES].decode('utf-8', 'ignore').encode()
+
+
+def pack_fields(first_name, last_name, age, account_id, customer_id, account_type, account_balance):
+    """
+    returns the bytes of the record holding the given account fields.
+    """
+    from banking import to_cents  # banking imports this module, so not at the top
+    return RECORD.pack(int(account_id), int(customer_id), fit_name(first_name), fit_name(last_name),
+                       int(age), TYPE_CODES[account_type], to_cents(account_balance))
+
+
+def unpack_fields(record):
+    """
+    returns the account fields stored in a record, or None for an empty slot.
+    """
+    accountId, customerID, name, lastName, age, typeCode, cents = RECORD.unpack(record)
+    if typeCode == 0:
+        return None
+    return (name.rstrip(b'\0').decode(), lastName.rstrip(b'\0').decode(), age, accountId, customerID,
+            TYPE_NAMES[typeCode], cents / 100)
+
+
+class AccountStore(object):
+    """
+    A class to represent the binary accounts file.
+
+    ...
+
+    Every account lives in a fixed-width record at offset
+    account_id * RECORD.size, slot 0 holds the header. Records are read on
+    demand and a balance change rewrites only the 8 bytes of the balance, so
+    posting does not depend on the number of accounts. Opening the store
+    only reads the customer field of every record, to map the customers to
+    their accounts, so that finding the accounts of a customer at login
+    does not scan the file.
+
+    The store has the same record_* methods as the AccountJournal, so the
+    menus can use either of them.
+
+    Attributes
+    ----------
+    path : str
+        path of the binary accounts file.
+    make_account : function
+        builds an Account from the stored fields.
+    covered : None
+        the store does not record which transactions its balances hold.
+    bytes_written : int
+        bytes of the records and balances written since opened.
+
+    Methods
+    -------
+    load_account(account_id):
+        returns the account stored in the slot or None.
+    customer_account_ids(cust_id):
+        returns the IDs of the accounts of the customer.
+    max_account_id():
+        returns the highest account ID ever stored.
+    record_open(account):
+        Writes the record of a new account.
+    record_balance(account):
+        Updates the balance of the account in place.
+    record_balances(accounts, covered=None):
+        Updates the balances of several accounts in place.
+    record_balance_cents(balances, covered=None):
+        Updates balances captured when they were posted in place.
+    record_delete(account):
+        Empties the slot of the account.
+    sync():
+        Forces the mapped pages to disk.
+    close():
+        Flushes and closes the file.
+    """
+
+    def __init__(self, path, make_account):
+        """
+        Constructs all the necessary attributes for the AccountStore object.
+
+        Parameters
+        ----------
+            path : str
+                path of the binary accounts file, created if missing.
+            make_account : function
+                builds an Account from the stored fields.
+        """
+        self.path = path
+        self.make_account = make_account
+        self.covered = None
+        self.bytes_written = 0
+        self._customers = {}  # customer_id -> account IDs
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, 0).ljust(RECORD.size, b'\0'))
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self._max_id = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary accounts file")
+        self._map_customers()
+
+    def _map_customers(self):
+        """
+        Maps the customers to their account IDs, reading only the customer field of every record.
+        """
+        end = min(self._offset(self._max_id + 1), len(self._map))
+        with memoryview(self._map) as view:
+            fields = CUSTOMER_FIELD.iter_unpack(view[RECORD.size:end])
+            for accountId, (customerID, typeCode) in enumerate(fields, 1):
+                if typeCode:  # 0 is an empty slot
+                    self._customers.setdefault(customerID, []).append(accountId)
+
+    def _offset(self, account_id):
+        """
+        returns the offset of the record of the account.
+        """
+        return int(account_id) * RECORD.size
+
+    def _grow(self, account_id):
+        """
+        Grows the file so that the slot of the account exists.
+        """
+        needed = self._offset(account_id) + RECORD.size
+        if needed <= len(self._map):
+            return
+        # Doubling the file keeps the number of remaps logarithmic.
+        size = max(needed, 2 * len(self._map))
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def load_account(self, account_id):
+        """
+        returns the account stored in the slot.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+
+        Returns
+        -------
+        Account, None: the account if the slot is used else None
+        """
+        offset = self._offset(account_id)
+        if int(account_id) <= 0 or offset + RECORD.size > len(self._map):
+            return None
+        fields = unpack_fields(self._map[offset:offset + RECORD.size])
+        if fields is None:
+            return None
+        return self.make_account(*fields)
+
+    def customer_account_ids(self, cust_id):
+        """
+        returns the IDs of the accounts of the customer.
+
+        The customer map is built when the store is opened.
+
+        Parameters
+        ----------
+        cust_id : int
+            Id of the customer.
+
+        Returns
+        -------
+        list: account IDs of the customer
+        """
+        return self._customers.get(int(cust_id), [])
+
+    def max_account_id(self):
+        """
+        returns the highest account ID ever stored.
+        """
+        return self._max_id
+
+    def record_open(self, account):
+        """
+        Writes the record of a new account.
+
+        Parameters
+        ----------
+        account : Account
+            the opened account.
+
+        Returns
+        -------
+        None
+        """
+        accountId = int(account.account_id)
+        self._grow(accountId)
+        self._map[self._offset(accountId):self._offset(accountId) + RECORD.size] = pack_fields(
+            account.first_name, account.last_name, account.age, accountId, account.customer_id,
+            account.account_type, account.account_balance)
+        if accountId > self._max_id:
+            self._max_id = accountId
+            HEADER.pack_into(self._map, 0, MAGIC, self._max_id)
+        self.bytes_written += RECORD.size
+        self._customers.setdefault(int(account.customer_id), []).append(accountId)
+
+    def record_balance(self, account):
+        """
+        Updates the balance of the account in place.
+
+        Parameters
+        ----------
+        account : Account
+            the account whose balance changed.
+
+        Returns
+        -------
+        None
+        """
+        struct.pack_into('<q', self._map, self._offset(account.account_id) + BALANCE_OFFSET, account.balance_cents)
+        self.bytes_written += 8
+
+    def record_balances(self, accounts, covered=None):
+        """
+        Updates the balances of several accounts in place.
+
+        Parameters
+        ----------
+        accounts : list
+            the accounts whose balance changed.
+        covered : int
+            ID of the last transaction the balances hold, not kept by the store.
+
+        Returns
+        -------
+        None
+        """
+        for account in accounts:
+            self.record_balance(account)
+
+    def record_balance_cents(self, balances, covered=None):
+        """
+        Updates balances captured when they were posted in place.
+
+        Parameters
+        ----------
+        balances : dict
+            account_id -> balance in cents.
+        covered : int
+            ID of the last transaction the balances hold, not kept by the store.
+
+        Returns
+        -------
+        None
+        """
+        for accountId, cents in balances.items():
+            struct.pack_into('<q', self._map, self._offset(accountId) + BALANCE_OFFSET, cents)
+        self.bytes_written += 8 * len(balances)
+
+    def record_delete(self, account):
+        """
+        Empties the slot of the account.
+
+        Parameters
+        ----------
+        account : Account
+            the deleted account.
+
+        Returns
+        -------
+        None
+        """
+        offset = self._offset(account.account_id)
+        self._map[offset:offset + RECORD.size] = bytes(RECORD.size)
+        self.bytes_written += RECORD.size
+        if int(account.account_id) in self._customers.get(int(account.customer_id), ()):
+            self._customers[int(account.customer_id)].remove(int(account.account_id))
+
+    def due(self):
+        """
+        returns False, records are updated in place so there is nothing to fold.
+        """
+        return False
+
+    def sync(self):
+        """
+        Forces the mapped pages to disk.
+        """
+        self._map.flush()
+
+    def checkpoint(self, wait=False):
+        """
+        Flushes the mapped pages to disk.
+        """
+        self._map.flush()
+
+    def close(self):
+        """
+        Flushes and closes the file.
+
+        Returns
+        -------
+        None
+        """
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+def text_to_binary(text_path, binary_path):
+    """
+    Converts an accounts text file to a binary accounts file.
+
+    Parameters
+    ----------
+    text_path : str
+        path of the accounts text file.
+    binary_path : str
+        path of the binary accounts file to write.
+
+    Returns
+    -------
+    int: number of accounts converted
+    """
+    records = {}
+    with open(text_path, 'r') as accountsFile:
+        for line in accountsFile:
+            fields = line.strip().split(',')
+            if len(fields) == 7:
+                records[int(fields[3])] = pack_fields(*fields)
+    maxId = max(records, default=0)
+    with open(binary_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, maxId).ljust(RECORD.size, b'\0'))
+        for accountId in range(1, maxId + 1):
+            f.write(records.get(accountId, bytes(RECORD.size)))
+    return len(records)
+
+
+def binary_to_text(binary_path, text_path):
+    """
+    Converts a binary accounts file to an accounts text file.
+
+    Parameters
+    ----------
+    binary_path : str
+        path of the binary accounts file.
+    text_path : str
+        path of the accounts text file to write.
+
+    Returns
+    -------
+    int: number of accounts converted
+    """
+    converted = 0
+    with open(binary_path, 'rb') as binaryFile, open(text_path, 'w') as textFile:
+        magic, maxId = HEADER.unpack(binaryFile.read(RECORD.size)[:HEADER.size])
+        if magic != MAGIC:
+            raise ValueError(f"{binary_path} is not a binary accounts file")
+        for accountId in range(1, maxId + 1):
+            record = binaryFile.read(RECORD.size)
+            fields = unpack_fields(record) if len(record) == RECORD.size else None
+            if fields is None:
+                continue
+            textFile.write(",".join(str(x) for x in fields) + "\n")
+            converted += 1
+    return converted
+
+
+if __name__ == '__main__':
+    # python binarystore.py to-binary accounts.txt accounts.bin
+    # python binarystore.py to-text accounts.bin accounts.txt
+    if len(sys.argv) != 4 or sys.argv[1] not in ('to-binary', 'to-text'):
+        print("Usage: python binarystore.py to-binary|to-text SOURCE DESTINATION")
+        sys.exit(1)
+    if sys.argv[1] == 'to-binary':
+        count = text_to_binary(sys.argv[2], sys.argv[3])
+    else:
+        count = binary_to_text(sys.argv[2], sys.argv[3])
+    print(f"{count} accounts converted.")
@@ -0,0 +1,101 @@
+import argparse
+import concurrent.futures
+import json
+import random
+import tempfile
+import time
+
+import banking
+from loadgen import percentile
+# Postings per second and latency of the group commit settings
+
+
+def prepare(path, backend, accounts):
+    """
+    Opens the accounts used by the benchmark in an empty bank.
+
+    Parameters
+    ----------
+    path : str
+        directory of the bank.
+    backend : str
+        'files' or 'sqlite'.
+    accounts : int
+        number of accounts to open.
+
+    Returns
+    -------
+    None
+    """
+    with banking.Bank().open(path, backend, durable=False) as bank:
+        for number in range(accounts):
+            customer = bank.register_customer('Bench', f'Customer{number}', 30)
+            bank.open_account(customer.cust_id)
+
+
+def run_setting(path, backend, threads, postings, accounts, durable, window, count):
+    """
+    Posts deposits from several threads with one group commit setting.
+
+    Parameters
+    ----------
+    path : str
+        directory of the bank.
+    backend : str
+        'files' or 'sqlite'.
+    threads : int
+        number of threads posting at the same time.
+    postings : int
+        number of deposits posted by each thread.
+    accounts : int
+        deposits go to account IDs from 1 to accounts.
+    durable : bool
+        if False, writes are not forced to disk.
+    window : float
+        commit window of the group commit in seconds.
+    count : int
+        number of waiting writes that commits a group.
+
+    Returns
+    -------
+    dict: setting, postings per second and latency percentiles in ms
+    """
+    latencies = []
+
+    def post(_):
+        for _ in range(postings):
+            start = time.perf_counter()
+            bank.deposit(random.randint(1, accounts), 1.0)
+            latencies.append(time.perf_counter() - start)
+
+    with banking.Bank().open(path, backend, durable, window, count) as bank:
+        bank.index  # loading before the clock starts
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+            list(executor.map(post, range(threads)))
+        seconds = time.perf_counter() - start
+    latencies.sort()
+    return {'backend': backend, 'durable': durable, 'window_ms': window * 1000, 'count': count,
+            'postings': len(latencies), 'postings_per_second': round(len(latencies) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure postings per second at each group commit setting.")
+    parser.add_argument('--backend', default='files', choices=['files', 'sqlite'], help="storage of the bank")
+    parser.add_argument('--threads', type=int, default=16, help="threads posting at the same time")
+    parser.add_argument('--postings', type=int, default=200, help="deposits posted by each thread")
+    parser.add_argument('--accounts', type=int, default=64, help="number of accounts posted to")
+    parser.add_argument('--windows', default='0,1,5', help="commit windows to measure, in ms")
+    parser.add_argument('--counts', default='16,128', help="group sizes to measure")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        prepare(path, arguments.backend, arguments.accounts)
+        settings = [(False, 0.0, 1)] + [(True, float(window) / 1000, int(count))
+                                       for window in arguments.windows.split(',')
+                                       for count in arguments.counts.split(',')]
+        for durable, window, count in settings:
+            print(json.dumps(run_setting(path, arguments.backend, arguments.threads, arguments.postings,
+                                         arguments.accounts, durable, window, count)))
@@ -0,0 +1,243 @@
+import bisect
+import os
+import threading
+# Prefix index over the customer names, for the customers who forgot their ID
+
+
+NAMES_FILE = 'customerNames.idx'
+MERGE_EVERY = 1024  # keys added since the last merge, searched one by one
+
+
+def normalize(name):
+    """
+    returns the name in lower case with single spaces, as it is compared.
+    """
+    return ' '.join(str(name).lower().split())
+
+
+def name_key(customer):
+    """
+    returns the key of the customer: last name, first name, age and ID separated by tabs.
+
+    Keys sort by last name, then first name and age, so the customers whose
+    names start the same are next to each other.
+    """
+    return (f"{normalize(customer.last_name)}\t{normalize(customer.first_name)}\t"
+            f"{int(customer.age):03d}\t{int(customer.cust_id)}")
+
+
+def key_prefix(last_name, first_name=None, age=None):
+    """
+    returns the start of the keys matching a search.
+
+    The first name is only part of the prefix with a complete last name, and
+    the age only with complete names.
+    """
+    prefix = normalize(last_name)
+    if first_name is not None:
+        prefix += '\t' + normalize(first_name)
+        if age is not None:
+            prefix += f"\t{int(age):03d}\t"
+    return prefix
+
+
+class NameIndex(object):
+    """
+    A class to represent the prefix index over the customer names.
+
+    ...
+
+    The keys of the customers (see name_key) are kept in a sorted list, so
+    the customers whose last name starts with what was typed are found by a
+    binary search and read one after another, whatever the number of
+    customers. Keys added since the last merge are kept apart and searched
+    one by one, then merged in a single sort every MERGE_EVERY keys.
+
+    The sorted keys are saved in customerNames.idx. Its first line holds the
+    highest customer ID the keys cover, so opening the index only adds the
+    customers registered after that instead of sorting them all again.
+
+    Attributes
+    ----------
+    path : str
+        path of the index file.
+    covered : int
+        highest customer ID in the index.
+
+    Methods
+    -------
+    load(index):
+        Reads the saved keys and adds the customers registered since.
+    add(customer):
+        Adds a customer to the index.
+    search(last_name, first_name=None, age=None, limit=20):
+        returns the IDs of the customers whose names start with the given ones.
+    duplicates(first_name, last_name, age):
+        returns the IDs of the customers with the same names and age.
+    save():
+        Writes the keys to the index file if they changed.
+    """
+
+    def __init__(self, path):
+        """
+        Constructs all the necessary attributes for the NameIndex object.
+
+        Parameters
+        ----------
+            path : str
+                path of the index file, written by save().
+        """
+        self.path = path
+        self.covered = 0
+        self._keys = []  # sorted keys
+        self._recent = []  # keys added since the last merge
+        self._changed = False
+        self._lock = threading.Lock()
+
+    def load(self, index):
+        """
+        Reads the saved keys and adds the customers registered since.
+
+        The keys are rebuilt from every customer when the file is missing or
+        covers more customers than the bank has.
+
+        Parameters
+        ----------
+        index : BankIndex
+            indexes holding the customers.
+
+        Returns
+        -------
+        NameIndex: the index itself
+        """
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as namesFile:
+                header = namesFile.readline().strip().split(',')
+                if len(header) == 2 and header[0] == 'covered' and int(header[1]) <= index.highest_customer_id:
+                    self.covered = int(header[1])
+                    self._keys = namesFile.read().split('\n')[:-1]
+        if not self._keys:
+            self._keys = sorted(map(name_key, index.customers.values()))
+            self.covered = index.highest_customer_id
+            self._changed = True
+        else:
+            # Customer IDs only grow, so the ones after covered are the new customers.
+            for customerId in range(self.covered + 1, index.highest_customer_id + 1):
+                customer = index.customers.get(customerId)
+                if customer is not None:
+                    self.add(customer)
+        return self
+
+    def add(self, customer):
+        """
+        Adds a customer to the index.
+
+        Parameters
+        ----------
+        customer : Customer
+            customer to add.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._recent.append(name_key(customer))
+            self.covered = max(self.covered, int(customer.cust_id))
+            self._changed = True
+            if len(self._recent) >= MERGE_EVERY:
+                self._merge()
+
+    def _merge(self):
+        """
+        Merges the recent keys into the sorted ones, called with the lock held.
+        """
+        # The list is made of two sorted runs, which sort() merges in one pass.
+        self._recent.sort()
+        self._keys += self._recent
+        self._keys.sort()
+        self._recent = []
+
+    def _matches(self, prefix, limit, age=None):
+        """
+        returns the keys starting with the prefix, of the given age if any, in key order.
+        """
+        # Names hold no tabs, so the age is the only field written between two tabs with 3 digits.
+        ageField = f"\t{int(age):03d}\t" if age is not None else '\t'
+        with self._lock:
+            matches = []
+            position = bisect.bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(matches) < limit:
+                key = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if ageField in key:
+                    matches.append(key)
+                position += 1
+            recent = [key for key in self._recent if key.startswith(prefix) and ageField in key]
+        return sorted(matches + recent)[:limit]
+
+    def search(self, last_name, first_name=None, age=None, limit=20):
+        """
+        returns the IDs of the customers whose names start with the given ones.
+
+        Parameters
+        ----------
+        last_name : str
+            start of the last name, or the whole last name when first_name is given.
+        first_name : str
+            start of the first name, None to match any.
+        age : int
+            age of the customers, None to match any.
+        limit : int
+            most IDs returned.
+
+        Returns
+        -------
+        list: customer IDs, ordered by last name, first name and age
+        """
+        keys = self._matches(key_prefix(last_name, first_name), limit, age)
+        return [int(key.rsplit('\t', 1)[1]) for key in keys]
+
+    def duplicates(self, first_name, last_name, age):
+        """
+        returns the IDs of the customers with the same names and age.
+
+        Names are compared without case and extra spaces.
+
+        Parameters
+        ----------
+        first_name : str
+            first name of the customer.
+        last_name : str
+            last name of the customer.
+        age : int
+            age of the customer.
+
+        Returns
+        -------
+        list: customer IDs, lowest first
+        """
+        keys = self._matches(key_prefix(last_name, first_name, age), len(self._keys) + len(self._recent))
+        return sorted(int(key.rsplit('\t', 1)[1]) for key in keys)
+
+    def save(self):
+        """
+        Writes the keys to the index file if they changed.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            if not self._changed:
+                return
+            self._merge()
+            temporaryFile = self.path + '.tmp'
+            with open(temporaryFile, 'w') as namesFile:
+                namesFile.write(f"covered,{self.covered}\n")
+                namesFile.writelines(key + '\n' for key in self._keys)
+                namesFile.flush()
+                os.fsync(namesFile.fileno())
+            os.replace(temporaryFile, self.path)
+            self._changed = False
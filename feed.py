@@ -0,0 +1,455 @@
+import argparse
+import array
+import collections
+import datetime
+import os
+import queue
+import sys
+import threading
+import time
+
+import banking
+# Feed of the committed postings and velocity checks over it
+
+
+FEED_FILE = 'changeFeed.txt'
+# Window length in seconds -> name used in the alerts.
+WINDOW_NAMES = {60: 'minute', 3600: 'hour'}
+SWEEP_EVERY = 10000  # events between two removals of the accounts idle for longer than every window
+
+# Account over a velocity limit: totals of its window when the transaction crossed the limit.
+Alert = collections.namedtuple('Alert', ['account_id', 'window', 'count', 'amount', 'transaction_id', 'time'])
+
+
+class ChangeFeed(object):
+    """
+    A class to represent the feed of the postings committed by a bank.
+
+    ...
+
+    The bank stages every posting when it is written and publishes the
+    staged postings once they are committed (on disk for a durable bank),
+    in transaction ID order. Published postings are appended to the feed
+    file, one line per posting in the format of the transactions file, and
+    handed to the subscribers by a dispatcher thread, so a slow subscriber
+    does not hold up the bank.
+
+    Readers of the feed file remember the offset returned by read_feed()
+    and start from it the next time, instead of reading the whole log
+    again. A crash between a commit and the write of the feed file can lose
+    the postings of that commit from the feed, the transactions log stays
+    the record of the bank.
+
+    Attributes
+    ----------
+    path : str
+        path of the feed file, None to only publish to the subscribers.
+    subscribers : list
+        functions called with every published Transaction.
+    published : int
+        number of postings published since opened.
+    errors : int
+        number of calls of a subscriber that raised.
+
+    Methods
+    -------
+    subscribe(subscriber):
+        Calls the subscriber with every posting published from now on.
+    unsubscribe(subscriber):
+        Stops calling the subscriber.
+    stage(transaction):
+        Keeps a posting until it is committed, called with the commit lock held.
+    publish():
+        Publishes the staged postings, called with the commit lock held once they are committed.
+    drain():
+        Waits until the subscribers got every published posting.
+    close():
+        Delivers the published postings and closes the feed file.
+    """
+
+    def __init__(self, path=None):
+        """
+        Constructs all the necessary attributes for the ChangeFeed object.
+
+        Parameters
+        ----------
+            path : str
+                path of the feed file, appended to, None to only publish to the subscribers.
+        """
+        self.path = path
+        self.subscribers = []
+        self.published = 0
+        self.errors = 0
+        self._staged = []  # postings written but not committed yet
+        self._queue = queue.Queue()  # lists of postings waiting for the dispatcher
+        self._file = open(path, 'a') if path is not None else None
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def subscribe(self, subscriber):
+        """
+        Calls the subscriber with every posting published from now on.
+
+        Parameters
+        ----------
+        subscriber : function
+            called with each Transaction from the dispatcher thread, in transaction ID order.
+
+        Returns
+        -------
+        function: the subscriber
+        """
+        self.subscribers = self.subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """
+        Stops calling the subscriber.
+        """
+        self.subscribers = [other for other in self.subscribers if other is not subscriber]
+
+    def stage(self, transaction):
+        """
+        Keeps a posting until it is committed, called with the commit lock held.
+        """
+        self._staged.append(transaction)
+
+    def publish(self):
+        """
+        Publishes the staged postings, called with the commit lock held once they are committed.
+
+        Returns
+        -------
+        int: number of postings published
+        """
+        staged, self._staged = self._staged, []
+        if not staged:
+            return 0
+        if self._file is not None:
+            self._file.write("".join([banking.transaction_line(transaction) for transaction in staged]))
+            self._file.flush()
+        self.published += len(staged)
+        self._queue.put(staged)
+        return len(staged)
+
+    def _dispatch(self):
+        """
+        Hands the published postings to the subscribers until closed.
+        """
+        while True:
+            staged = self._queue.get()
+            try:
+                if staged is None:
+                    return
+                for transaction in staged:
+                    for subscriber in self.subscribers:
+                        try:
+                            subscriber(transaction)
+                        except Exception:
+                            self.errors += 1  # a failing subscriber does not stop the others
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """
+        Waits until the subscribers got every posting published so far.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Delivers the published postings, stops the dispatcher and closes the feed file.
+
+        Returns
+        -------
+        None
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _read_lines(path, offset, limit):
+    """
+    returns the postings of the feed file after the offset, each with the offset after its line.
+    """
+    postings = []
+    if not os.path.exists(path):
+        return postings
+    with open(path, 'rb') as feedFile:
+        feedFile.seek(offset)
+        for line in feedFile:
+            # A line still being written is read the next time.
+            if not line.endswith(b'\n') or (limit is not None and len(postings) >= limit):
+                break
+            offset += len(line)
+            postings.append((banking.parse_transaction(line.decode()), offset))
+    return postings
+
+
+def read_feed(path, offset=0, limit=None):
+    """
+    returns the postings of the feed file written after the offset.
+
+    Parameters
+    ----------
+    path : str
+        path of the feed file.
+    offset : int
+        offset returned by the previous read, 0 for the start of the feed.
+    limit : int
+        most postings returned, None for all of them.
+
+    Returns
+    -------
+    tuple: list of Transaction, offset to read from next time
+    """
+    postings = _read_lines(path, offset, limit)
+    return [transaction for transaction, _ in postings], (postings[-1][1] if postings else offset)
+
+
+def follow(path, offset=0, poll=0.5, stop=None):
+    """
+    Yields the postings of the feed file from the offset on, waiting for new ones.
+
+    Parameters
+    ----------
+    path : str
+        path of the feed file.
+    offset : int
+        offset to start from.
+    poll : float
+        seconds between two reads when the feed has nothing new.
+    stop : Event
+        ends the generator once set, None to follow forever.
+
+    Yields
+    ------
+    tuple: Transaction and the offset after it, to resume from
+    """
+    while stop is None or not stop.is_set():
+        postings = _read_lines(path, offset, 1000)
+        if not postings:
+            time.sleep(poll)
+            continue
+        yield from postings
+        offset = postings[-1][1]
+
+
+class VelocityMonitor(object):
+    """
+    A class to represent the velocity checks over the postings of the accounts.
+
+    ...
+
+    Every window keeps, per account, a ring of `buckets` counters of the
+    postings and their amounts, each covering window / buckets seconds, so
+    an account costs the same memory whatever its number of postings. The
+    totals of a window are the sum of its buckets, a sliding window with
+    the precision of a bucket. Windows follow the time of the postings,
+    not the clock, so replaying the feed raises the same alerts.
+
+    An alert is raised when a posting takes the number or the amount of the
+    postings of an account in a window over its limit; it is raised again
+    only after the totals went back under the limit. Accounts without a
+    posting in any window are dropped every SWEEP_EVERY postings.
+
+    Attributes
+    ----------
+    limits : dict
+        window in seconds -> (most postings, most amount), None for no limit.
+    types : tuple
+        transaction types counted, None for all of them.
+    buckets : int
+        counters per window.
+    alerts : deque
+        the last alerts raised.
+    on_alert : function
+        called with every Alert, or None.
+
+    Methods
+    -------
+    observe(transaction):
+        Counts a posting, returns the alerts it raised.
+    totals(account_id, window):
+        returns the number and amount of the postings of the account in the window.
+    sweep(now):
+        Drops the accounts without any posting in their windows.
+    """
+
+    def __init__(self, limits=None, types=('Withdraw', 'Transfer'), buckets=60, on_alert=None, keep=1000):
+        """
+        Constructs all the necessary attributes for the VelocityMonitor object.
+
+        Parameters
+        ----------
+            limits : dict
+                window in seconds -> (most postings, most amount), by default
+                10 postings or 5000.0 a minute and 60 postings or 20000.0 an hour.
+            types : tuple
+                transaction types counted, by default the money going out of the account.
+            buckets : int
+                counters per window.
+            on_alert : function
+                called with every Alert.
+            keep : int
+                number of the last alerts kept in alerts.
+        """
+        self.limits = limits or {60: (10, 5000.0), 3600: (60, 20000.0)}
+        self.types = types
+        self.buckets = buckets
+        self.on_alert = on_alert
+        self.alerts = collections.deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._widths = {window: window * 1000000 // buckets for window in self.limits}  # microseconds per bucket
+        self._states = {window: {} for window in self.limits}  # window -> account_id -> [slots, counts, cents, over]
+        self._observed = 0
+
+    def __call__(self, transaction):
+        """
+        Counts a posting, so the monitor can subscribe to a ChangeFeed.
+        """
+        self.observe(transaction)
+
+    def _totals(self, state, slot):
+        """
+        returns the number and cents of the postings in the buckets of the window ending at the slot.
+        """
+        slots, counts, cents, _ = state
+        count = amount = 0
+        for position in range(self.buckets):
+            if slot - self.buckets < slots[position] <= slot:
+                count += counts[position]
+                amount += cents[position]
+        return count, amount
+
+    def observe(self, transaction):
+        """
+        Counts a posting in the windows of its account.
+
+        Parameters
+        ----------
+        transaction : Transaction
+            the posting.
+
+        Returns
+        -------
+        list: Alert of every limit the posting took the account over
+        """
+        if self.types is not None and transaction.transaction_type not in self.types:
+            return []
+        raised = []
+        with self._lock:
+            for window, (maxCount, maxAmount) in self.limits.items():
+                slot = transaction.time_micros // self._widths[window]
+                states = self._states[window]
+                state = states.get(transaction.account_id)
+                if state is None:
+                    state = states[transaction.account_id] = [array.array('q', [-1] * self.buckets),
+                                                              array.array('q', [0] * self.buckets),
+                                                              array.array('q', [0] * self.buckets), False]
+                slots, counts, cents, _ = state
+                position = slot % self.buckets
+                if slots[position] > slot:
+                    continue  # older than the window, already counted out
+                if slots[position] != slot:
+                    slots[position], counts[position], cents[position] = slot, 0, 0
+                counts[position] += 1
+                cents[position] += transaction.amount_cents
+                count, amount = self._totals(state, max(slots))
+                over = ((maxCount is not None and count > maxCount)
+                        or (maxAmount is not None and amount > banking.to_cents(maxAmount)))
+                if over and not state[3]:
+                    raised.append(Alert(transaction.account_id, WINDOW_NAMES.get(window, f"{window}s"), count,
+                                        amount / 100, transaction.transaction_id, transaction.time))
+                state[3] = over
+            self._observed += 1
+            if self._observed % SWEEP_EVERY == 0:
+                self._sweep(transaction.time_micros)
+            self.alerts.extend(raised)
+        if self.on_alert is not None:
+            for alert in raised:
+                self.on_alert(alert)
+        return raised
+
+    def totals(self, account_id, window):
+        """
+        returns the number and amount of the postings of the account in the window.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        window : int
+            window in seconds, one of the limits.
+
+        Returns
+        -------
+        tuple: number of postings, amount, in the window ending with the last posting of the account
+        """
+        with self._lock:
+            state = self._states[window].get(int(account_id))
+            if state is None:
+                return 0, 0.0
+            count, amount = self._totals(state, max(state[0]))
+        return count, amount / 100
+
+    def _sweep(self, now):
+        """
+        Drops the accounts without a posting in their windows, called with the lock held.
+        """
+        for window, states in self._states.items():
+            oldest = now // self._widths[window] - self.buckets
+            for accountId in [accountId for accountId, state in states.items() if max(state[0]) <= oldest]:
+                del states[accountId]
+
+    def sweep(self, now=None):
+        """
+        Drops the accounts without any posting in their windows.
+
+        Parameters
+        ----------
+        now : datetime
+            current time, by default now.
+
+        Returns
+        -------
+        None
+        """
+        with self._lock:
+            self._sweep(banking.to_micros(now or datetime.datetime.now()))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Print the postings of a bank's change feed and check their velocity.")
+    parser.add_argument('--bank', default='.', help="directory holding the feed file")
+    parser.add_argument('--offset', type=int, default=0, help="offset to start from, as printed by a previous run")
+    parser.add_argument('--follow', action='store_true', help="wait for new postings instead of stopping at the end")
+    parser.add_argument('--velocity', action='store_true', help="only print the velocity alerts")
+    parser.add_argument('--per-minute', type=float, nargs=2, default=(10, 5000.0), metavar=('COUNT', 'AMOUNT'),
+                        help="most postings and amount going out of an account in a minute")
+    parser.add_argument('--per-hour', type=float, nargs=2, default=(60, 20000.0), metavar=('COUNT', 'AMOUNT'),
+                        help="most postings and amount going out of an account in an hour")
+    arguments = parser.parse_args()
+
+    feedPath = os.path.join(arguments.bank, FEED_FILE)
+    monitor = VelocityMonitor({60: (int(arguments.per_minute[0]), arguments.per_minute[1]),
+                               3600: (int(arguments.per_hour[0]), arguments.per_hour[1])})
+    offset = arguments.offset
+    try:
+        if arguments.follow:
+            postings = follow(feedPath, offset)
+        else:
+            postings = _read_lines(feedPath, offset, None)
+        for transaction, offset in postings:
+            alerts = monitor.observe(transaction)
+            if not arguments.velocity:
+                print(banking.transaction_line(transaction), end='')
+            for alert in alerts:
+                print(f"ALERT account {alert.account_id}: {alert.count} postings, {alert.amount:.2f} in a "
+                      f"{alert.window} (transaction {alert.transaction_id} at {alert.time})")
+    except KeyboardInterrupt:
+        pass
+    print(f"Next offset: {offset}", file=sys.stderr)
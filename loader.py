@@ -0,0 +1,345 @@
+import argparse
+import array
+import concurrent.futures
+import json
+import os
+import struct
+import sys
+import time
+
+import banking
+# Parallel parsing of the data files into compact columns at startup
+
+
+CHUNK_BYTES = 16 * 1024 * 1024  # bytes of a file parsed by one task
+SIDECAR_RECORD = struct.Struct('<qbq')  # account_id, type code, offset, as in the transactions sidecar
+SIDECAR_TYPE_CODES = {name.encode(): code for name, code in banking.TYPE_CODES.items()}  # as read from the log
+
+
+def line_chunks(path, start=0, end=None, chunk_bytes=CHUNK_BYTES):
+    """
+    returns byte ranges of the file covering [start, end), each ending at the end of a line.
+
+    Parameters
+    ----------
+    path : str
+        path of the file.
+    start : int
+        offset of the first line.
+    end : int
+        offset where the ranges end, by default the size of the file.
+    chunk_bytes : int
+        length of a range before it is extended to the end of its last line.
+
+    Returns
+    -------
+    list: (start, end) of every range, in file order
+    """
+    end = os.path.getsize(path) if end is None else end
+    chunks = []
+    with open(path, 'rb') as f:
+        while start < end:
+            f.seek(min(start + chunk_bytes, end))
+            if f.tell() < end:
+                f.readline()
+            stop = min(f.tell(), end)
+            chunks.append((start, stop))
+            start = stop
+    return chunks
+
+
+def _read(path, start, end):
+    """
+    returns the lines of the file in [start, end), without a partial last line.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return data[:data.rfind(b'\n') + 1]
+
+
+def parse_customers_chunk(path, start, end):
+    """
+    returns the customers of a range of the customers file as columns.
+
+    Parameters
+    ----------
+    path : str
+        path of the customers file.
+    start : int
+        offset of the first line.
+    end : int
+        offset after the last line.
+
+    Returns
+    -------
+    tuple: IDs and ages as arrays, first and last names joined by newlines
+    """
+    ids, ages = array.array('q'), array.array('h')
+    firstNames, lastNames = [], []
+    for line in _read(path, start, end).decode().splitlines():
+        fields = line.split(',')
+        if len(fields) != 4:
+            continue  # empty line
+        firstNames.append(fields[0])
+        lastNames.append(fields[1])
+        ages.append(int(fields[2]))
+        ids.append(int(fields[3]))
+    return ids, ages, "\n".join(firstNames), "\n".join(lastNames)
+
+
+def parse_accounts_chunk(path, start, end):
+    """
+    returns the accounts of a range of the accounts file as columns.
+
+    Parameters
+    ----------
+    path : str
+        path of the accounts file.
+    start : int
+        offset of the first line.
+    end : int
+        offset after the last line.
+
+    Returns
+    -------
+    tuple: account IDs, customer IDs, ages and balances in cents as arrays,
+    first names, last names and account types joined by newlines
+    """
+    ids, customerIds, ages, cents = array.array('q'), array.array('q'), array.array('h'), array.array('q')
+    firstNames, lastNames, accountTypes = [], [], []
+    for line in _read(path, start, end).decode().splitlines():
+        fields = line.split(',')
+        if len(fields) != 7:
+            continue  # empty line
+        firstNames.append(fields[0])
+        lastNames.append(fields[1])
+        ages.append(int(fields[2]))
+        ids.append(int(fields[3]))
+        customerIds.append(int(fields[4]))
+        accountTypes.append(fields[5])
+        cents.append(int(round(float(fields[6]) * 100)))
+    return ids, customerIds, ages, cents, "\n".join(firstNames), "\n".join(lastNames), "\n".join(accountTypes)
+
+
+def index_transactions_chunk(path, start, end):
+    """
+    returns the sidecar records of a range of the transactions file.
+
+    Parameters
+    ----------
+    path : str
+        path of the transactions file.
+    start : int
+        offset of the first line.
+    end : int
+        offset after the last line.
+
+    Returns
+    -------
+    tuple: the packed records, number of lines indexed, offset after the last complete line
+    """
+    data = _read(path, start, end)
+    records = []
+    offset = start
+    for line in data.split(b'\n')[:-1]:
+        fields = line.split(b',', 3)
+        if len(fields) == 4:  # not an empty line
+            records.append(SIDECAR_RECORD.pack(int(fields[1]), SIDECAR_TYPE_CODES.get(fields[2], 0), offset))
+        offset += len(line) + 1
+    return b''.join(records), len(records), offset
+
+
+class ParallelLoader(object):
+    """
+    A class to represent the parsing of the data files by a pool of processes.
+
+    ...
+
+    A file is cut in ranges of chunk_bytes ending at line boundaries, and
+    the ranges are parsed by a pool of processes. Workers send back arrays
+    and joined strings instead of objects, so the results cross between
+    processes as a few large buffers. A file of a single range is parsed in
+    the calling process, without a pool.
+
+    Attributes
+    ----------
+    workers : int
+        number of processes, by default the number of CPUs.
+    chunk_bytes : int
+        bytes parsed by one task.
+    progress : function
+        called with the file name, bytes parsed and bytes in total after each range, or None.
+    report : dict
+        file name -> bytes, chunks, rows and seconds of its parsing (plus
+        build_seconds, the time the bank took to index the rows).
+
+    Methods
+    -------
+    customers(path):
+        returns the columns of the customers file.
+    accounts(path):
+        returns the columns of the accounts file.
+    transaction_records(path, start=0, end=None):
+        returns the sidecar records of the transactions file.
+    summary():
+        returns the report as text.
+    """
+
+    def __init__(self, workers=None, chunk_bytes=CHUNK_BYTES, progress=None):
+        """
+        Constructs all the necessary attributes for the ParallelLoader object.
+
+        Parameters
+        ----------
+            workers : int
+                number of processes, by default the number of CPUs.
+            chunk_bytes : int
+                bytes parsed by one task.
+            progress : function
+                called with the file name, bytes parsed and bytes in total after each range.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.progress = progress
+        self.report = {}
+
+    def _parse(self, function, path, start=0, end=None):
+        """
+        returns the results of the function over the ranges of the file, in file order.
+        """
+        began = time.perf_counter()
+        name = os.path.basename(path)
+        chunks = line_chunks(path, start, end, self.chunk_bytes)
+        total = sum([stop - begin for begin, stop in chunks])
+        results = [None] * len(chunks)
+        done = 0
+        if len(chunks) == 1 or self.workers == 1:
+            for number, (begin, stop) in enumerate(chunks):
+                results[number] = function(path, begin, stop)
+                done += stop - begin
+                if self.progress:
+                    self.progress(name, done, total)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(min(self.workers, len(chunks))) as executor:
+                futures = {executor.submit(function, path, begin, stop): number for number, (begin, stop) in enumerate(chunks)}
+                for future in concurrent.futures.as_completed(futures):
+                    number = futures[future]
+                    results[number] = future.result()
+                    done += chunks[number][1] - chunks[number][0]
+                    if self.progress:
+                        self.progress(name, done, total)
+        self.report[name] = {'bytes': total, 'chunks': len(chunks), 'rows': 0,
+                             'seconds': round(time.perf_counter() - began, 3)}
+        return results
+
+    def customers(self, path):
+        """
+        returns the columns of the customers file.
+
+        Parameters
+        ----------
+        path : str
+            path of the customers file.
+
+        Returns
+        -------
+        tuple: IDs, first names, last names and ages, as lists or arrays of the same length
+        """
+        ids, ages, firstNames, lastNames = array.array('q'), array.array('h'), [], []
+        for chunkIds, chunkAges, chunkFirstNames, chunkLastNames in self._parse(parse_customers_chunk, path):
+            if chunkIds:
+                ids += chunkIds
+                ages += chunkAges
+                firstNames += chunkFirstNames.split('\n')
+                lastNames += chunkLastNames.split('\n')
+        self.report[os.path.basename(path)]['rows'] = len(ids)
+        return ids, firstNames, lastNames, ages
+
+    def accounts(self, path):
+        """
+        returns the columns of the accounts file.
+
+        Parameters
+        ----------
+        path : str
+            path of the accounts file.
+
+        Returns
+        -------
+        tuple: account IDs, customer IDs, first names, last names, ages,
+        account types and balances in cents, of the same length
+        """
+        columns = (array.array('q'), array.array('q'), [], [], array.array('h'), [], array.array('q'))
+        ids, customerIds, firstNames, lastNames, ages, accountTypes, cents = columns
+        for chunk in self._parse(parse_accounts_chunk, path):
+            if chunk[0]:
+                ids += chunk[0]
+                customerIds += chunk[1]
+                ages += chunk[2]
+                cents += chunk[3]
+                firstNames += chunk[4].split('\n')
+                lastNames += chunk[5].split('\n')
+                accountTypes += [sys.intern(accountType) for accountType in chunk[6].split('\n')]
+        self.report[os.path.basename(path)]['rows'] = len(ids)
+        return columns
+
+    def transaction_records(self, path, start=0, end=None):
+        """
+        returns the sidecar records of the lines of the transactions file in [start, end).
+
+        Parameters
+        ----------
+        path : str
+            path of the transactions file.
+        start : int
+            offset of the first line to index.
+        end : int
+            offset where the indexing stops, by default the size of the file.
+
+        Returns
+        -------
+        tuple: the packed records, offset after the last complete line
+        """
+        results = self._parse(index_transactions_chunk, path, start, end)
+        records = b''.join([chunkRecords for chunkRecords, _, _ in results])
+        self.report[os.path.basename(path)]['rows'] = sum([rows for _, rows, _ in results])
+        # Empty lines are covered without a record, like the sequential indexing does.
+        return records, (results[-1][2] if results else start)
+
+    def summary(self):
+        """
+        returns the report as text, one line per file.
+        """
+        lines = []
+        for name, measures in self.report.items():
+            line = (f"{name}: {measures['rows']} rows, {measures['bytes'] / 1048576:.1f} MB in {measures['chunks']} chunks "
+                    f"parsed in {measures['seconds']:.2f}s")
+            if 'build_seconds' in measures:
+                line += f", indexed in {measures['build_seconds']:.2f}s"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load a bank with the parallel loader and report the time taken.")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--workers', type=int, default=None, help="processes parsing the files, by default one per CPU")
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_BYTES // 1048576, help="MB of a file parsed by one task")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    arguments = parser.parse_args()
+
+    def show(name, done, total):
+        print(f"\r{name}: {done * 100 // max(total, 1)}%", end='', file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    fileLoader = ParallelLoader(arguments.workers, arguments.chunk_mb * 1048576, None if arguments.json else show)
+    with banking.Bank().open(arguments.bank, loader=fileLoader) as bank:
+        bank.index
+        bank.storage.last_id
+    seconds = time.perf_counter() - started
+    if arguments.json:
+        print(json.dumps({'workers': fileLoader.workers, 'seconds': round(seconds, 3), 'files': fileLoader.report}))
+    else:
+        print(file=sys.stderr)
+        print(f"{fileLoader.summary()}\nBank loaded in {seconds:.2f}s with {fileLoader.workers} workers.")
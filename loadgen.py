@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+# Load generator for the bank HTTP service
+
+
+def percentile(values, fraction):
+    """
+    returns the value below which the given fraction of the sorted values lie.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def random_request(accounts):
+    """
+    returns the method, path and body of a random client request.
+
+    Parameters
+    ----------
+    accounts : int
+        requests use account IDs from 1 to accounts.
+
+    Returns
+    -------
+    tuple: method, path and body
+    """
+    accountId = random.randint(1, accounts)
+    choice = random.random()
+    if choice < 0.4:
+        return 'GET', f'/accounts/{accountId}', None
+    if choice < 0.6:
+        return 'POST', '/deposit', {'account': accountId, 'amount': 1.0}
+    if choice < 0.8:
+        return 'POST', '/withdraw', {'account': accountId, 'amount': 1.0}
+    return 'POST', '/transfer', {'account': accountId, 'receiver': random.randint(1, accounts), 'amount': 1.0}
+
+
+async def client(host, port, requests, accounts, latencies, errors):
+    """
+    Sends requests over one keep-alive connection and records their latency.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            method, path, body = random_request(accounts)
+            payload = json.dumps(body).encode() if body is not None else b''
+            start = time.perf_counter()
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections, requests, accounts):
+    """
+    Opens the connections at once and sends the requests over each of them.
+
+    Parameters
+    ----------
+    host : str
+        address of the service.
+    port : int
+        port of the service.
+    connections : int
+        number of simultaneous client connections.
+    requests : int
+        number of requests sent on each connection.
+    accounts : int
+        requests use account IDs from 1 to accounts.
+
+    Returns
+    -------
+    dict: requests, errors, seconds, requests per second and latency percentiles in ms
+    """
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, requests, accounts, latencies, errors) for _ in range(connections)])
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {'requests': len(latencies), 'errors': len(errors), 'seconds': round(seconds, 3),
+            'requests_per_second': round(len(latencies) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure requests per second and latency of the bank service.")
+    parser.add_argument('--host', default='127.0.0.1', help="address of the service")
+    parser.add_argument('--port', type=int, default=8080, help="port of the service")
+    parser.add_argument('--connections', type=int, default=1000, help="simultaneous client connections")
+    parser.add_argument('--requests', type=int, default=20, help="requests sent on each connection")
+    parser.add_argument('--accounts', type=int, default=5, help="highest account ID used by the requests")
+    arguments = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run_load(arguments.host, arguments.port, arguments.connections,
+                                          arguments.requests, arguments.accounts))))
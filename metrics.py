@@ -0,0 +1,385 @@
+import bisect
+import cProfile
+import http.server
+import io
+import json
+import os
+import pstats
+import threading
+import time
+# Counters, latency histograms and bytes written of the bank operations
+
+
+# Upper bounds of the latency buckets in seconds, the last bucket has no bound.
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Operation -> methods of the Bank measured as that operation.
+BANK_OPERATIONS = {
+    'load': ('_load',),
+    'lookup': ('find_customer', 'search_customers', 'find_duplicates', 'find_accounts', 'find_account', 'history', 'history_page'),
+    'register': ('register_customer', 'register_new_customer'),
+    'open': ('open_account',),
+    'deposit': ('deposit',),
+    'withdraw': ('withdraw',),
+    'transfer': ('transfer',),
+    'delete': ('close_account',),
+}
+# Operation -> methods of the storage measured as that operation, checkpoint is the accounts file rewrite.
+STORAGE_OPERATIONS = {'persist': ('commit', 'end_batch')}
+JOURNAL_OPERATIONS = {'checkpoint': ('checkpoint',)}
+
+
+class Metrics(object):
+    """
+    A class to represent the measures of the operations of a bank.
+
+    ...
+
+    Nothing is measured until instrument(bank) wraps the methods of that
+    bank object, so a bank without metrics runs the plain methods and pays
+    nothing. Every call of a wrapped method counts one operation, adds its
+    latency to a histogram and the bytes the storage wrote meanwhile (when
+    operations run at the same time, each one counts the bytes written by
+    all of them during its call).
+
+    Attributes
+    ----------
+    counts : dict
+        operation -> number of calls.
+    failures : dict
+        operation -> calls that raised or returned an unsuccessful Result.
+    seconds : dict
+        operation -> total time spent in the calls.
+    maximums : dict
+        operation -> longest call.
+    buckets : dict
+        operation -> number of calls in each latency bucket of BUCKETS.
+    bytes_written : dict
+        operation -> bytes written to the data files during the calls.
+    profiles : dict
+        operation -> cProfile.Profile of the last finished capture.
+
+    Methods
+    -------
+    instrument(bank):
+        Starts measuring the operations of the bank.
+    release():
+        Stops measuring, the bank gets its plain methods back.
+    observe(operation, seconds, written=0, failed=False):
+        Records one call of an operation.
+    profile(operation, calls=100, path=None):
+        Runs the next calls of the operation under cProfile.
+    profile_report(operation, top=20):
+        returns the functions taking the most time in the last capture.
+    stats():
+        returns the measures of every operation.
+    prometheus():
+        returns the measures in the Prometheus text format.
+    dump(path, fmt=None):
+        Writes the measures to a file.
+    serve(host='127.0.0.1', port=9100):
+        Answers the measures over HTTP from a background thread.
+    close():
+        Stops serving the measures.
+    """
+
+    def __init__(self):
+        """
+        Constructs empty measures.
+        """
+        self.counts = {}
+        self.failures = {}
+        self.seconds = {}
+        self.maximums = {}
+        self.buckets = {}
+        self.bytes_written = {}
+        self.profiles = {}
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()  # one capture runs at a time
+        self._captures = {}  # operation -> [Profile, calls left, path]
+        self._wrapped = []  # (object, name of the wrapped method)
+        self._server = None
+
+    def observe(self, operation, seconds, written=0, failed=False):
+        """
+        Records one call of an operation.
+
+        Parameters
+        ----------
+        operation : str
+            name of the operation.
+        seconds : float
+            latency of the call.
+        written : int
+            bytes written to the data files during the call.
+        failed : bool
+            True if the call raised or was refused.
+
+        Returns
+        -------
+        None
+        """
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            if operation not in self.counts:
+                self.counts[operation] = self.failures[operation] = self.bytes_written[operation] = 0
+                self.seconds[operation] = self.maximums[operation] = 0.0
+                self.buckets[operation] = [0] * (len(BUCKETS) + 1)
+            self.counts[operation] += 1
+            self.failures[operation] += failed
+            self.seconds[operation] += seconds
+            self.maximums[operation] = max(self.maximums[operation], seconds)
+            self.buckets[operation][bucket] += 1
+            self.bytes_written[operation] += written
+
+    def _wrap(self, owner, name, operation, written):
+        """
+        Replaces a method of an object by one measuring its calls as the operation.
+        """
+        function = getattr(owner, name)
+
+        def measured(*args, **kwargs):
+            before = written()
+            start = time.perf_counter()
+            failed = True
+            try:
+                if operation in self._captures:
+                    result = self._profiled(operation, function, args, kwargs)
+                else:
+                    result = function(*args, **kwargs)
+                failed = getattr(result, 'success', True) is False
+                return result
+            finally:
+                self.observe(operation, time.perf_counter() - start, written() - before, failed)
+
+        setattr(owner, name, measured)
+        self._wrapped.append((owner, name))
+        return measured
+
+    def instrument(self, bank):
+        """
+        Starts measuring the operations of the bank.
+
+        The methods are wrapped on the bank object itself, the Bank class is
+        not changed. The storage is instrumented once the bank is loaded.
+
+        Parameters
+        ----------
+        bank : Bank
+            the bank to measure.
+
+        Returns
+        -------
+        None
+        """
+        def written():
+            storage = bank._storage
+            return storage.bytes_written if storage is not None else 0
+
+        def instrument_storage():
+            storage = bank._storage
+            for operation, names in STORAGE_OPERATIONS.items():
+                for name in names:
+                    self._wrap(storage, name, operation, written)
+            journal = getattr(storage, 'accounts', None)
+            for operation, names in JOURNAL_OPERATIONS.items():
+                for name in names:
+                    if hasattr(journal, name):
+                        self._wrap(journal, name, operation, written)
+
+        for operation, names in BANK_OPERATIONS.items():
+            for name in names:
+                self._wrap(bank, name, operation, written)
+        if bank._storage is not None:
+            instrument_storage()
+        else:
+            load = bank._load
+
+            def load_and_instrument():
+                load()
+                instrument_storage()
+
+            bank._load = load_and_instrument
+
+    def release(self):
+        """
+        Stops measuring, the objects get their plain methods back.
+        """
+        for owner, name in self._wrapped:
+            owner.__dict__.pop(name, None)
+        self._wrapped = []
+
+    def _profiled(self, operation, function, args, kwargs):
+        """
+        Runs a call under the profile capture of its operation.
+        """
+        if not self._profile_lock.acquire(blocking=False):
+            return function(*args, **kwargs)  # another call is being profiled
+        try:
+            capture = self._captures.get(operation)
+            if capture is None:
+                return function(*args, **kwargs)
+            profiler, _, path = capture
+            try:
+                return profiler.runcall(function, *args, **kwargs)
+            finally:
+                capture[1] -= 1
+                if capture[1] <= 0:
+                    del self._captures[operation]
+                    self.profiles[operation] = profiler
+                    if path:
+                        profiler.dump_stats(path)
+        finally:
+            self._profile_lock.release()
+
+    def profile(self, operation, calls=100, path=None):
+        """
+        Runs the next calls of the operation under cProfile.
+
+        Parameters
+        ----------
+        operation : str
+            name of the operation, such as 'transfer'.
+        calls : int
+            number of calls profiled.
+        path : str
+            file the profile is saved to when the capture ends (readable with pstats), None to keep it in profiles.
+
+        Returns
+        -------
+        None
+        """
+        self._captures[operation] = [cProfile.Profile(), calls, path]
+
+    def profile_report(self, operation, top=20):
+        """
+        returns the functions taking the most time in the last capture of the operation, as text.
+        """
+        if operation not in self.profiles:
+            return ""
+        out = io.StringIO()
+        stats = pstats.Stats(self.profiles[operation], stream=out)
+        stats.sort_stats('cumulative').print_stats(top)
+        return out.getvalue()
+
+    def _quantile(self, operation, fraction):
+        """
+        returns the upper bound of the bucket holding the given fraction of the calls.
+        """
+        target = fraction * self.counts[operation]
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets[operation]):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.maximums[operation]
+
+    def stats(self):
+        """
+        returns the measures of every operation.
+
+        Percentiles are the upper bound of the histogram bucket they fall in.
+
+        Returns
+        -------
+        dict: operation -> count, failures, bytes written, seconds, mean, p50, p99 and max in ms
+        """
+        with self._lock:
+            return {operation: {'count': count, 'failures': self.failures[operation],
+                                'bytes_written': self.bytes_written[operation],
+                                'seconds': round(self.seconds[operation], 6),
+                                'mean_ms': round(self.seconds[operation] / count * 1000, 4),
+                                'p50_ms': round(self._quantile(operation, 0.50) * 1000, 4),
+                                'p99_ms': round(self._quantile(operation, 0.99) * 1000, 4),
+                                'max_ms': round(self.maximums[operation] * 1000, 4)}
+                    for operation, count in self.counts.items()}
+
+    def prometheus(self):
+        """
+        returns the measures in the Prometheus text format.
+        """
+        lines = []
+        with self._lock:
+            for name, kind, description, values in (
+                    ('bank_operations_total', 'counter', "Calls of the operation.", self.counts),
+                    ('bank_operation_failures_total', 'counter', "Calls that failed or were refused.", self.failures),
+                    ('bank_bytes_written_total', 'counter', "Bytes written to the data files during the calls.", self.bytes_written)):
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+                lines += [f'{name}{{operation="{operation}"}} {value}' for operation, value in values.items()]
+            lines += ["# HELP bank_operation_seconds Latency of the operation.", "# TYPE bank_operation_seconds histogram"]
+            for operation, counts in self.buckets.items():
+                total = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                    total += count
+                    lines.append(f'bank_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {total}')
+                lines.append(f'bank_operation_seconds_sum{{operation="{operation}"}} {self.seconds[operation]}')
+                lines.append(f'bank_operation_seconds_count{{operation="{operation}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path, fmt=None):
+        """
+        Writes the measures to a file, replacing it.
+
+        Parameters
+        ----------
+        path : str
+            file written.
+        fmt : str
+            'json' or 'prometheus', by default JSON for a .json file and Prometheus otherwise.
+
+        Returns
+        -------
+        None
+        """
+        fmt = fmt or ('json' if path.endswith('.json') else 'prometheus')
+        with open(path + '.tmp', 'w') as f:
+            f.write(json.dumps(self.stats()) + "\n" if fmt == 'json' else self.prometheus())
+        os.replace(path + '.tmp', path)
+
+    def serve(self, host='127.0.0.1', port=9100):
+        """
+        Answers the measures over HTTP from a background thread.
+
+        GET /metrics returns the Prometheus text, GET /metrics.json the stats as JSON.
+
+        Parameters
+        ----------
+        host : str
+            address to listen on, localhost by default.
+        port : int
+            port to listen on.
+
+        Returns
+        -------
+        None
+        """
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics.json':
+                    body, contentType = json.dumps(metrics.stats()).encode(), 'application/json'
+                elif self.path == '/metrics':
+                    body, contentType = metrics.prometheus().encode(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', contentType)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # scrapes are not logged
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        """
+        Stops serving the measures.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,347 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+
+import banking
+import reconcile
+# Month-end interest on savings and fees on overdrawn checking accounts
+
+
+RUNS_FILE = 'monthEndRuns.txt'
+INTEREST = 'Interest'
+FEE = 'Fee'
+
+
+def period_end(period):
+    """
+    returns the last microsecond of a month given as YYYY-MM, the time given to its adjustments.
+    """
+    year, month = [int(x) for x in period.split('-')]
+    return datetime.datetime(year + month // 12, month % 12 + 1, 1) - datetime.timedelta(microseconds=1)
+
+
+def last_period(now=None):
+    """
+    returns the month before the given time (now by default) as YYYY-MM.
+    """
+    lastMonth = (now or datetime.datetime.now()).replace(day=1) - datetime.timedelta(days=1)
+    return f"{lastMonth.year:04d}-{lastMonth.month:02d}"
+
+
+def read_runs(path):
+    """
+    returns the state of the runs recorded in the runs file.
+
+    A run appends 'start,<period>,<marker>' before its first posting and
+    'done,<period>,<postings>' once they are all on disk.
+
+    Returns
+    -------
+    dict: period -> ('start', marker of the log) or ('done', number of postings)
+    """
+    runs = {}
+    if os.path.exists(path):
+        with open(path, 'r') as runsFile:
+            for line in runsFile:
+                fields = line.strip().split(',')
+                if len(fields) == 3:
+                    runs[fields[1]] = (fields[0], int(fields[2]))
+    return runs
+
+
+def write_run(path, state, period, value):
+    """
+    Appends a line to the runs file and forces it to disk.
+    """
+    with open(path, 'a') as runsFile:
+        runsFile.write(f"{state},{period},{value}\n")
+        runsFile.flush()
+        os.fsync(runsFile.fileno())
+
+
+def adjustments(accounts, savings_rate=0.01, overdraft_fee=5.0, overdraft_rate=0.0, skip=(), balances=None):
+    """
+    returns the interest and fees of one month for the accounts, in one pass.
+
+    Savings accounts with a positive balance earn savings_rate / 12 of it.
+    Checking accounts below zero pay overdraft_fee plus overdraft_rate / 12
+    of the overdrawn amount. Amounts are rounded to the cent.
+
+    Parameters
+    ----------
+    accounts : list
+        accounts to adjust.
+    savings_rate : float
+        yearly interest rate of the savings accounts, 0.01 for 1%.
+    overdraft_fee : float
+        monthly fee of an overdrawn checking account.
+    overdraft_rate : float
+        yearly rate charged on the overdrawn amount.
+    skip : set
+        IDs of the accounts already adjusted for the month.
+    balances : dict
+        account_id -> balance in cents at the end of the month, the current
+        balance of an account not in it.
+
+    Returns
+    -------
+    list: (account_id, transaction_type, cents) of every adjustment
+    """
+    interestRate, overdraftRate = savings_rate / 12, overdraft_rate / 12
+    feeCents = banking.to_cents(overdraft_fee)
+    balances = balances or {}
+    result = []
+    for account in accounts:
+        if account.account_id in skip:
+            continue
+        cents = balances.get(account.account_id, account.balance_cents)
+        if account.account_type == 'Savings':
+            if cents > 0 and interestRate:
+                result.append((account.account_id, INTEREST, int(round(cents * interestRate))))
+        elif cents < 0:
+            result.append((account.account_id, FEE, feeCents + int(round(-cents * overdraftRate))))
+    return [adjustment for adjustment in result if adjustment[2] > 0]
+
+
+def log_marker(bank):
+    """
+    returns how far the bank's log goes: the length of the transactions file,
+    or the last transaction ID with the database.
+    """
+    if bank.backend == 'sqlite':
+        return bank.storage.last_id
+    return os.path.getsize(os.path.join(bank.path, banking.TRANSACTION_FILE))
+
+
+def adjusted_since(bank, marker):
+    """
+    returns the interest and fees posted after the marker of the log.
+
+    Returns
+    -------
+    dict: account_id -> balance change of its postings in cents
+    """
+    adjusted = {}
+    if bank.backend == 'sqlite':
+        connection = sqlite3.connect(os.path.join(bank.path, banking.DATABASE_FILE))
+        try:
+            for accountId, transactionType, cents in connection.execute(
+                    "SELECT account_id, transaction_type, SUM(amount_cents) FROM transactions "
+                    "WHERE transaction_id > ? AND transaction_type IN (?, ?) GROUP BY 1, 2", (marker, INTEREST, FEE)):
+                adjusted[accountId] = adjusted.get(accountId, 0) + banking.BALANCE_SIGNS[transactionType] * cents
+        finally:
+            connection.close()
+        return adjusted
+    with open(os.path.join(bank.path, banking.TRANSACTION_FILE), 'rb') as log:
+        log.seek(marker)
+        for line in log:
+            fields = line.split(b',')
+            if len(fields) == 7 and fields[2] in (INTEREST.encode(), FEE.encode()):
+                accountId = int(fields[1])
+                adjusted[accountId] = (adjusted.get(accountId, 0)
+                                       + banking.BALANCE_SIGNS[fields[2].decode()] * banking.to_cents(fields[5]))
+    return adjusted
+
+
+def first_offset_after(path, after):
+    """
+    returns the offset of the first line of the transactions file dated after a time, or its length.
+
+    The log is appended in time order, so the offset is found by bisecting
+    it. Month-end postings, dated at the end of their month when they are
+    appended, are stepped over when a probe lands on them.
+
+    Parameters
+    ----------
+    path : str
+        path of the transactions file.
+    after : datetime
+        time the line must be later than.
+
+    Returns
+    -------
+    int: offset of the line
+    """
+    after = str(after).encode()
+    adjustmentTypes = (INTEREST.encode(), FEE.encode())
+    with open(path, 'rb') as log:
+        size = log.seek(0, os.SEEK_END)
+
+        def line_start(offset):
+            # A line running over the offset belongs to the lines before it.
+            if offset == 0:
+                return 0
+            log.seek(offset - 1)
+            log.readline()
+            return log.tell()
+
+        def dated_after(offset):
+            log.seek(line_start(offset))
+            for line in log:
+                fields = line.rstrip(b'\n').split(b',')
+                if len(fields) != 7:
+                    return True  # partial line at the end of the log
+                if fields[2] not in adjustmentTypes:
+                    return fields[6] > after
+            return True
+
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            if dated_after(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return line_start(low) if low < size else size
+
+
+def replay(bank, balances, after=None, shard=None, shard_count=None):
+    """
+    Adds the balance changes of the transactions of the bank's log to balances, from the
+    reconciliation snapshot if there is one, or only those dated after a time.
+    """
+    marker = 0
+    if after is None:
+        marker, snapshot = reconcile.read_snapshot(os.path.join(bank.path, reconcile.SNAPSHOT_FILE))
+        balances.update(snapshot)
+    elif bank.backend != 'sqlite':
+        # Only the end of the log is read, from the first line dated after the time.
+        marker = first_offset_after(os.path.join(bank.path, banking.TRANSACTION_FILE), after)
+    if bank.backend == 'sqlite':
+        reconcile.replay_database(os.path.join(bank.path, banking.DATABASE_FILE), marker, balances,
+                                  shard, shard_count, after)
+    else:
+        reconcile.replay_log(os.path.join(bank.path, banking.TRANSACTION_FILE), marker, balances,
+                             None, shard, shard_count, after)
+    return balances
+
+
+def cutoff_balances(bank, accounts, cutoff, shard=None, shard_count=None):
+    """
+    returns the balances of the accounts at the cutoff, their balance less the transactions dated after it.
+
+    Returns
+    -------
+    dict: account_id -> balance in cents
+    """
+    later = replay(bank, {}, cutoff, shard, shard_count)
+    return {account.account_id: account.balance_cents - later.get(account.account_id, 0) for account in accounts}
+
+
+def complete_adjusted(bank, adjusted, shard=None, shard_count=None):
+    """
+    Applies the postings of an interrupted run that reached the log but not the balances.
+
+    Only the accounts adjusted by the run are corrected: an account whose
+    balance is the one replayed from the log less its adjustment has missed
+    it. Any other balance, even one differing from the log, is left as it is.
+
+    Parameters
+    ----------
+    bank : Bank
+        the bank of the run.
+    adjusted : dict
+        account_id -> balance change of the run's postings in cents, as returned by adjusted_since().
+
+    Returns
+    -------
+    int: number of balances corrected
+    """
+    if not adjusted:
+        return 0
+    replayed = replay(bank, {}, None, shard, shard_count)
+    missing = {}
+    for accountId, cents in adjusted.items():
+        account = bank.index.find_account(accountId)
+        if account is not None and account.balance_cents == replayed.get(accountId, 0) - cents:
+            missing[accountId] = account.balance_cents + cents
+    return bank.correct_balances(missing) if missing else 0
+
+
+def run_month_end(path='.', period=None, savings_rate=0.01, overdraft_fee=5.0, overdraft_rate=0.0,
+                  shard=None, shard_count=None):
+    """
+    Applies the interest and fees of a month to every account of the bank, once.
+
+    Interest and fees are computed from the balances at the end of the
+    month, the transactions dated after it being taken off the current
+    balances. A period already done is not applied again. If a run was
+    interrupted, the accounts whose adjustment reached the log are skipped,
+    and the balances of those that missed it are completed; no other
+    balance is changed. The bank must not be used by another program during
+    the run.
+
+    Parameters
+    ----------
+    path : str
+        directory of the bank (or of one shard).
+    period : str
+        month as YYYY-MM, by default the month before now.
+    savings_rate : float
+        yearly interest rate of the savings accounts.
+    overdraft_fee : float
+        monthly fee of an overdrawn checking account.
+    overdraft_rate : float
+        yearly rate charged on the overdrawn amount.
+    shard : int
+        number of the shard in the directory, None if the bank is not split.
+    shard_count : int
+        number of shards.
+
+    Returns
+    -------
+    dict: period, whether it was applied now, postings, balances completed, interest and fees in total, seconds
+    """
+    start = time.perf_counter()
+    period = period or last_period()
+    runsPath = os.path.join(path, RUNS_FILE)
+    state, value = read_runs(runsPath).get(period, (None, 0))
+    if state == 'done':
+        return {'period': period, 'applied': False, 'postings': value, 'completed': 0, 'interest': 0.0, 'fees': 0.0,
+                'seconds': round(time.perf_counter() - start, 3)}
+    cutoff = period_end(period)
+    with banking.Bank().open(path) as bank:
+        bank.index  # the log is opened, so lines left by a crash are cut first
+        if state == 'start':
+            # Postings of the interrupted run may be in the log without their balances.
+            adjusted = adjusted_since(bank, value)
+            completed = complete_adjusted(bank, adjusted, shard, shard_count)
+        else:
+            adjusted, completed = {}, 0
+            write_run(runsPath, 'start', period, log_marker(bank))
+        accounts = bank.index.all_accounts()
+        balances = cutoff_balances(bank, accounts, cutoff, shard, shard_count)
+        charges = adjustments(accounts, savings_rate, overdraft_fee, overdraft_rate, set(adjusted), balances)
+        posted = bank.post_adjustments(charges, cutoff)
+    write_run(runsPath, 'done', period, posted + len(adjusted))
+    return {'period': period, 'applied': True, 'postings': posted, 'completed': completed,
+            'interest': sum([cents for _, transactionType, cents in charges if transactionType == INTEREST]) / 100,
+            'fees': sum([cents for _, transactionType, cents in charges if transactionType == FEE]) / 100,
+            'seconds': round(time.perf_counter() - start, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply the month-end interest and overdraft fees, once per month.")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--period', default=None, help="month to apply as YYYY-MM, by default the last one")
+    parser.add_argument('--savings-rate', type=float, default=0.01, help="yearly interest of savings, 0.01 for 1%%")
+    parser.add_argument('--overdraft-fee', type=float, default=5.0, help="monthly fee of an overdrawn checking account")
+    parser.add_argument('--overdraft-rate', type=float, default=0.0, help="yearly rate on the overdrawn amount")
+    parser.add_argument('--shards', type=int, default=None, help="run every shard of a ShardedBank directory")
+    arguments = parser.parse_args()
+
+    settings = (arguments.period, arguments.savings_rate, arguments.overdraft_fee, arguments.overdraft_rate)
+    if arguments.shards:
+        reports = {f'shard{shard}': run_month_end(os.path.join(arguments.bank, f'shard{shard}'), *settings,
+                                                  shard, arguments.shards)
+                   for shard in range(arguments.shards)}
+    else:
+        reports = {'bank': run_month_end(arguments.bank, *settings)}
+    for name, report in reports.items():
+        if report['applied']:
+            print(f"{name}: {report['period']} applied in {report['seconds']:.2f}s, {report['postings']} postings, "
+                  f"{report['interest']:.2f} of interest and {report['fees']:.2f} of fees.")
+        else:
+            print(f"{name}: {report['period']} was already applied ({report['postings']} postings).")
@@ -0,0 +1,252 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import sqlite3
+import time
+
+import banking
+import shards
+# Rebuilding the balances from the transactions log and checking the stored ones
+
+
+SNAPSHOT_FILE = 'balancesSnapshot.txt'
+CHUNK_BYTES = 64 * 1024 * 1024  # bytes of the log replayed by one task
+SIGNS = {transactionType.encode(): sign for transactionType, sign in banking.BALANCE_SIGNS.items()}
+
+
+def replay_chunk(path, start, end, shard=None, shard_count=None, after=None):
+    """
+    returns the balance changes made by the lines of the log starting in [start, end).
+
+    Parameters
+    ----------
+    path : str
+        path of the transactions file.
+    start : int
+        offset where the chunk starts.
+    end : int
+        offset where the chunk ends, the line running over it is included.
+    shard : int
+        number of the shard the log belongs to, None if the bank is not split.
+    shard_count : int
+        number of shards.
+    after : bytes
+        time as written in the log, only the lines of a later time are
+        replayed, None for every line.
+
+    Returns
+    -------
+    tuple: dict account_id -> change in cents, rows replayed, dict of unknown types -> rows
+    """
+    changes, unknown = {}, {}
+    rows = 0
+    with open(path, 'rb') as log:
+        if start > 0:
+            # A line starting before the chunk belongs to the previous chunk.
+            log.seek(start - 1)
+            log.readline()
+        begin = log.tell()
+        data = log.read(end - begin) if begin < end else b''
+        if data and not data.endswith(b'\n'):
+            data += log.readline()  # the line running over the end
+    for line in data.split(b'\n'):
+        fields = line.split(b',')
+        if len(fields) != 7:
+            continue  # empty or partial line
+        if after is not None and fields[6] <= after:
+            continue  # the times of the log compare as text
+        transactionType = fields[2]
+        sign = SIGNS.get(transactionType)
+        if sign is None:
+            unknown[transactionType.decode()] = unknown.get(transactionType.decode(), 0) + 1
+            continue
+        accountId = int(fields[1])
+        cents = int(round(float(fields[5]) * 100))
+        changes[accountId] = changes.get(accountId, 0) + sign * cents
+        if transactionType == b'Transfer':
+            receiverId = int(fields[4])
+            # In a shard, a receiver held by another shard is credited there by a TransferIn.
+            if shard is None or shards.shard_of(receiverId, shard_count) == shard:
+                changes[receiverId] = changes.get(receiverId, 0) + cents
+        rows += 1
+    return changes, rows, unknown
+
+
+def read_snapshot(path):
+    """
+    returns the marker and the balances of a snapshot, or (0, {}) if there is none.
+
+    The marker is the offset of the transactions file (the last transaction
+    ID with the database) the balances were replayed up to.
+    """
+    if not os.path.exists(path):
+        return 0, {}
+    with open(path, 'r') as snapshotFile:
+        marker = int(snapshotFile.readline().strip().split(',')[1])
+        balances = {}
+        for line in snapshotFile:
+            accountId, cents = line.strip().split(',')
+            balances[int(accountId)] = int(cents)
+    return marker, balances
+
+
+def write_snapshot(path, marker, balances):
+    """
+    Writes a snapshot of the replayed balances, replacing the previous one.
+    """
+    with open(path + '.tmp', 'w') as snapshotFile:
+        snapshotFile.write(f"marker,{marker}\n")
+        snapshotFile.write("".join([f"{accountId},{cents}\n" for accountId, cents in sorted(balances.items())]))
+        snapshotFile.flush()
+        os.fsync(snapshotFile.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def replay_log(path, marker, balances, workers=None, shard=None, shard_count=None, after=None):
+    """
+    Replays the transactions file from the marker on top of the snapshot balances.
+
+    The log is cut in chunks of CHUNK_BYTES replayed by a pool of processes,
+    and the balance changes of the chunks are added up.
+
+    Parameters
+    ----------
+    path : str
+        path of the transactions file.
+    marker : int
+        offset the snapshot balances were replayed up to.
+    balances : dict
+        account_id -> balance in cents at the marker, updated in place.
+    workers : int
+        number of processes, by default the number of CPUs.
+    shard : int
+        number of the shard the log belongs to, None if the bank is not split.
+    shard_count : int
+        number of shards.
+    after : datetime
+        only the transactions of a later time are replayed, None for all of them.
+
+    Returns
+    -------
+    tuple: offset replayed up to, rows replayed, dict of unknown types -> rows
+    """
+    after = str(after).encode() if after is not None else None
+    size = os.path.getsize(path)
+    chunks = [(start, min(start + CHUNK_BYTES, size)) for start in range(marker, size, CHUNK_BYTES)]
+    rows, unknown = 0, {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(replay_chunk, path, start, end, shard, shard_count, after) for start, end in chunks]
+        for future in futures:
+            changes, chunkRows, chunkUnknown = future.result()
+            for accountId, cents in changes.items():
+                balances[accountId] = balances.get(accountId, 0) + cents
+            rows += chunkRows
+            for transactionType, count in chunkUnknown.items():
+                unknown[transactionType] = unknown.get(transactionType, 0) + count
+    return size, rows, unknown
+
+
+def replay_database(path, marker, balances, shard=None, shard_count=None, after=None):
+    """
+    Replays the transactions of the database after the marker, grouped by SQLite itself.
+
+    With a datetime after, only the transactions of a later time are replayed.
+
+    Returns
+    -------
+    tuple: last transaction ID replayed, rows replayed, dict of unknown types -> rows
+    """
+    rows, unknown = 0, {}
+    connection = sqlite3.connect(path)
+    try:
+        last = connection.execute("SELECT MAX(transaction_id) FROM transactions").fetchone()[0] or 0
+        for accountId, transactionType, receiverId, cents, count in connection.execute(
+                "SELECT account_id, transaction_type, receiver_id, SUM(amount_cents), COUNT(*) FROM transactions "
+                "WHERE transaction_id > ? AND transaction_id <= ? AND time_micros > ? GROUP BY 1, 2, 3",
+                (marker, last, banking.to_micros(after) if after is not None else -1)):
+            sign = SIGNS.get(transactionType.encode())
+            if sign is None:
+                unknown[transactionType] = unknown.get(transactionType, 0) + count
+                continue
+            balances[accountId] = balances.get(accountId, 0) + sign * cents
+            if transactionType == 'Transfer' and (shard is None or shards.shard_of(receiverId, shard_count) == shard):
+                balances[receiverId] = balances.get(receiverId, 0) + cents
+            rows += count
+    finally:
+        connection.close()
+    return last, rows, unknown
+
+
+def reconcile(path='.', repair=False, snapshot=False, workers=None, shard=None, shard_count=None):
+    """
+    Rebuilds every balance from the transactions log and compares it with the stored one.
+
+    The bank must not be used by another program while it is reconciled.
+
+    Parameters
+    ----------
+    path : str
+        directory of the bank (or of one shard).
+    repair : bool
+        if True, stored balances that differ are set to the replayed ones.
+    snapshot : bool
+        if True and no difference is left, the replayed balances are saved as
+        a snapshot, so that the next run only replays the log written after it.
+    workers : int
+        number of processes replaying the log.
+    shard : int
+        number of the shard in the directory, None if the bank is not split.
+    shard_count : int
+        number of shards.
+
+    Returns
+    -------
+    dict: rows replayed, accounts checked, mismatches, repaired, unknown types and seconds
+    """
+    start = time.perf_counter()
+    snapshotPath = os.path.join(path, SNAPSHOT_FILE)
+    marker, balances = read_snapshot(snapshotPath)
+    with banking.Bank().open(path) as bank:
+        if bank.backend == 'sqlite':
+            marker, rows, unknown = replay_database(os.path.join(path, banking.DATABASE_FILE), marker, balances, shard, shard_count)
+        else:
+            bank.index  # the log is opened, so lines left by a crash are indexed first
+            marker, rows, unknown = replay_log(os.path.join(path, banking.TRANSACTION_FILE), marker, balances,
+                                               workers, shard, shard_count)
+        accounts = bank.index.all_accounts()
+        mismatches = [{'account_id': account.account_id, 'stored': account.balance_cents / 100,
+                       'replayed': balances.get(account.account_id, 0) / 100}
+                      for account in accounts if account.balance_cents != balances.get(account.account_id, 0)]
+        repaired = 0
+        if repair and mismatches:
+            repaired = bank.correct_balances({mismatch['account_id']: balances.get(mismatch['account_id'], 0)
+                                              for mismatch in mismatches})
+    if snapshot and (repaired == len(mismatches)) and not unknown:
+        write_snapshot(snapshotPath, marker, balances)
+    return {'rows': rows, 'accounts': len(accounts), 'mismatches': mismatches, 'repaired': repaired,
+            'unknown_types': unknown, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the stored balances against the transactions log.")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--repair', action='store_true', help="set differing balances to the replayed ones")
+    parser.add_argument('--snapshot', action='store_true', help="save the replayed balances as the new starting point")
+    parser.add_argument('--workers', type=int, default=None, help="processes replaying the log")
+    parser.add_argument('--shards', type=int, default=None, help="reconcile every shard of a ShardedBank directory")
+    arguments = parser.parse_args()
+
+    if arguments.shards:
+        reports = {f'shard{shard}': reconcile(os.path.join(arguments.bank, f'shard{shard}'), arguments.repair,
+                                              arguments.snapshot, arguments.workers, shard, arguments.shards)
+                   for shard in range(arguments.shards)}
+    else:
+        reports = {'bank': reconcile(arguments.bank, arguments.repair, arguments.snapshot, arguments.workers)}
+    for name, report in reports.items():
+        print(f"{name}: {report['rows']} transactions replayed in {report['seconds']:.2f}s, "
+              f"{report['accounts']} accounts checked, {len(report['mismatches'])} differ, {report['repaired']} repaired.")
+        for mismatch in report['mismatches']:
+            print(f"  account {mismatch['account_id']}: stored {mismatch['stored']}, replayed {mismatch['replayed']}")
+        if report['unknown_types']:
+            print(f"  transactions of unknown types were skipped: {json.dumps(report['unknown_types'])}")
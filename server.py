@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import os
+import re
+import urllib.parse
+
+import banking
+import feed
+import loader
+# asyncio HTTP front end over the Bank engine
+
+
+# HTTP method, path pattern and name of the handler.
+ROUTES = [
+    ('POST', re.compile(r'^/customers$'), 'register'),
+    ('GET', re.compile(r'^/customers$'), 'search'),
+    ('GET', re.compile(r'^/customers/(\d+)$'), 'login'),
+    ('POST', re.compile(r'^/accounts$'), 'open_account'),
+    ('GET', re.compile(r'^/accounts/(\d+)$'), 'balance'),
+    ('GET', re.compile(r'^/accounts/(\d+)/transactions$'), 'history'),
+    ('DELETE', re.compile(r'^/accounts/(\d+)$'), 'close_account'),
+    ('POST', re.compile(r'^/deposit$'), 'deposit'),
+    ('POST', re.compile(r'^/withdraw$'), 'withdraw'),
+    ('POST', re.compile(r'^/transfer$'), 'transfer'),
+]
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 409: 'Conflict', 500: 'Internal Server Error'}
+
+
+def account_json(account):
+    """
+    returns the fields of the account sent to clients.
+    """
+    return {'account_id': account.account_id, 'customer_id': account.customer_id,
+            'account_type': account.account_type, 'balance': account.account_balance}
+
+
+def amount_of(body):
+    """
+    returns the amount of a posting body, raising ValueError unless it is a positive number of whole cents.
+    """
+    amount = float(body['amount'])
+    error = banking.amount_error(amount)
+    if error:
+        raise ValueError(error)
+    return amount
+
+
+def result_json(result):
+    """
+    returns the status code and body sent to clients for a Result.
+    """
+    body = {'success': result.success, 'message': result.message}
+    if isinstance(result.value, banking.Account):
+        body['account'] = account_json(result.value)
+    elif result.value is not None:
+        body['transaction_id'] = result.value[0]
+    return (200 if result.success else 409), body
+
+
+class BankServer(object):
+    """
+    A class to represent the HTTP service of the bank.
+
+    ...
+
+    Every client connection is served by one coroutine on the event loop.
+    Every call of the bank runs in a thread pool, lookups included since
+    they can wait for the bank to load or for a lock, so that a slow call
+    does not hold up the other clients; the Bank is safe to call from
+    several threads.
+
+    Attributes
+    ----------
+    bank : Bank
+        the bank being served.
+    executor : ThreadPoolExecutor
+        threads running the calls of the bank.
+
+    Methods
+    -------
+    serve(host, port):
+        Serves clients until cancelled.
+    dispatch(method, path, body):
+        returns the status code and body for a request.
+    """
+
+    def __init__(self, bank, workers=8):
+        """
+        Constructs all the necessary attributes for the BankServer object.
+
+        Parameters
+        ----------
+            bank : Bank
+                the bank being served.
+            workers : int
+                number of threads running the calls of the bank.
+        """
+        self.bank = bank
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+
+    async def _blocking(self, function, *args):
+        """
+        Runs a call of the bank in the thread pool.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def dispatch(self, method, path, body):
+        """
+        returns the status code and body for a request.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method of the request.
+        path : str
+            path of the request, query parameters are merged into the body.
+        body : dict
+            JSON body of the request.
+
+        Returns
+        -------
+        tuple: status code and body
+        """
+        if not isinstance(body, dict):
+            return 400, {'success': False, 'message': "Body is not a JSON object"}
+        path, _, query = path.partition('?')
+        body = dict(body, **dict(urllib.parse.parse_qsl(query)))
+        for routeMethod, pattern, name in ROUTES:
+            match = pattern.match(path)
+            if match and routeMethod == method:
+                try:
+                    return await getattr(self, '_' + name)(body, *[int(x) for x in match.groups()])
+                except (KeyError, TypeError, ValueError, OverflowError) as error:
+                    return 400, {'success': False, 'message': f"Invalid request: {error}"}
+        return 404, {'success': False, 'message': f"No route for {method} {path}"}
+
+    async def _register(self, body):
+        firstName, lastName, age = str(body['first_name']), str(body['last_name']), int(body['age'])
+        if body.get('allow_duplicate'):
+            customer = await self._blocking(self.bank.register_customer, firstName, lastName, age)
+            return 200, {'success': True, 'customer_id': customer.cust_id}
+        # The same names and age are refused unless the client asks to register them again.
+        result = await self._blocking(self.bank.register_new_customer, firstName, lastName, age)
+        if not result.success:
+            return 409, {'success': False, 'message': result.message,
+                         'customer_ids': [customer.cust_id for customer in result.value]}
+        return 200, {'success': True, 'customer_id': result.value.cust_id}
+
+    async def _search(self, body):
+        age = int(body['age']) if body.get('age') else None
+        customers = await self._blocking(self.bank.search_customers, str(body['last_name']), body.get('first_name'),
+                                         age, int(body.get('limit', 20)))
+        return 200, {'success': True, 'customers': [
+            {'customer_id': customer.cust_id, 'first_name': customer.first_name, 'last_name': customer.last_name,
+             'age': customer.age} for customer in customers]}
+
+    async def _login(self, body, customerId):
+        customer = await self._blocking(self.bank.find_customer, customerId)
+        if customer is None:
+            return 404, {'success': False, 'message': f"No customer found with ID {customerId}"}
+        accounts = await self._blocking(self.bank.find_accounts, customerId)
+        return 200, {'success': True, 'customer_id': customer.cust_id, 'first_name': customer.first_name,
+                     'last_name': customer.last_name, 'age': customer.age,
+                     'accounts': [account_json(account) for account in accounts]}
+
+    async def _open_account(self, body):
+        return result_json(await self._blocking(self.bank.open_account, int(body['customer_id'])))
+
+    async def _close_account(self, body, accountId):
+        return result_json(await self._blocking(self.bank.close_account, accountId))
+
+    async def _balance(self, body, accountId):
+        account = await self._blocking(self.bank.find_account, accountId)
+        if account is None:
+            return 404, {'success': False, 'message': f"No account found with ID {accountId}"}
+        return 200, dict(account_json(account), success=True)
+
+    async def _history(self, body, accountId):
+        if await self._blocking(self.bank.find_account, accountId) is None:
+            return 404, {'success': False, 'message': f"No account found with ID {accountId}"}
+        # History is read from disk one page at a time, newest first.
+        page, pageSize = int(body.get('page', 0)), int(body.get('size', 20))
+        fields = ['transaction_id', 'account_id', 'type', 'customer_id', 'receiver_id', 'amount', 'time']
+        transactions = await self._blocking(self.bank.history_page, accountId, page, pageSize)
+        return 200, {'success': True, 'page': page, 'size': pageSize,
+                     'transactions': [dict(zip(fields, transaction)) for transaction in transactions]}
+
+    async def _deposit(self, body):
+        return result_json(await self._blocking(self.bank.deposit, int(body['account']), amount_of(body)))
+
+    async def _withdraw(self, body):
+        return result_json(await self._blocking(self.bank.withdraw, int(body['account']), amount_of(body)))
+
+    async def _transfer(self, body):
+        return result_json(await self._blocking(self.bank.transfer, int(body['account']), int(body['receiver']), amount_of(body)))
+
+    async def _handle(self, reader, writer):
+        """
+        Serves the requests of one client connection, keeping it alive.
+        """
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                method, path, _ = requestLine.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                raw = await reader.readexactly(length) if length else b''
+                try:
+                    body = json.loads(raw) if raw else {}
+                    status, response = await self.dispatch(method, path, body)
+                except ValueError:
+                    status, response = 400, {'success': False, 'message': "Body is not valid JSON"}
+                except Exception as error:
+                    status, response = 500, {'success': False, 'message': str(error)}
+                payload = json.dumps(response).encode()
+                keepAlive = headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """
+        Serves clients until cancelled.
+
+        Parameters
+        ----------
+        host : str
+            address to listen on, localhost by default.
+        port : int
+            port to listen on.
+
+        Returns
+        -------
+        None
+        """
+        server = await asyncio.start_server(self._handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the bank over HTTP on localhost.")
+    parser.add_argument('--bank', default='.', help="directory holding the bank data files")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=8, help="threads running the disk writes")
+    parser.add_argument('--commit-window', type=float, default=0.0, help="ms a group commit waits for more postings")
+    parser.add_argument('--commit-count', type=int, default=100, help="postings that commit a group before the window ends")
+    parser.add_argument('--metrics-port', type=int, default=None, help="measure the operations and serve /metrics on this port")
+    parser.add_argument('--profile', default=None, help="save a cProfile of 100 calls of this operation to <operation>.prof")
+    parser.add_argument('--feed', action='store_true', help="publish the committed postings to changeFeed.txt in the bank directory")
+    parser.add_argument('--load-workers', type=int, default=None, help="processes parsing the data files at startup, 0 for one per CPU")
+    arguments = parser.parse_args()
+
+    fileLoader = loader.ParallelLoader(arguments.load_workers) if arguments.load_workers is not None else None
+    with banking.Bank().open(arguments.bank, commit_window=arguments.commit_window / 1000,
+                             commit_count=arguments.commit_count, loader=fileLoader) as bank:
+        if arguments.metrics_port or arguments.profile:
+            recorder = bank.enable_metrics()
+            if arguments.metrics_port:
+                recorder.serve(arguments.host, arguments.metrics_port)
+            if arguments.profile:
+                recorder.profile(arguments.profile, 100, f"{arguments.profile}.prof")
+        if arguments.feed:
+            bank.enable_feed(feed.ChangeFeed(os.path.join(arguments.bank, feed.FEED_FILE)))
+        bank.index  # loading the data before accepting clients
+        if fileLoader is not None:
+            print(fileLoader.summary())
+        print(f"Serving the bank on http://{arguments.host}:{arguments.port}")
+        try:
+            asyncio.run(BankServer(bank, arguments.workers).serve(arguments.host, arguments.port))
+        except KeyboardInterrupt:
+            pass
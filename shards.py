@@ -0,0 +1,798 @@
+import argparse
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+
+import banking
+import customersearch
+# Accounts split by account ID across worker processes
+
+
+TRANSFERS_FILE = 'transfers.txt'  # prepared legs of cross-shard transfers, one file per shard
+DECISIONS_FILE = 'decisions.txt'  # cross-shard transfers the coordinator decided to commit
+PENDING = "A transfer of this account is pending, try again."
+RETRIES = 50  # attempts to reach a restarting shard when resolving a transfer
+RETRY_DELAY = 0.1  # seconds between two attempts
+
+
+class ShardError(ConnectionError):
+    """
+    Raised when the process of a shard stopped before answering.
+    """
+
+
+def shard_of(account_id, shards):
+    """
+    returns the number of the shard holding the account (or the customer).
+    """
+    return (int(account_id) - 1) % shards
+
+
+class ShardWorker(object):
+    """
+    A class to represent the bank of one shard, run in its own process.
+
+    ...
+
+    Shard k of n holds the customers and accounts whose IDs are k + 1
+    modulo n, in a Bank of its own directory, and answers the operations
+    routed to it by the coordinator.
+
+    The worker also holds the shard's half of the cross-shard transfers.
+    A prepared leg is written to the transfers file before it is
+    acknowledged and holds its account: the account cannot be closed, and
+    for the debit leg cannot be debited by anything else, until the
+    coordinator commits or aborts the transfer. A leg is only posted when it
+    is committed, and whether it was posted before a crash is read back from
+    the account's history, so a leg committed twice is posted once.
+
+    Attributes
+    ----------
+    bank : Bank
+        the bank of the shard.
+    legs : dict
+        gtid -> (role, account_id, counterparty, cents, mark) of the prepared legs.
+
+    Methods
+    -------
+    prepare(gtid, role, account_id, counterparty, amount):
+        Checks and holds one leg of a cross-shard transfer.
+    commit(gtid):
+        Posts a prepared leg.
+    abort(gtid):
+        Drops a prepared leg.
+    in_doubt():
+        returns the IDs of the transfers prepared and not resolved.
+    close():
+        Closes the bank of the shard.
+    """
+
+    # Operations answered by the bank of the shard as they are.
+    BANK_METHODS = ('register_customer', 'find_customer', 'search_customers', 'find_duplicates', 'find_accounts',
+                    'find_account', 'history', 'history_page', 'open_account', 'deposit')
+
+    def __init__(self, path, number, shards, backend=None, durable=True):
+        """
+        Constructs all the necessary attributes for the ShardWorker object.
+
+        Parameters
+        ----------
+            path : str
+                directory of the shard, created if missing.
+            number : int
+                number of the shard, from 0.
+            shards : int
+                number of shards.
+            backend : str
+                'files' or 'sqlite', see Bank.open.
+            durable : bool
+                if True, writes are on disk before being acknowledged.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.durable = durable
+        self.bank = banking.Bank().open(path, backend, durable)
+        self.bank.index.first_account_id = number + 1
+        self.bank.index.account_id_step = shards
+        self.legs = {}
+        self._lock = threading.Lock()  # legs and transfers file
+        self._account_locks = {}  # account_id -> lock of the account
+        self._path = os.path.join(path, TRANSFERS_FILE)
+        if os.path.exists(self._path):
+            with open(self._path, 'r') as transfersFile:
+                for line in transfersFile:
+                    fields = line.strip().split(',')
+                    if fields[0] == 'P' and len(fields) == 7:
+                        self.legs[fields[1]] = (fields[2], int(fields[3]), int(fields[4]), int(fields[5]), int(fields[6]))
+                    elif fields[0] == 'R' and len(fields) == 2:
+                        self.legs.pop(fields[1], None)
+        # Only the legs still in doubt are kept when the file is rewritten.
+        with open(self._path + '.tmp', 'w') as f:
+            f.write("".join([self._leg_line(gtid, leg) for gtid, leg in self.legs.items()]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self._path + '.tmp', self._path)
+        self._file = open(self._path, 'a')
+
+    def __getattr__(self, name):
+        if name in self.BANK_METHODS:
+            return getattr(self.bank, name)
+        raise AttributeError(name)
+
+    @staticmethod
+    def _leg_line(gtid, leg):
+        """
+        returns the line of the transfers file recording a prepared leg.
+        """
+        return f"P,{gtid}," + ",".join([str(x) for x in leg]) + "\n"
+
+    def _write(self, line):
+        """
+        Appends a line to the transfers file, on disk before returning if durable.
+        """
+        self._file.write(line)
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+
+    @contextlib.contextmanager
+    def _locked(self, *account_ids):
+        """
+        Holds the locks of the accounts, taken in ascending account ID order.
+        """
+        with self._lock:
+            locks = [self._account_locks.setdefault(accountId, threading.Lock())
+                     for accountId in sorted({int(accountId) for accountId in account_ids})]
+        with contextlib.ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            yield
+
+    def _held(self, account_id, role=None):
+        """
+        returns True if the account has a prepared leg, of the given role if any.
+        """
+        with self._lock:
+            return any(leg[1] == int(account_id) and role in (None, leg[0]) for leg in self.legs.values())
+
+    def max_customer_id(self):
+        """
+        returns the highest customer ID the shard ever gave.
+        """
+        return self.bank.index.highest_customer_id
+
+    def withdraw(self, account_id, amount):
+        with self._locked(account_id):
+            if self._held(account_id, 'debit'):
+                return banking.Result(False, PENDING, None)
+            return self.bank.withdraw(account_id, amount)
+
+    def transfer(self, account_id, receiver_id, amount):
+        with self._locked(account_id, receiver_id):
+            if self._held(account_id, 'debit'):
+                return banking.Result(False, PENDING, None)
+            return self.bank.transfer(account_id, receiver_id, amount)
+
+    def close_account(self, account_id):
+        with self._locked(account_id):
+            if self._held(account_id):
+                return banking.Result(False, PENDING, None)
+            return self.bank.close_account(account_id)
+
+    def prepare(self, gtid, role, account_id, counterparty, amount):
+        """
+        Checks and holds one leg of a cross-shard transfer.
+
+        Parameters
+        ----------
+        gtid : str
+            ID of the transfer given by the coordinator.
+        role : str
+            'debit' for the sending account, 'credit' for the receiving one.
+        account_id : int
+            account of the leg, held by this shard.
+        counterparty : int
+            account on the other side of the transfer.
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        Result: success if the leg can be committed
+        """
+        with self._locked(account_id):
+            if role == 'debit':
+                # One debit leg at a time, so the check below stays true until the commit.
+                error = PENDING if self._held(account_id, 'debit') else self.bank.transfer_error(account_id, amount)
+            else:
+                error = None if self.bank.find_account(account_id) is not None else "Wrong ID"
+            if error:
+                return banking.Result(False, error, None)
+            # Postings of the leg get IDs above the mark, this is how a crash is told from a posting.
+            leg = (role, int(account_id), int(counterparty), banking.to_cents(amount), self.bank.storage.last_id)
+            with self._lock:
+                self._write(self._leg_line(gtid, leg))
+                self.legs[gtid] = leg
+        return banking.Result(True, "Prepared", None)
+
+    def _posted(self, leg):
+        """
+        returns the transaction of the leg if it was posted, read from the history of its account, else None.
+        """
+        role, accountId, counterparty, cents, mark = leg
+        transactionType = 'Transfer' if role == 'debit' else 'TransferIn'
+        for page in itertools.count():
+            transactions = self.bank.history_page(accountId, page, 100)
+            for transaction in transactions:
+                if transaction.transaction_id <= mark:
+                    return None
+                if (transaction.transaction_type == transactionType and transaction.receiver_id == counterparty
+                        and transaction.amount_cents == cents):
+                    return transaction
+            if len(transactions) < 100:
+                return None
+
+    def _resolve(self, gtid):
+        """
+        Records that the leg is resolved and releases its account.
+        """
+        with self._lock:
+            self._write(f"R,{gtid}\n")
+            del self.legs[gtid]
+
+    def commit(self, gtid):
+        """
+        Posts a prepared leg, a leg already resolved is left as is.
+
+        Parameters
+        ----------
+        gtid : str
+            ID of the transfer.
+
+        Returns
+        -------
+        Result: the transaction of the leg as value, if posted now
+        """
+        with self._lock:
+            leg = self.legs.get(gtid)
+        if leg is None:
+            return banking.Result(True, "Already resolved", None)
+        role, accountId, counterparty, cents, mark = leg
+        with self._locked(accountId):
+            if gtid not in self.legs:
+                return banking.Result(True, "Already resolved", None)
+            posted = self._posted(leg)
+            if posted is not None:
+                result = banking.Result(True, "Already posted", posted)
+            elif role == 'debit':
+                result = self.bank.transfer_out(accountId, counterparty, cents / 100)
+            else:
+                result = self.bank.credit(accountId, cents / 100, 'TransferIn', counterparty)
+            if result.success:
+                self._resolve(gtid)
+        return result
+
+    def abort(self, gtid):
+        """
+        Drops a prepared leg, nothing was posted for it.
+
+        Parameters
+        ----------
+        gtid : str
+            ID of the transfer.
+
+        Returns
+        -------
+        Result: always successful
+        """
+        with self._lock:
+            leg = self.legs.get(gtid)
+        if leg is not None:
+            with self._locked(leg[1]):
+                if gtid in self.legs:
+                    self._resolve(gtid)
+        return banking.Result(True, "Aborted", None)
+
+    def in_doubt(self):
+        """
+        returns the IDs of the transfers prepared and not resolved.
+        """
+        with self._lock:
+            return list(self.legs)
+
+    def close(self):
+        """
+        Closes the transfers file and the bank of the shard.
+
+        Returns
+        -------
+        None
+        """
+        self._file.close()
+        self.bank.close()
+
+
+def serve_shard(connection, path, number, shards, backend=None, durable=True, threads=8):
+    """
+    Runs the worker of a shard, answering the coordinator until stopped.
+
+    Requests are (request ID, method, arguments) and are answered by
+    (request ID, success, value or exception), possibly out of order, as
+    several requests run at the same time in a thread pool.
+
+    Parameters
+    ----------
+    connection : Connection
+        end of the pipe to the coordinator.
+    path : str
+        directory of the shard.
+    number : int
+        number of the shard, from 0.
+    shards : int
+        number of shards.
+    backend : str
+        'files' or 'sqlite', see Bank.open.
+    durable : bool
+        if True, writes are on disk before being acknowledged.
+    threads : int
+        number of requests run at the same time.
+
+    Returns
+    -------
+    None
+    """
+    worker = ShardWorker(path, number, shards, backend, durable)
+    sendLock = threading.Lock()
+
+    def run(requestId, method, args):
+        try:
+            reply = (requestId, True, getattr(worker, method)(*args))
+        except Exception as error:
+            reply = (requestId, False, error)
+        with sendLock:
+            connection.send(reply)
+
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        while True:
+            try:
+                requestId, method, args = connection.recv()
+            except EOFError:
+                break
+            if method == 'stop':
+                break
+            executor.submit(run, requestId, method, args)
+    worker.close()
+    connection.close()
+
+
+class ShardedBank(object):
+    """
+    A class to represent a bank split in shards, one worker process per shard.
+
+    ...
+
+    The coordinator routes every operation to the shard holding its
+    account: account (and customer) ID i lives in shard (i - 1) % shards,
+    and a customer's accounts are opened in the customer's shard. Shards
+    run in their own processes, so postings on different shards use
+    different cores.
+
+    A transfer between two shards uses two-phase commit. Both shards
+    prepare their leg (checked, written to disk and held), then the
+    coordinator writes its decision to the decisions file and both legs are
+    committed, the receiving one first. If a shard cannot prepare or
+    stops, both legs are aborted. A worker that stops is restarted, and the
+    legs it still holds are committed if the decision file has them and
+    aborted otherwise, so money is never created or lost. The coordinator
+    keeps the decisions it wrote in memory until both legs are posted, so
+    a worker restarted while the coordinator runs is resolved the same
+    way. A transfer is only reported done once both legs are posted.
+
+    The methods are the ones of Bank and return the same Results.
+
+    Attributes
+    ----------
+    path : str
+        directory holding one directory per shard and the decisions file.
+    shards : int
+        number of shards.
+
+    Methods
+    -------
+    open():
+        Starts the workers and resolves the transfers left in doubt.
+    close():
+        Stops the workers.
+    """
+
+    def __init__(self, path='.', shards=4, backend=None, durable=True, threads=8):
+        """
+        Constructs all the necessary attributes for the ShardedBank object.
+
+        Parameters
+        ----------
+            path : str
+                directory holding the shards, created if missing.
+            shards : int
+                number of shards, fixed for the life of the data.
+            backend : str
+                'files' or 'sqlite', see Bank.open.
+            durable : bool
+                if True, writes are on disk before being acknowledged.
+            threads : int
+                number of requests a worker runs at the same time.
+        """
+        self.path = path
+        self.shards = shards
+        self.backend = backend
+        self.durable = durable
+        self.threads = threads
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = [None] * shards
+        self._connections = [None] * shards
+        self._pending = [{} for _ in range(shards)]  # request ID -> future, per shard
+        self._send_locks = [threading.Lock() for _ in range(shards)]
+        self._ids = itertools.count()
+        self._lock = threading.Lock()  # customer IDs, decisions file and active transfers
+        self._register_lock = threading.Lock()  # duplicate check and registration of register_new_customer
+        self._active = set()  # transfers resolved by their own thread
+        self._committed = set()  # transfers decided, until both legs are posted
+        self._decisions = None
+        self._next_customer_id = 1
+        self._closing = False
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _shard_path(self, shard):
+        return os.path.join(self.path, f'shard{shard}')
+
+    def _start(self, shard):
+        """
+        Starts the worker process of the shard and the thread reading its answers.
+        """
+        ours, theirs = self._context.Pipe()
+        process = self._context.Process(target=serve_shard, daemon=True, args=(
+            theirs, self._shard_path(shard), shard, self.shards, self.backend, self.durable, self.threads))
+        process.start()
+        theirs.close()
+        with self._send_locks[shard]:
+            self._processes[shard] = process
+            self._connections[shard] = ours
+        threading.Thread(target=self._read, args=(shard, ours), daemon=True).start()
+
+    def _read(self, shard, connection):
+        """
+        Hands the answers of a worker to the waiting callers, restarts the worker if it stops.
+        """
+        pending = self._pending[shard]
+        answered = False
+        while True:
+            try:
+                requestId, success, value = connection.recv()
+            except (EOFError, OSError):
+                break
+            answered = True
+            future = pending.pop(requestId, None)
+            if future is None:
+                continue
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        with self._send_locks[shard]:
+            self._connections[shard] = None
+            for future in pending.values():
+                future.set_exception(ShardError(f"Shard {shard} stopped"))
+            pending.clear()
+        connection.close()
+        # A worker that stopped before answering anything failed to start, restarting it would loop.
+        if not self._closing and answered:
+            self._processes[shard].join()
+            self._start(shard)
+            self._recover([shard])
+
+    def _submit(self, shard, method, *args):
+        """
+        Sends a request to the shard, returns the future of its answer.
+        """
+        future = concurrent.futures.Future()
+        with self._send_locks[shard]:
+            connection = self._connections[shard]
+            if connection is None:
+                raise ShardError(f"Shard {shard} is restarting")
+            requestId = next(self._ids)
+            self._pending[shard][requestId] = future
+            try:
+                connection.send((requestId, method, args))
+            except (OSError, ValueError):
+                del self._pending[shard][requestId]
+                raise ShardError(f"Shard {shard} stopped")
+        return future
+
+    def _call(self, shard, method, *args):
+        """
+        returns the answer of the shard to a request.
+        """
+        return self._submit(shard, method, *args).result()
+
+    def _resolve(self, shard, method, gtid):
+        """
+        Commits or aborts a leg, waiting for the shard to restart if needed.
+        """
+        for _ in range(RETRIES):
+            try:
+                return self._call(shard, method, gtid)
+            except ShardError:
+                time.sleep(RETRY_DELAY)
+        raise ShardError(f"Shard {shard} did not restart")
+
+    def _recover(self, shards):
+        """
+        Resolves the legs the shards hold and no running transfer owns, by the decisions written.
+        """
+        for shard in shards:
+            for gtid in self._call(shard, 'in_doubt'):
+                with self._lock:
+                    if gtid in self._active:
+                        continue
+                    committed = gtid in self._committed
+                # A committed leg whose commit fails stays in doubt and is committed again at the next recovery.
+                self._resolve(shard, 'commit' if committed else 'abort', gtid)
+
+    def open(self):
+        """
+        Starts the workers and resolves the transfers left in doubt.
+
+        Returns
+        -------
+        ShardedBank: the bank itself
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self._closing = False
+        for shard in range(self.shards):
+            self._start(shard)
+        decisionsPath = os.path.join(self.path, DECISIONS_FILE)
+        with self._lock:
+            self._committed = set()
+            if os.path.exists(decisionsPath):
+                with open(decisionsPath, 'r') as decisionsFile:
+                    self._committed = {line.strip().split(',')[1] for line in decisionsFile if line.startswith('C,')}
+        self._recover(range(self.shards))
+        # The decisions of the legs still in doubt (a commit that failed) are written again.
+        pending = {gtid for shard in range(self.shards) for gtid in self._call(shard, 'in_doubt')}
+        with self._lock:
+            self._committed &= pending
+            self._decisions = open(decisionsPath + '.tmp', 'w')
+            self._decisions.write("".join([f"C,{gtid}\n" for gtid in self._committed]))
+            self._decisions.flush()
+            os.fsync(self._decisions.fileno())
+            os.replace(decisionsPath + '.tmp', decisionsPath)
+        self._next_customer_id = max(self._call(shard, 'max_customer_id') for shard in range(self.shards)) + 1
+        return self
+
+    def close(self):
+        """
+        Stops the workers, waiting for the requests they are running.
+
+        Returns
+        -------
+        None
+        """
+        self._closing = True
+        for shard in range(self.shards):
+            with self._send_locks[shard]:
+                if self._connections[shard] is not None:
+                    self._connections[shard].send((None, 'stop', ()))
+        for process in self._processes:
+            if process is not None:
+                process.join()
+        if self._decisions is not None:
+            self._decisions.close()
+            self._decisions = None
+
+    def register_customer(self, first_name, last_name, age):
+        with self._lock:
+            customerId = self._next_customer_id
+            self._next_customer_id += 1
+        return self._call(shard_of(customerId, self.shards), 'register_customer', first_name, last_name, age, customerId)
+
+    def register_new_customer(self, first_name, last_name, age):
+        # The same person can be registered in any shard, so the check and the registration are made one at a time.
+        with self._register_lock:
+            duplicates = self.find_duplicates(first_name, last_name, age)
+            if duplicates:
+                return banking.Result(False, "A customer with these names and age is already registered.", duplicates)
+            customer = self.register_customer(first_name, last_name, age)
+        return banking.Result(True, f"Your customer ID is {customer.cust_id}", customer)
+
+    def find_customer(self, cust_id):
+        return self._call(shard_of(cust_id, self.shards), 'find_customer', cust_id)
+
+    def search_customers(self, last_name, first_name=None, age=None, limit=20):
+        found = [customer for shard in range(self.shards)
+                 for customer in self._call(shard, 'search_customers', last_name, first_name, age, limit)]
+        return sorted(found, key=customersearch.name_key)[:limit]
+
+    def find_duplicates(self, first_name, last_name, age):
+        found = [customer for shard in range(self.shards)
+                 for customer in self._call(shard, 'find_duplicates', first_name, last_name, age)]
+        return sorted(found, key=lambda customer: int(customer.cust_id))
+
+    def find_accounts(self, cust_id):
+        return self._call(shard_of(cust_id, self.shards), 'find_accounts', cust_id)
+
+    def find_account(self, account_id):
+        return self._call(shard_of(account_id, self.shards), 'find_account', account_id)
+
+    def history(self, account_id):
+        return self._call(shard_of(account_id, self.shards), 'history', account_id)
+
+    def history_page(self, account_id, page=0, page_size=20):
+        return self._call(shard_of(account_id, self.shards), 'history_page', account_id, page, page_size)
+
+    def open_account(self, cust_id):
+        return self._call(shard_of(cust_id, self.shards), 'open_account', cust_id)
+
+    def close_account(self, account_id):
+        return self._call(shard_of(account_id, self.shards), 'close_account', account_id)
+
+    def deposit(self, account_id, amount):
+        return self._call(shard_of(account_id, self.shards), 'deposit', account_id, amount)
+
+    def withdraw(self, account_id, amount):
+        return self._call(shard_of(account_id, self.shards), 'withdraw', account_id, amount)
+
+    def _decide(self, gtid):
+        """
+        Writes the decision to commit the transfer, on disk before returning if durable.
+        """
+        with self._lock:
+            self._decisions.write(f"C,{gtid}\n")
+            self._decisions.flush()
+            self._committed.add(gtid)
+        if self.durable:
+            os.fsync(self._decisions.fileno())
+
+    def transfer(self, account_id, receiver_id, amount):
+        """
+        Transfers the given amount from the account to the receiver.
+
+        Parameters
+        ----------
+        account_id : int
+            Unique ID of the account.
+        receiver_id : int
+            Unique ID of the account receiving the amount.
+        amount : float
+            transfer amount
+
+        Returns
+        -------
+        Result: the transaction of the sending account as value, None if a
+        restarted worker posted it
+        """
+        error = banking.amount_error(amount)
+        if error:
+            return banking.Result(False, error, None)
+        source, target = shard_of(account_id, self.shards), shard_of(receiver_id, self.shards)
+        if source == target:
+            return self._call(source, 'transfer', account_id, receiver_id, amount)
+        gtid = uuid.uuid4().hex
+        with self._lock:
+            self._active.add(gtid)
+        try:
+            results = []
+            for shard, role, accountId, counterparty in ((source, 'debit', account_id, receiver_id),
+                                                         (target, 'credit', receiver_id, account_id)):
+                try:
+                    results.append(self._submit(shard, 'prepare', gtid, role, accountId, counterparty, amount))
+                except ShardError as error:
+                    results.append(error)
+            for position, result in enumerate(results):
+                if isinstance(result, concurrent.futures.Future):
+                    try:
+                        results[position] = result.result()
+                    except ShardError as error:
+                        results[position] = error
+            if all(isinstance(result, banking.Result) and result.success for result in results):
+                self._decide(gtid)
+                # The receiver first, the sender's hold is what keeps its next transfer waiting.
+                legs = [self._resolve(target, 'commit', gtid), self._resolve(source, 'commit', gtid)]
+                for leg in legs:
+                    if not leg.success:
+                        # Decided but not posted, the leg stays held until a recovery posts it.
+                        return banking.Result(False, f"Transfer {gtid} is pending: {leg.message}", None)
+                with self._lock:
+                    self._committed.discard(gtid)
+                return banking.Result(True, "Transaction completed successfully", legs[1].value)
+            for shard in (source, target):
+                self._resolve(shard, 'abort', gtid)
+            for result in results:
+                if isinstance(result, ShardError):
+                    return banking.Result(False, str(result), None)
+                if not result.success:
+                    return result
+        finally:
+            with self._lock:
+                self._active.discard(gtid)
+
+
+def benchmark(path, shards, threads, postings, accounts, cross, durable=True):
+    """
+    Posts a mix of deposits, withdrawals and transfers from several threads.
+
+    Parameters
+    ----------
+    path : str
+        directory of the sharded bank.
+    shards : int
+        number of shards.
+    threads : int
+        number of threads posting at the same time.
+    postings : int
+        number of postings made by each thread.
+    accounts : int
+        number of accounts, opened if the bank is empty.
+    cross : float
+        share of the transfers made between two shards.
+    durable : bool
+        if True, writes are on disk before being acknowledged.
+
+    Returns
+    -------
+    dict: shards, postings, seconds and postings per second
+    """
+    with ShardedBank(path, shards, durable=durable) as bank:
+        accountIds = []
+        for number in range(accounts):
+            customer = bank.register_customer('Bench', f'Customer{number}', 30)
+            accountIds.append(bank.open_account(customer.cust_id).value.account_id)
+            bank.deposit(accountIds[-1], 1000.0)
+        byShard = {}
+        for accountId in accountIds:
+            byShard.setdefault(shard_of(accountId, shards), []).append(accountId)
+
+        def post(_):
+            for _ in range(postings):
+                accountId = random.choice(accountIds)
+                choice = random.random()
+                if choice < 0.4:
+                    bank.deposit(accountId, 1.0)
+                elif choice < 0.7:
+                    bank.withdraw(accountId, 1.0)
+                elif random.random() < cross:
+                    bank.transfer(accountId, random.choice(accountIds), 1.0)
+                else:
+                    bank.transfer(accountId, random.choice(byShard[shard_of(accountId, shards)]), 1.0)
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+            list(executor.map(post, range(threads)))
+        seconds = time.perf_counter() - start
+    return {'shards': shards, 'postings': threads * postings, 'seconds': round(seconds, 3),
+            'postings_per_second': round(threads * postings / seconds, 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure postings per second of a bank split in shards.")
+    parser.add_argument('--bank', required=True, help="directory of the sharded bank, use an empty one")
+    parser.add_argument('--shards', type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument('--threads', type=int, default=32, help="threads posting at the same time")
+    parser.add_argument('--postings', type=int, default=500, help="postings made by each thread")
+    parser.add_argument('--accounts', type=int, default=256, help="number of accounts")
+    parser.add_argument('--cross', type=float, default=0.1, help="share of the transfers between shards")
+    parser.add_argument('--no-fsync', action='store_true', help="leave the writes to the operating system")
+    arguments = parser.parse_args()
+
+    print(json.dumps(benchmark(arguments.bank, arguments.shards, arguments.threads, arguments.postings,
+                               arguments.accounts, arguments.cross, not arguments.no_fsync)))
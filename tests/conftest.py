@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, next to the data files.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import banking  # noqa: E402
+
+
+@pytest.fixture
+def bank(tmp_path):
+    """
+    returns a bank of text files in an empty directory, not durable so the tests run fast.
+    """
+    with banking.Bank().open(str(tmp_path), durable=False) as opened:
+        yield opened
+
+
+def open_funded_account(bank, amount=100.0, first_name='Ada', last_name='Lovelace', age=30):
+    """
+    returns the account of a new customer holding the amount.
+    """
+    customer = bank.register_customer(first_name, last_name, age)
+    account = bank.open_account(customer.cust_id).value
+    if amount:
+        bank.deposit(account.account_id, amount)
+    return account
+
+
+def run_menu(path, *answers):
+    """
+    returns what the menus printed when given the answers in the directory.
+    """
+    completed = subprocess.run([sys.executable, os.path.join(ROOT, 'banking.py')], cwd=path,
+                               input='\n'.join(map(str, answers)) + '\n', capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    return completed.stdout
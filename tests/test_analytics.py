@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import banking
+from conftest import ROOT
+
+numpy = pytest.importorskip('numpy')
+import analytics  # noqa: E402
+
+ACCOUNTS = ["Krystian,Pakos,19,1,1,Checking,50.0",
+            "Patrick,Poo,25,2,2,Checking,-160.0",
+            "Sylvia,Hart,18,3,3,Checking,150.0",
+            "Krystian,Bake,16,4,4,Savings,10.0",
+            "Krystian,Pakos,17,5,5,Savings,0.0"]
+TRANSACTIONS = ["1,1,Withdraw,1,0,200.0,2021-12-15 22:07:21.380345",
+                "2,2,Transfer,2,1,200.0,2021-12-15 22:09:00.726041",
+                "3,3,Deposit,3,0,200.0,2021-12-16 11:30:40.441983",
+                "4,3,Transfer,3,1,50.0,2021-12-16 11:30:50.965689",
+                "5,4,Deposit,4,0,50.0,2022-01-17 20:34:32.295392",
+                "6,4,Transfer,4,2,40.0,2022-01-17 20:34:40.349077"]
+
+
+@pytest.fixture
+def bank_path(tmp_path):
+    for name, lines in ((banking.CUSTOMER_FILE, [f"{line.split(',')[0]},{line.split(',')[1]},{line.split(',')[2]},"
+                                                 f"{line.split(',')[4]}" for line in ACCOUNTS]),
+                        (banking.ACCOUNTS_FILE, ACCOUNTS), (banking.TRANSACTION_FILE, TRANSACTIONS)):
+        with open(os.path.join(str(tmp_path), name), 'w') as dataFile:
+            dataFile.write("\n".join(lines) + "\n")
+    return str(tmp_path)
+
+
+def statements(path, year, month, **options):
+    out = io.StringIO()
+    columns = analytics.load_bank(path)
+    count = analytics.write_statements(columns, year, month, out, **options)
+    result = {statement['account_id']: statement for statement in map(json.loads, out.getvalue().splitlines())}
+    assert len(result) == count
+    return result
+
+
+def test_every_account_gets_a_statement(bank_path):
+    result = statements(bank_path, 2021, 12, account_ids=analytics.load_account_ids(bank_path))
+    assert sorted(result) == [1, 2, 3, 4, 5]
+    # Account 4 is only active in January and account 5 never is.
+    assert (result[4]['opening_balance'], result[4]['closing_balance'], result[4]['items']) == (0.0, 0.0, [])
+    assert (result[5]['opening_balance'], result[5]['closing_balance'], result[5]['transactions']) == (0.0, 0.0, 0)
+    assert result[1]['closing_balance'] == 50.0 and result[2]['closing_balance'] == -200.0
+
+
+def test_inactive_month_carries_the_balance(bank_path):
+    accountIds = analytics.load_account_ids(bank_path)
+    result = statements(bank_path, 2022, 1, account_ids=accountIds, items=False)
+    assert sorted(result) == [1, 2, 3, 4, 5]
+    assert result[1] == {'account_id': 1, 'period': '2022-01', 'opening_balance': 50.0, 'closing_balance': 50.0,
+                         'transactions': 0, 'totals': {}}
+    assert (result[2]['opening_balance'], result[2]['closing_balance']) == (-200.0, -160.0)
+    # The statements close on the balances the bank stores.
+    stored = {int(line.split(',')[3]): float(line.split(',')[6]) for line in ACCOUNTS}
+    assert {accountId: statement['closing_balance'] for accountId, statement in result.items()} == stored
+
+
+def test_without_the_accounts_only_active_ones_get_a_statement(bank_path):
+    assert sorted(statements(bank_path, 2021, 12)) == [1, 2, 3]
+
+
+def test_shard_statements_only_credit_their_own_receivers(bank_path):
+    # Account 1 is held by shard 0, the transfers it received are credited there only.
+    assert statements(bank_path, 2021, 12, shard=0, shard_count=2)[1]['closing_balance'] == 50.0
+    assert statements(bank_path, 2021, 12, shard=1, shard_count=2)[1]['closing_balance'] == -200.0
+
+
+def test_statements_of_an_empty_log_are_a_header(tmp_path):
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        bank.open_account(bank.register_customer('Ada', 'Lovelace', 30).cust_id)
+    completed = subprocess.run([sys.executable, os.path.join(ROOT, 'analytics.py'), 'statements', '--bank', str(tmp_path)],
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.splitlines()[0].startswith('account_id,period,')
+    assert len(completed.stdout.splitlines()) == 1
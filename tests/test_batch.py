@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+
+import banking
+import batch
+from conftest import open_funded_account
+
+
+def test_jsonl_batch_reports_every_request_in_order(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        account = open_funded_account(bank, 100.0)
+        receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+        requestsPath = os.path.join(path, 'requests.jsonl')
+        with open(requestsPath, 'w') as requestsFile:
+            requestsFile.write("\n".join([
+                json.dumps({'id': 'a', 'type': 'deposit', 'account': account.account_id, 'amount': 50}),
+                '{not json',
+                '',
+                json.dumps({'id': 'b', 'type': 'Transfer', 'account': account.account_id,
+                            'receiver': receiver.account_id, 'amount': 30}),
+                json.dumps({'id': 'c', 'type': 'Refund', 'account': account.account_id, 'amount': 1}),
+                json.dumps({'id': 'd', 'type': 'Withdraw', 'account': 999, 'amount': 1}),
+                json.dumps({'id': 'e', 'type': 'Withdraw', 'account': account.account_id}),
+            ]) + "\n")
+        report = batch.run_batch(bank, requestsPath, os.path.join(path, 'results.jsonl'))
+    assert (report['requests'], report['succeeded'], report['failed']) == (6, 2, 4)
+    with open(os.path.join(path, 'results.jsonl')) as resultsFile:
+        results = [json.loads(line) for line in resultsFile]
+    assert [(result['id'], result['success']) for result in results] == [
+        ('a', True), (None, False), ('b', True), ('c', False), ('d', False), ('e', False)]
+    assert results[1]['message'] == "Line 2 is not valid JSON"
+    assert results[3]['message'] == "Unknown transaction type Refund"
+    assert results[5]['message'].startswith("Invalid request")
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.find_account(account.account_id).balance_cents == 12000
+        assert bank.find_account(receiver.account_id).balance_cents == 3000
+
+
+def test_csv_batch_with_workers_keeps_the_order(tmp_path):
+    path = str(tmp_path)
+    requestsPath, resultsPath = os.path.join(path, 'requests.csv'), os.path.join(path, 'results.csv')
+    with banking.Bank().open(path, durable=False) as bank:
+        accounts = [open_funded_account(bank, 0, 'Ada', f'Lovelace{number}').account_id for number in range(4)]
+        with open(requestsPath, 'w', newline='') as requestsFile:
+            writer = csv.DictWriter(requestsFile, batch.FIELDS)
+            writer.writeheader()
+            for number in range(2500):
+                writer.writerow({'id': number, 'type': 'Deposit', 'account': accounts[number % 4], 'receiver': '',
+                                 'amount': 1})
+        report = batch.run_batch(bank, requestsPath, resultsPath, workers=4)
+        assert report['succeeded'] == 2500
+        assert [bank.find_account(accountId).balance_cents for accountId in accounts] == [62500, 62500, 62500, 62500]
+    with open(resultsPath, newline='') as resultsFile:
+        rows = list(csv.DictReader(resultsFile))
+    assert [int(row['id']) for row in rows] == list(range(2500))
+    assert len({row['transaction_id'] for row in rows}) == 2500
+
+
+def test_invalid_amounts_fail_their_request_only(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path) as bank:
+        account = open_funded_account(bank, 100.0)
+        requestsPath = os.path.join(path, 'requests.jsonl')
+        with open(requestsPath, 'w') as requestsFile:
+            for number, amount in enumerate([-50, 'NaN', 'abc', 1e999, 0.001]):
+                requestsFile.write(json.dumps({'id': number, 'type': 'Withdraw', 'account': account.account_id,
+                                               'amount': amount}) + "\n")
+            requestsFile.write('{"id": 5, "type": "Deposit", "account": 1e999, "amount": 1}\n[1, 2]\n')
+            requestsFile.write(json.dumps({'id': 7, 'type': 'Deposit', 'account': account.account_id, 'amount': 5}) + "\n")
+        report = batch.run_batch(bank, requestsPath, os.path.join(path, 'results.jsonl'))
+        assert (report['requests'], report['succeeded'], report['failed']) == (8, 1, 7)
+        assert bank.find_account(account.account_id).account_balance == 105.0
+        assert len(bank.history(account.account_id)) == 2
+    with open(os.path.join(path, 'results.jsonl')) as resultsFile:
+        results = [json.loads(line) for line in resultsFile]
+    assert [result['success'] for result in results] == [False] * 7 + [True]
+    assert results[6]['message'] == "Line 7 is not a JSON object"
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import banking
+import benchmark
+import reconcile
+
+
+def read_files(path):
+    contents = {}
+    for name in (banking.CUSTOMER_FILE, banking.ACCOUNTS_FILE, banking.TRANSACTION_FILE):
+        with open(os.path.join(path, name), 'rb') as dataFile:
+            contents[name] = dataFile.read()
+    return contents
+
+
+def test_generated_data_is_reproducible_and_consistent(tmp_path):
+    benchmark.generate(str(tmp_path / 'a'), 50, 500, seed=3)
+    benchmark.generate(str(tmp_path / 'b'), 50, 500, seed=3)
+    benchmark.generate(str(tmp_path / 'c'), 50, 500, seed=4)
+    assert read_files(str(tmp_path / 'a')) == read_files(str(tmp_path / 'b'))
+    assert read_files(str(tmp_path / 'a')) != read_files(str(tmp_path / 'c'))
+    # The stored balances are the ones the transactions add up to.
+    report = reconcile.reconcile(str(tmp_path / 'a'), workers=1)
+    assert (report['rows'], report['accounts'], report['mismatches']) == (500, 50, [])
+
+
+@pytest.mark.parametrize('backend', ['files', 'binary', 'sqlite'])
+def test_benchmark_times_every_operation(tmp_path, backend):
+    path = str(tmp_path)
+    benchmark.generate(path, 40, 300)
+    benchmark.convert(path, backend)
+    results = benchmark.run_benchmark(path, operations=10, durable=False)
+    assert list(results) == ['first_load', 'load', 'login', 'history', 'deposit', 'withdraw', 'savings_rule',
+                             'transfer', 'close_account']
+    for name in ('login', 'history', 'deposit', 'close_account'):
+        assert results[name]['operations'] == 10
+    assert results['deposit']['failures'] == 0
+    assert results['load']['p50_ms'] <= results['load']['max_ms']
@@ -0,0 +1,44 @@
+import os
+
+import banking
+import binarystore
+from conftest import open_funded_account
+
+
+def test_long_names_are_cut_on_a_character_boundary():
+    name = 'é' * 20  # 40 bytes, the 17th character would be cut in half
+    record = binarystore.pack_fields(name, 'Ö' * 40, 30, 1, 1, 'Checking', 12.5)
+    fields = binarystore.unpack_fields(record)
+    assert fields[0] == 'é' * 16
+    assert fields[1] == 'Ö' * 16
+    assert fields[6] == 12.5
+
+
+def test_accounts_are_read_and_updated_in_place(tmp_path):
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        first = open_funded_account(bank, 0)
+        second = open_funded_account(bank, 0, 'Alan', 'Turing')
+        bank.storage.accounts.checkpoint(wait=True)
+    path = str(tmp_path)
+    binarystore.text_to_binary(os.path.join(path, banking.ACCOUNTS_FILE), os.path.join(path, banking.ACCOUNTS_BINARY_FILE))
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.index.store is not None
+        bank.deposit(second.account_id, 42.0)
+        bank.close_account(first.account_id)
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.find_account(first.account_id) is None
+        assert bank.find_account(second.account_id).balance_cents == 4200
+
+
+def test_customer_map_is_built_when_opened(tmp_path):
+    path = str(tmp_path / banking.ACCOUNTS_BINARY_FILE)
+    store = binarystore.AccountStore(path, banking.make_account)
+    for accountId, customerId in ((1, 7), (2, 8), (3, 7)):
+        store.record_open(banking.make_account('Ada', 'Lovelace', 30, accountId, customerId, 'Checking', 0.0))
+    store.record_delete(banking.make_account('Ada', 'Lovelace', 30, 2, 8, 'Checking', 0.0))
+    store.close()
+    store = binarystore.AccountStore(path, banking.make_account)
+    assert store._customers == {7: [1, 3]}
+    assert store.customer_account_ids(7) == [1, 3]
+    assert store.customer_account_ids(8) == []
+    store.close()
@@ -0,0 +1,59 @@
+import concurrent.futures
+import threading
+import time
+
+from conftest import open_funded_account
+
+
+def test_crossed_transfers_neither_deadlock_nor_lose_money(bank):
+    accounts = [open_funded_account(bank, 1000.0, 'Ada', f'Lovelace{number}').account_id for number in range(4)]
+    done = []
+
+    def transfers(number):
+        # Pairs are taken in both directions at once, which deadlocks without ordered locks.
+        for k in range(200):
+            source, receiver = accounts[(number + k) % 4], accounts[(number + k + 1 + k % 2) % 4]
+            if bank.transfer(source, receiver, 1.0 + k % 3).success:
+                done.append(1)
+
+    threads = [threading.Thread(target=transfers, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+    assert sum([bank.find_account(accountId).balance_cents for accountId in accounts]) == 400000
+    assert bank.storage.last_id == 4 + len(done)
+
+
+def test_concurrent_withdrawals_stop_at_the_limit(bank):
+    account = open_funded_account(bank, 100.0)
+    with concurrent.futures.ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(lambda _: bank.withdraw(account.account_id, 10.0), range(40)))
+    # 100 on the account and 200 of overdraft.
+    assert len([result for result in results if result.success]) == 30
+    assert account.balance_cents == -20000
+    assert len(bank.history(account.account_id)) == 31
+
+
+def test_posting_to_an_account_closed_while_waiting_fails(bank):
+    account = open_funded_account(bank, 100.0)
+    receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        with bank._locked(account):
+            deposit = executor.submit(bank.deposit, account.account_id, 10.0)
+            transfer = executor.submit(bank.transfer, receiver.account_id, account.account_id, 0.01)
+            time.sleep(0.1)
+            # Closed as close_account does, the waiting postings already found the account.
+            bank.index.remove_account(account)
+        assert not deposit.result(timeout=60).success
+        assert transfer.result(timeout=60).message == "Wrong ID"
+    assert account.account_balance == 100.0
+    assert len(bank.history(account.account_id)) == 1
+
+
+def test_closing_an_account_drops_its_lock(bank):
+    account = open_funded_account(bank, 100.0)
+    assert account.account_id in bank._account_locks
+    assert bank.close_account(account.account_id).success
+    assert account.account_id not in bank._account_locks
@@ -0,0 +1,56 @@
+import os
+
+import banking
+import customersearch
+
+CUSTOMERS = [('Ada', 'Lovelace', 36), ('Ada', 'Lovelock', 20), ('Adam', 'Lovelace', 36), ('Alan', 'Turing', 41),
+             ('ada', 'LOVELACE', 36), ('Grace', 'Hopper', 36)]
+
+
+def register_all(bank):
+    return [bank.register_customer(*customer).cust_id for customer in CUSTOMERS]
+
+
+def names(customers):
+    return [(customer.first_name, customer.last_name, customer.age) for customer in customers]
+
+
+def test_search_by_name_prefixes_and_age(bank):
+    register_all(bank)
+    assert names(bank.search_customers('love')) == [('Ada', 'Lovelace', 36), ('ada', 'LOVELACE', 36),
+                                                    ('Adam', 'Lovelace', 36), ('Ada', 'Lovelock', 20)]
+    assert names(bank.search_customers('Lovelace', 'ada ')) == [('Ada', 'Lovelace', 36), ('ada', 'LOVELACE', 36),
+                                                               ('Adam', 'Lovelace', 36)]
+    assert names(bank.search_customers('love', age=20)) == [('Ada', 'Lovelock', 20)]
+    assert len(bank.search_customers('l', limit=2)) == 2
+    assert bank.search_customers('Babbage') == []
+
+
+def test_duplicates_ignore_case_and_spaces(bank):
+    ids = register_all(bank)
+    assert [customer.cust_id for customer in bank.find_duplicates(' ADA', 'lovelace', 36)] == [ids[0], ids[4]]
+    assert bank.find_duplicates('Ada', 'Lovelace', 37) == []
+    assert bank.find_duplicates('Ad', 'Lovelace', 36) == []
+
+
+def test_saved_index_covers_new_customers_after_reopening(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        register_all(bank)
+        bank.search_customers('turing')
+    assert os.path.exists(os.path.join(path, customersearch.NAMES_FILE))
+    with banking.Bank().open(path, durable=False) as bank:
+        customerId = bank.register_customer('Alan', 'Turingsson', 30).cust_id
+    with banking.Bank().open(path, durable=False) as bank:
+        assert [customer.cust_id for customer in bank.search_customers('turing')] == [4, customerId]
+
+
+def test_recent_keys_are_merged(monkeypatch):
+    monkeypatch.setattr(customersearch, 'MERGE_EVERY', 3)
+    nameIndex = customersearch.NameIndex('unused')
+    for customerId, (firstName, lastName, age) in enumerate(CUSTOMERS, 1):
+        nameIndex.add(banking.Customer(firstName, lastName, age, customerId))
+    assert len(nameIndex._keys) == 6 and nameIndex._recent == []
+    nameIndex.add(banking.Customer('Ada', 'Lovelace', 36, 7))
+    assert nameIndex.duplicates('Ada', 'Lovelace', 36) == [1, 5, 7]
+    assert nameIndex.search('hopper') == [6]
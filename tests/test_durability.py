@@ -0,0 +1,106 @@
+import concurrent.futures
+import os
+
+import pytest
+
+import banking
+
+
+def synced_files(monkeypatch):
+    """
+    returns the list the names of the files forced to disk are appended to, in order.
+    """
+    synced = []
+    fsync = os.fsync
+
+    def recorded(fd):
+        synced.append(os.path.basename(os.readlink(f'/proc/self/fd/{fd}')))
+        fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', recorded)
+    return synced
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/fd'), reason="needs /proc to name the synced files")
+def test_commit_forces_customers_log_then_journal(tmp_path, monkeypatch):
+    with banking.Bank().open(str(tmp_path)) as bank:
+        bank.index
+        synced = synced_files(monkeypatch)
+        customer = bank.register_customer('Ada', 'Lovelace', 30)
+        account = bank.open_account(customer.cust_id).value
+        bank.deposit(account.account_id, 10.0)
+        with open(os.path.join(str(tmp_path), banking.CUSTOMER_FILE)) as customerFile:
+            assert customerFile.read() == "Ada,Lovelace,30,1\n"
+    assert banking.CUSTOMER_FILE in synced
+    last = len(synced) - 1 - synced[::-1].index(banking.TRANSACTION_FILE)
+    assert synced[last + 1] == banking.JOURNAL_FILE
+    assert synced.index(banking.CUSTOMER_FILE) < synced.index(banking.TRANSACTION_FILE)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/fd'), reason="needs /proc to name the synced files")
+def test_checkpoint_starts_after_the_log_and_journal_are_synced(tmp_path, monkeypatch):
+    with banking.Bank().open(str(tmp_path)) as bank:
+        account = bank.open_account(bank.register_customer('Ada', 'Lovelace', 30).cust_id).value
+        bank.storage.accounts.checkpoint_every = 1
+        synced = synced_files(monkeypatch)
+        bank.deposit(account.account_id, 10.0)
+        bank.storage.accounts.close()
+    snapshot = synced.index(banking.ACCOUNTS_FILE + '.tmp')
+    assert banking.TRANSACTION_FILE in synced[:snapshot]
+    assert banking.JOURNAL_FILE in synced[:snapshot]
+
+
+def test_group_commit_forces_concurrent_postings_together(tmp_path):
+    with banking.Bank().open(str(tmp_path), commit_window=0.005) as bank:
+        accounts = [bank.open_account(bank.register_customer('Ada', f'Lovelace{number}', 30).cust_id).value
+                    for number in range(8)]
+        commits = []
+        commit = bank.storage.commit
+
+        def counted():
+            commits.append(1)
+            commit()
+
+        bank.storage.commit = counted
+
+        def post(account):
+            for _ in range(20):
+                assert bank.deposit(account.account_id, 1.0).success
+
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            list(executor.map(post, accounts))
+        assert len(commits) < 160
+    with banking.Bank().open(str(tmp_path)) as bank:
+        assert [bank.find_account(account.account_id).balance_cents for account in accounts] == [2000] * 8
+        assert bank.storage.last_id == 160
+
+
+def test_postings_outside_an_open_batch_still_wait_for_their_commit(tmp_path):
+    with banking.Bank().open(str(tmp_path)) as bank:
+        account = bank.open_account(bank.register_customer('Ada', 'Lovelace', 30).cust_id).value
+        commits = []
+        commit = bank.storage.commit
+
+        def counted():
+            commits.append(1)
+            commit()
+
+        bank.storage.commit = counted
+        with bank.batch(), concurrent.futures.ThreadPoolExecutor(1) as executor:
+            assert executor.submit(bank.deposit, account.account_id, 10.0).result(timeout=60).success
+            assert commits
+
+
+def test_transactions_logged_before_a_crash_are_applied_once(tmp_path):
+    with banking.Bank().open(str(tmp_path)) as bank:
+        account = bank.open_account(bank.register_customer('Ada', 'Lovelace', 30).cust_id).value
+        bank.deposit(account.account_id, 10.0)
+        transaction = bank.storage.last_id
+    # A crash after logging a transaction and before journaling its balance.
+    with open(os.path.join(str(tmp_path), banking.TRANSACTION_FILE), 'a') as transactionFile:
+        transactionFile.write(banking.transaction_line(banking.Transaction(
+            transaction + 1, account.account_id, "Deposit", account.customer_id, 0, 250, 0)))
+    for _ in range(2):
+        with banking.Bank().open(str(tmp_path)) as bank:
+            assert bank.find_account(account.account_id).balance_cents == 1250
+            assert bank.storage.accounts.covered == transaction + 1
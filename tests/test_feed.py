@@ -0,0 +1,74 @@
+import datetime
+import os
+
+import banking
+import feed
+from conftest import open_funded_account
+
+START = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+
+def posting(transactionId, accountId, seconds, cents=1000, transactionType='Withdraw'):
+    return banking.Transaction(transactionId, accountId, transactionType, accountId, 0, cents,
+                               banking.to_micros(START + datetime.timedelta(seconds=seconds)))
+
+
+def test_committed_postings_reach_the_file_and_the_subscribers(tmp_path):
+    path = str(tmp_path)
+    feedPath = os.path.join(path, feed.FEED_FILE)
+    received = []
+    with banking.Bank().open(path) as bank:
+        changes = bank.enable_feed(feed.ChangeFeed(feedPath))
+        changes.subscribe(lambda transaction: 1 / 0)  # a failing subscriber does not stop the others
+        changes.subscribe(received.append)
+        account = open_funded_account(bank, 100.0)
+        bank.withdraw(account.account_id, 10.0)
+        changes.drain()
+        assert [transaction.transaction_id for transaction in received] == [1, 2]
+        assert changes.errors == 2
+        postings, offset = feed.read_feed(feedPath)
+        assert [tuple(transaction) for transaction in postings] == [tuple(t) for t in bank.history(account.account_id)]
+        with bank.batch():
+            bank.deposit(account.account_id, 1.0)
+            bank.deposit(account.account_id, 2.0)
+            # Postings of a batch are published when it ends.
+            assert feed.read_feed(feedPath, offset) == ([], offset)
+        bank.disable_feed()
+        changes.close()
+    postings, end = feed.read_feed(feedPath, offset)
+    assert [transaction.amount_cents for transaction in postings] == [100, 200]
+    assert end == os.path.getsize(feedPath)
+    assert feed.read_feed(feedPath, 0, limit=1)[0][0].transaction_id == 1
+
+
+def test_partial_feed_line_is_read_next_time(tmp_path):
+    feedPath = str(tmp_path / feed.FEED_FILE)
+    line = banking.transaction_line(posting(1, 1, 0))
+    with open(feedPath, 'w') as feedFile:
+        feedFile.write(line + line[:10])
+    postings, offset = feed.read_feed(feedPath)
+    assert len(postings) == 1 and offset == len(line)
+
+
+def test_velocity_alert_is_raised_once_per_crossing():
+    alerts = []
+    monitor = feed.VelocityMonitor({60: (3, None)}, buckets=6, on_alert=alerts.append)
+    for number in range(5):
+        monitor.observe(posting(number + 1, 7, number))
+    assert [(alert.account_id, alert.window, alert.count, alert.transaction_id) for alert in alerts] == [(7, 'minute', 4, 4)]
+    assert monitor.totals(7, 60) == (5, 50.0)
+    # A minute later the window is empty again, so the next crossing alerts again.
+    for number in range(4):
+        monitor.observe(posting(10 + number, 7, 120 + number))
+    assert len(alerts) == 2 and monitor.totals(7, 60) == (4, 40.0)
+    assert monitor.observe(posting(20, 7, 125, transactionType='Deposit')) == []
+    assert monitor.totals(8, 60) == (0, 0.0)
+
+
+def test_velocity_amount_limit_and_sweep():
+    monitor = feed.VelocityMonitor({3600: (None, 100.0)}, buckets=60)
+    assert monitor.observe(posting(1, 1, 0, 6000)) == []
+    alert, = monitor.observe(posting(2, 1, 1800, 6000, 'Transfer'))
+    assert (alert.window, alert.amount) == ('hour', 120.0)
+    monitor.sweep(START + datetime.timedelta(hours=3))
+    assert monitor.totals(1, 3600) == (0, 0.0)
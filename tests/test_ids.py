@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import banking
+import binarystore
+from conftest import open_funded_account
+
+
+def open_storage(path, backend):
+    return banking.Bank().open(path, 'sqlite' if backend == 'sqlite' else 'files', durable=False)
+
+
+@pytest.mark.parametrize('backend', ['files', 'binary', 'sqlite'])
+def test_ids_of_closed_accounts_are_not_given_again(tmp_path, backend):
+    path = str(tmp_path)
+    with open_storage(path, backend) as bank:
+        kept = open_funded_account(bank, 10.0)
+        last = open_funded_account(bank, 0, 'Alan', 'Turing')
+        if backend == 'binary':
+            bank.storage.accounts.checkpoint(wait=True)
+    if backend == 'binary':
+        binarystore.text_to_binary(os.path.join(path, banking.ACCOUNTS_FILE), os.path.join(path, banking.ACCOUNTS_BINARY_FILE))
+    with open_storage(path, backend) as bank:
+        assert bank.close_account(last.account_id).success
+        if backend == 'files':
+            # The checkpoint drops the tombstone from the accounts file.
+            bank.storage.accounts.checkpoint(wait=True)
+    with open_storage(path, backend) as bank:
+        assert bank.find_account(last.account_id) is None
+        assert bank.find_account(kept.account_id).balance_cents == 1000
+        customer = bank.register_customer('Grace', 'Hopper', 40)
+        assert customer.cust_id == last.customer_id + 1
+        assert bank.open_account(customer.cust_id).value.account_id == last.account_id + 1
+
+
+def test_closing_appends_a_tombstone(bank):
+    account = open_funded_account(bank, 10.0)
+    bank.close_account(account.account_id)
+    with open(os.path.join(bank.path, banking.JOURNAL_FILE)) as journalFile:
+        assert journalFile.read().splitlines()[-1] == f"D,{account.account_id}"
+    assert bank.index.next_account_id() == account.account_id + 1
+
+
+def test_shard_ids_keep_their_step():
+    index = banking.BankIndex()
+    index.first_account_id, index.account_id_step = 2, 3
+    assert index.next_account_id() == 2
+    index.mark_used(account_id=5)
+    assert index.next_account_id() == 8
+    index.mark_used(account_id=3)
+    assert index.next_account_id() == 8
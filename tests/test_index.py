@@ -0,0 +1,66 @@
+import banking
+from conftest import open_funded_account, run_menu
+
+
+def make_index():
+    index = banking.BankIndex()
+    for customerId, age in ((1, 30), (2, 16)):
+        index.add_customer(banking.Customer('Ada', f'Lovelace{customerId}', age, customerId))
+    for accountId, customerId in ((1, 1), (2, 2), (3, 1)):
+        index.add_account(banking.make_account('Ada', 'Lovelace', 30, accountId, customerId, 'Checking', 0.0))
+    return index
+
+
+def test_lookups_by_id():
+    index = make_index()
+    assert index.find_customer(2).last_name == 'Lovelace2'
+    assert index.find_customer('1') is index.customers[1]
+    assert index.find_customer(9) is None
+    assert index.find_account(3).customer_id == 1
+    assert index.find_account(9) is None
+    assert [account.account_id for account in index.find_customer_accounts(1)] == [1, 3]
+    assert index.find_customer_accounts(9) == []
+
+
+def test_removed_accounts_leave_every_index():
+    index = make_index()
+    index.remove_account(index.find_account(1))
+    index.remove_account(index.find_account(2))
+    assert index.find_account(1) is None
+    assert [account.account_id for account in index.find_customer_accounts(1)] == [3]
+    assert 2 not in index.customer_accounts
+    assert [account.account_id for account in index.all_accounts()] == [3]
+
+
+def test_customers_and_accounts_are_found_by_id(tmp_path):
+    path = str(tmp_path)
+    output = run_menu(path, 2, 9,
+                      1, 'Ada', 'Lovelace', 30, 1, 3, 1, 100, 2, 10, 4, 5,
+                      1, 'Alan', 'Turing', 16, 1, 3, 1, 50, 2, 5, 2, 5, 3, 10, 1, 3, 1, 9, 4, 5, 3)
+    assert "Your customer ID is 2" in output
+    # The second withdraw of the savings account finds the first one as the last of its type.
+    assert output.count("Already withdrew this month, cannot withdraw") == 1
+    assert "Wrong ID" in output and "No customer found with ID 9" in output
+    # The indexes are built again from the files by the next run.
+    output = run_menu(path, 2, 1, 2, 1, 3, 5, 2, 2, 2, 2, 2, 'n', 3, 4, 5, 3)
+    assert "The account balance is: $100.0" in output
+    assert "You have no accounts setup." not in output
+    output = run_menu(path, 2, 2, 4, 2, 5, 3)
+    assert "You have no accounts setup." in output
+
+
+def test_last_transaction_of_each_type(bank):
+    account = open_funded_account(bank, 100.0)
+    receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+    bank.withdraw(account.account_id, 10.0)
+    bank.transfer(account.account_id, receiver.account_id, 20.0)
+    bank.deposit(account.account_id, 30.0)
+    bank.credit(account.account_id, 1.5, 'Interest')
+    log = bank.storage.log
+    assert log.last_transaction(account.account_id, 'Deposit').amount_cents == 3000
+    assert log.last_transaction(account.account_id, 'Withdraw').amount_cents == 1000
+    assert log.last_transaction(account.account_id, 'Transfer').receiver_id == receiver.account_id
+    # Types without a code of their own are told apart by their line.
+    assert log.last_transaction(account.account_id, 'Interest').amount_cents == 150
+    assert log.last_transaction(account.account_id, 'Fee') is None
+    assert log.last_transaction(receiver.account_id, 'Withdraw') is None
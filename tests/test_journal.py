@@ -0,0 +1,63 @@
+import os
+
+import banking
+from conftest import open_funded_account
+
+
+def read_accounts(path):
+    with open(os.path.join(path, banking.ACCOUNTS_FILE)) as accountsFile:
+        return {int(fields[3]): fields for fields in (line.strip().split(',') for line in accountsFile)}
+
+
+def test_postings_are_journaled_without_rewriting_the_snapshot(bank):
+    account = open_funded_account(bank, 100.0)
+    bank.deposit(account.account_id, 25.0)
+    assert read_accounts(bank.path) == {}
+    with open(os.path.join(bank.path, banking.JOURNAL_FILE)) as journalFile:
+        assert journalFile.read().splitlines()[-2:] == [f"B,{account.account_id},125.0", f"L,{bank.storage.last_id}"]
+
+
+def test_checkpoint_folds_openings_balances_and_closures(tmp_path):
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        kept = open_funded_account(bank, 100.0)
+        closed = open_funded_account(bank, 50.0, 'Alan', 'Turing')
+        bank.close_account(closed.account_id)
+        bank.storage.accounts.checkpoint(wait=True)
+        assert not os.path.exists(os.path.join(bank.path, banking.JOURNAL_FILE + '.old'))
+    snapshot = read_accounts(str(tmp_path))
+    assert list(snapshot) == [kept.account_id]
+    assert snapshot[kept.account_id][6] == '100.0'
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        assert bank.find_account(kept.account_id).balance_cents == 10000
+        assert bank.find_account(closed.account_id) is None
+
+
+def test_checkpoint_ignores_balances_not_journaled_yet(bank):
+    account = open_funded_account(bank, 100.0)
+    # Another thread changed the balance under the account lock and has not written its posting yet.
+    account.balance_cents += 5000
+    bank.storage.accounts.checkpoint(wait=True)
+    assert read_accounts(bank.path)[account.account_id][6] == '100.0'
+
+
+def test_crashed_checkpoint_is_folded_with_the_next_journal(tmp_path):
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        account = open_funded_account(bank, 100.0)
+    # A checkpoint stopped after renaming the journal, then more postings were journaled.
+    os.replace(os.path.join(str(tmp_path), banking.JOURNAL_FILE), os.path.join(str(tmp_path), banking.JOURNAL_FILE + '.old'))
+    with open(os.path.join(str(tmp_path), banking.JOURNAL_FILE), 'w') as journalFile:
+        journalFile.write(f"B,{account.account_id},175.5\n")
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        assert bank.find_account(account.account_id).balance_cents == 17550
+        bank.storage.accounts.checkpoint(wait=True)
+    assert read_accounts(str(tmp_path))[account.account_id][6] == '175.5'
+
+
+def test_batch_journals_the_balances_as_posted(bank):
+    account = open_funded_account(bank, 100.0)
+    with bank.batch():
+        account.balance_cents += 1000
+        bank._post(account, "Deposit", 10.0)
+        account.balance_cents += 7000  # changed by a posting not written yet
+    with open(os.path.join(bank.path, banking.JOURNAL_FILE)) as journalFile:
+        assert journalFile.read().splitlines()[-2:] == [f"B,{account.account_id},110.0", f"L,{bank.storage.last_id}"]
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import banking
+from conftest import open_funded_account
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_has_no_side_effects(tmp_path):
+    # Importing in an empty directory, with no input to answer a prompt.
+    completed = subprocess.run([sys.executable, '-c', 'import banking, batch, reconcile, monthend, shards'],
+                               cwd=str(tmp_path), env=dict(os.environ, PYTHONPATH=REPOSITORY),
+                               stdin=subprocess.DEVNULL, capture_output=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout == b''
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_bank_is_opened_lazily(tmp_path):
+    bank = banking.Bank().open(str(tmp_path))
+    assert os.listdir(str(tmp_path)) == []
+    bank.close()
+
+
+def test_operations_return_results_without_printing(bank, capsys):
+    account = open_funded_account(bank, 100.0)
+    result = bank.withdraw(account.account_id, 50.0)
+    assert (result.success, result.message) == (True, "Transaction completed successfully")
+    assert tuple(result.value) == tuple(bank.history(account.account_id)[-1])
+    missing = bank.deposit(999, 10.0)
+    assert (missing.success, missing.message, missing.value) == (False, "No account found with ID 999", None)
+    assert not bank.transfer(account.account_id, 999, 10.0).success
+    assert capsys.readouterr().out == ''
+
+
+def test_negative_withdraw_is_refused(bank):
+    account = open_funded_account(bank, 100.0)
+    result = bank.withdraw(account.account_id, -50.0)
+    assert (result.success, result.message) == (False, "The amount must be greater than 0")
+    assert bank.find_account(account.account_id).account_balance == 100.0
+
+
+def test_negative_deposit_does_not_skip_the_savings_limit(bank):
+    account = open_funded_account(bank, 100.0, age=15)
+    assert bank.withdraw(account.account_id, 10.0).success
+    assert not bank.withdraw(account.account_id, 10.0).success
+    assert not bank.deposit(account.account_id, -10.0).success
+    assert bank.find_account(account.account_id).account_balance == 90.0
+
+
+def test_negative_transfer_does_not_take_from_the_receiver(bank):
+    account = open_funded_account(bank, 100.0)
+    receiver = open_funded_account(bank, 100.0, 'Alan', 'Turing')
+    assert not bank.transfer(account.account_id, receiver.account_id, -50.0).success
+    assert [bank.find_account(a.account_id).account_balance for a in (account, receiver)] == [100.0, 100.0]
+
+
+def test_amounts_must_be_finite_whole_cents(bank):
+    account = open_funded_account(bank, 100.0)
+    for amount in (0, float('nan'), float('inf'), 0.001, 'ten'):
+        assert not bank.deposit(account.account_id, amount).success
+    assert bank.deposit(account.account_id, 0.1).success
+    assert len(bank.history(account.account_id)) == 2
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+import banking
+import loader
+
+CUSTOMERS = [f"First{k},Last{k % 7},{14 + k % 60},{k}" for k in range(1, 41)]
+ACCOUNTS = [f"First{k},Last{k % 7},{14 + k % 60},{k},{k},{'Savings' if 14 + k % 60 < 18 else 'Checking'},{k * 1.5}"
+            for k in range(1, 41)]
+TRANSACTIONS = [f"{k},{k % 40 + 1},{('Deposit', 'Withdraw', 'Transfer', 'Interest')[k % 4]},{k % 40 + 1},"
+                f"{(k + 3) % 40 + 1 if k % 4 == 2 else 0},{k / 4},2024-01-{k % 28 + 1:02d} 10:00:00.{k:06d}"
+                for k in range(1, 201)]
+
+
+def write_lines(path, lines):
+    # Empty lines in the middle and at the end, as left by hand edits.
+    with open(path, 'w') as dataFile:
+        dataFile.write("\n".join(lines[:10] + [''] + lines[10:]) + "\n\n")
+
+
+@pytest.fixture
+def bank_copies(tmp_path):
+    sequential, parallel = str(tmp_path / 'sequential'), str(tmp_path / 'parallel')
+    os.mkdir(sequential)
+    write_lines(os.path.join(sequential, banking.CUSTOMER_FILE), CUSTOMERS)
+    write_lines(os.path.join(sequential, banking.ACCOUNTS_FILE), ACCOUNTS)
+    write_lines(os.path.join(sequential, banking.TRANSACTION_FILE), TRANSACTIONS)
+    shutil.copytree(sequential, parallel)
+    return sequential, parallel
+
+
+def load(path, fileLoader=None):
+    with banking.Bank().open(path, durable=False, loader=fileLoader) as bank:
+        customers = {customer.cust_id: (customer.first_name, customer.last_name, customer.age, type(customer.age))
+                     for customer in map(bank.find_customer, range(1, 41))}
+        accounts = {account.account_id: (account.customer_id, account.account_type, account.balance_cents, account.age,
+                                         type(account.age), account.holder is bank.find_customer(account.customer_id))
+                    for account in bank.index.all_accounts()}
+        history = [list(map(tuple, bank.history_page(accountId, 0, 100))) for accountId in range(1, 41)]
+        lastId = bank.storage.last_id
+    with open(os.path.join(path, banking.TRANSACTION_INDEX_FILE), 'rb') as indexFile:
+        return customers, accounts, history, lastId, indexFile.read()
+
+
+def test_parallel_load_matches_the_sequential_one(bank_copies):
+    sequential, parallel = bank_copies
+    fileLoader = loader.ParallelLoader(2, chunk_bytes=256)
+    expected = load(sequential)
+    assert load(parallel, fileLoader) == expected
+    assert fileLoader.report[banking.TRANSACTION_FILE]['chunks'] > 1
+    customers, accounts, history, lastId, _ = expected
+    assert len(customers) == len(accounts) == 40 and lastId == 200
+    assert customers[1] == ('First1', 'Last1', 15, int)
+    assert sum(map(len, history)) == 200
+
+
+def test_chunk_index_skips_empty_lines(tmp_path):
+    path = str(tmp_path / banking.TRANSACTION_FILE)
+    with open(path, 'wb') as log:
+        log.write(b"1,5,Deposit,5,0,1.0,2024-01-01 10:00:00\n\n2,6,Withdraw,6,0,1.0,2024-01-01 10:00:01\n")
+    records, rows, offset = loader.index_transactions_chunk(path, 0, os.path.getsize(path))
+    assert (rows, offset) == (2, os.path.getsize(path))
+    assert list(loader.SIDECAR_RECORD.iter_unpack(records)) == [(5, 1, 0), (6, 2, 41)]
@@ -0,0 +1,70 @@
+import json
+import os
+import urllib.request
+
+import banking
+import metrics
+from conftest import open_funded_account
+
+
+def test_operations_are_counted_with_failures_and_bytes(bank):
+    recorder = bank.enable_metrics()
+    account = open_funded_account(bank, 100.0)
+    bank.withdraw(account.account_id, 10.0)
+    bank.withdraw(999, 10.0)
+    bank.find_account(account.account_id)
+    stats = recorder.stats()
+    assert (stats['withdraw']['count'], stats['withdraw']['failures']) == (2, 1)
+    assert stats['deposit']['count'] == 1 and stats['deposit']['bytes_written'] > 0
+    assert stats['register']['count'] == 1 and stats['open']['count'] == 1
+    assert stats['lookup']['count'] >= 1
+    assert stats['withdraw']['p50_ms'] <= stats['withdraw']['p99_ms']
+
+
+def test_disabled_bank_runs_its_plain_methods(bank):
+    plain = type(bank).deposit
+    bank.enable_metrics()
+    assert 'deposit' in bank.__dict__
+    recorder = bank.disable_metrics()
+    assert 'deposit' not in bank.__dict__ and type(bank).deposit is plain
+    open_funded_account(bank, 10.0)
+    assert 'deposit' not in recorder.stats()
+
+
+def test_prometheus_histogram_adds_up():
+    recorder = metrics.Metrics()
+    for seconds in (0.00001, 0.0003, 0.0003, 20.0):
+        recorder.observe('deposit', seconds, written=10)
+    text = recorder.prometheus()
+    assert 'bank_operations_total{operation="deposit"} 4' in text
+    assert 'bank_bytes_written_total{operation="deposit"} 40' in text
+    assert 'bank_operation_seconds_bucket{operation="deposit",le="5e-05"} 1' in text
+    assert 'bank_operation_seconds_bucket{operation="deposit",le="0.0005"} 3' in text
+    assert 'bank_operation_seconds_bucket{operation="deposit",le="+Inf"} 4' in text
+    assert recorder.stats()['deposit']['max_ms'] == 20000.0
+
+
+def test_measures_are_dumped_and_served(tmp_path):
+    recorder = metrics.Metrics()
+    recorder.observe('transfer', 0.002)
+    recorder.dump(str(tmp_path / 'metrics.json'))
+    with open(str(tmp_path / 'metrics.json')) as dumped:
+        assert json.load(dumped)['transfer']['count'] == 1
+    recorder.serve('127.0.0.1', 0)
+    try:
+        port = recorder._server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=10) as response:
+            assert 'bank_operations_total{operation="transfer"} 1' in response.read().decode()
+    finally:
+        recorder.close()
+
+
+def test_profile_captures_the_next_calls(tmp_path):
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        recorder = bank.enable_metrics()
+        account = open_funded_account(bank, 0)
+        recorder.profile('deposit', 3, str(tmp_path / 'deposit.prof'))
+        for _ in range(4):
+            bank.deposit(account.account_id, 1.0)
+    assert os.path.exists(str(tmp_path / 'deposit.prof'))
+    assert 'deposit' in recorder.profile_report('deposit')
@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+
+import banking
+import monthend
+from conftest import open_funded_account
+
+PERIOD = '2024-01'
+RATES = {'savings_rate': 0.12, 'overdraft_fee': 5.0}  # 1% of interest a month
+
+
+def make_bank(path, backend='files'):
+    """
+    returns the IDs of a savings account, an overdrawn account and an account whose balance is not in the log.
+    """
+    with banking.Bank().open(path, backend, durable=False) as bank:
+        saver = open_funded_account(bank, 0, 'Ada', 'Lovelace', 16).account_id
+        overdrawn = open_funded_account(bank, 0, 'Alan', 'Turing', 30).account_id
+        legacy = open_funded_account(bank, 0, 'Grace', 'Hopper', 40).account_id
+        bank.post_adjustments([(saver, 'Deposit', 100000), (overdrawn, 'Withdraw', 5000)], datetime.datetime(2024, 1, 10))
+        # Deposited after the end of the month, it earns nothing for January.
+        bank.post_adjustments([(saver, 'Deposit', 50000)], datetime.datetime(2024, 2, 5))
+        bank.correct_balances({legacy: 30000})
+    return saver, overdrawn, legacy
+
+
+def balances(path, *accountIds):
+    with banking.Bank().open(path, durable=False) as bank:
+        return [bank.find_account(accountId).balance_cents for accountId in accountIds]
+
+
+@pytest.mark.parametrize('backend', ['files', 'sqlite'])
+def test_month_is_applied_once_from_the_balances_at_its_end(tmp_path, backend):
+    path = str(tmp_path)
+    accounts = make_bank(path, backend)
+    report = monthend.run_month_end(path, PERIOD, **RATES)
+    assert (report['applied'], report['postings'], report['interest'], report['fees']) == (True, 2, 10.0, 5.0)
+    assert balances(path, *accounts) == [151000, -5500, 30000]
+    again = monthend.run_month_end(path, PERIOD, **RATES)
+    assert (again['applied'], again['postings']) == (False, 2)
+    assert balances(path, *accounts) == [151000, -5500, 30000]
+
+
+@pytest.mark.parametrize('lost', [True, False])
+def test_interrupted_run_completes_only_its_own_postings(tmp_path, lost):
+    path = str(tmp_path)
+    saver, overdrawn, legacy = make_bank(path)
+    # The run stopped after the interest reached the log, its balance on disk or not.
+    with banking.Bank().open(path, durable=False) as bank:
+        bank.index
+        monthend.write_run(str(tmp_path / monthend.RUNS_FILE), 'start', PERIOD, monthend.log_marker(bank))
+        bank.post_adjustments([(saver, monthend.INTEREST, 1000)], monthend.period_end(PERIOD))
+        if lost:
+            bank.correct_balances({saver: 150000})
+    report = monthend.run_month_end(path, PERIOD, **RATES)
+    assert (report['postings'], report['completed'], report['fees']) == (1, int(lost), 5.0)
+    # The legacy balance differs from the log and is left alone.
+    assert balances(path, saver, overdrawn, legacy) == [151000, -5500, 30000]
+    assert monthend.read_runs(str(tmp_path / monthend.RUNS_FILE))[PERIOD] == ('done', 2)
+
+
+def test_adjustments_use_the_given_balances():
+    account = banking.SavingAccount('Ada', 'Lovelace', 16, 1, 1, 'Savings', 150.0)
+    assert monthend.adjustments([account], 0.12) == [(1, monthend.INTEREST, 150)]
+    assert monthend.adjustments([account], 0.12, balances={1: 10000}) == [(1, monthend.INTEREST, 100)]
+    assert monthend.adjustments([account], 0.12, skip={1}) == []
+
+
+def test_cutoff_replay_starts_at_the_first_line_after_the_month(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    saver, overdrawn, legacy = make_bank(path)
+    with banking.Bank().open(path, durable=False) as bank:
+        bank.post_adjustments([(overdrawn, 'Deposit', 100 + day) for day in range(1, 29)],
+                              datetime.datetime(2024, 2, 1))
+        # Interest of January appended after February's postings.
+        bank.post_adjustments([(saver, monthend.INTEREST, 1000)], monthend.period_end(PERIOD))
+    logPath = str(tmp_path / banking.TRANSACTION_FILE)
+    with open(logPath, 'rb') as log:
+        lines = log.readlines()
+    first = next(number for number, line in enumerate(lines) if line.rstrip().endswith(b'2024-02-05 00:00:00'))
+    assert monthend.first_offset_after(logPath, monthend.period_end(PERIOD)) == sum(map(len, lines[:first]))
+    assert monthend.first_offset_after(logPath, datetime.datetime(2023, 1, 1)) == 0
+    markers = []
+    replay_log = monthend.reconcile.replay_log
+    monkeypatch.setattr(monthend.reconcile, 'replay_log',
+                        lambda path, marker, *args: markers.append(marker) or replay_log(path, marker, *args))
+    with banking.Bank().open(path, durable=False) as bank:
+        cutoff = monthend.cutoff_balances(bank, bank.index.all_accounts(), monthend.period_end(PERIOD))
+    assert markers == [sum(map(len, lines[:first]))]
+    assert cutoff[saver] == 101000
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import banking
+import reconcile
+from conftest import open_funded_account
+
+
+def make_bank(path, backend):
+    with banking.Bank().open(path, backend, durable=False) as bank:
+        account = open_funded_account(bank, 100.0)
+        receiver = open_funded_account(bank, 20.0, 'Alan', 'Turing')
+        bank.transfer(account.account_id, receiver.account_id, 30.0)
+        bank.credit(receiver.account_id, 1.25, 'Interest')
+    return account.account_id, receiver.account_id
+
+
+@pytest.mark.parametrize('backend', ['files', 'sqlite'])
+def test_mismatches_are_found_and_repaired(tmp_path, backend):
+    path = str(tmp_path)
+    accountId, receiverId = make_bank(path, backend)
+    report = reconcile.reconcile(path, workers=1)
+    assert (report['rows'], report['accounts'], report['mismatches']) == (4, 2, [])
+    with banking.Bank().open(path, durable=False) as bank:
+        bank.correct_balances({receiverId: 99})
+    report = reconcile.reconcile(path, workers=1)
+    assert report['mismatches'] == [{'account_id': receiverId, 'stored': 0.99, 'replayed': 51.25}]
+    assert report['repaired'] == 0
+    assert reconcile.reconcile(path, repair=True, workers=1)['repaired'] == 1
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.find_account(receiverId).balance_cents == 5125
+        assert bank.find_account(accountId).balance_cents == 7000
+
+
+def test_snapshot_limits_the_next_replay(tmp_path):
+    path = str(tmp_path)
+    accountId, _ = make_bank(path, 'files')
+    assert reconcile.reconcile(path, snapshot=True, workers=1)['rows'] == 4
+    marker, balances = reconcile.read_snapshot(os.path.join(path, reconcile.SNAPSHOT_FILE))
+    assert marker == os.path.getsize(os.path.join(path, banking.TRANSACTION_FILE))
+    assert balances[accountId] == 7000
+    with banking.Bank().open(path, durable=False) as bank:
+        bank.deposit(accountId, 5.0)
+    report = reconcile.reconcile(path, workers=1)
+    assert (report['rows'], report['mismatches']) == (1, [])
+
+
+def test_snapshot_is_not_written_over_mismatches(tmp_path):
+    path = str(tmp_path)
+    accountId, _ = make_bank(path, 'files')
+    with banking.Bank().open(path, durable=False) as bank:
+        bank.correct_balances({accountId: 1})
+    reconcile.reconcile(path, snapshot=True, workers=1)
+    assert not os.path.exists(os.path.join(path, reconcile.SNAPSHOT_FILE))
+
+
+def test_chunks_replay_each_line_once(tmp_path):
+    path = str(tmp_path / banking.TRANSACTION_FILE)
+    lines = [f"{k},{k % 3 + 1},Deposit,1,0,1.0,2024-01-01 10:00:00\n" for k in range(1, 101)]
+    with open(path, 'w') as log:
+        log.write("".join(lines))
+    size = os.path.getsize(path)
+    total = {}
+    for start in range(0, size, 97):
+        changes, _, _ = reconcile.replay_chunk(path, start, min(start + 97, size))
+        for accountId, cents in changes.items():
+            total[accountId] = total.get(accountId, 0) + cents
+    assert total == {1: 3300, 2: 3400, 3: 3300}
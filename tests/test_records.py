@@ -0,0 +1,70 @@
+import os
+
+import banking
+import binarystore
+from conftest import open_funded_account
+
+
+def test_accounts_keep_integer_cents_without_instance_dicts(bank):
+    account = open_funded_account(bank, 0)
+    for _ in range(10):
+        bank.deposit(account.account_id, 0.1)
+    assert account.balance_cents == 100
+    assert account.account_balance == 1.0
+    assert not hasattr(account, '__dict__')
+    transaction = bank.history(account.account_id)[-1]
+    assert transaction.amount_cents == 10 and not hasattr(transaction, '__dict__')
+
+
+def test_opened_accounts_share_the_customer(bank):
+    account = open_funded_account(bank, 0)
+    assert account.holder is bank.find_customer(account.customer_id)
+
+
+def test_loaded_accounts_share_the_customer(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        journaled = open_funded_account(bank, 10.0)
+        bank.storage.accounts.checkpoint(wait=True)
+        replayed = open_funded_account(bank, 20.0, 'Alan', 'Turing')
+    with banking.Bank().open(path, durable=False) as bank:
+        for account in (journaled, replayed):
+            assert bank.find_account(account.account_id).holder is bank.find_customer(account.customer_id)
+        bank.storage.accounts.checkpoint(wait=True)
+    binarystore.text_to_binary(os.path.join(path, banking.ACCOUNTS_FILE), os.path.join(path, banking.ACCOUNTS_BINARY_FILE))
+    with banking.Bank().open(path, durable=False) as bank:
+        account = bank.find_account(journaled.account_id)
+        assert account.holder is bank.find_customer(journaled.customer_id)
+
+
+def test_database_accounts_share_the_customer(tmp_path):
+    with banking.Bank().open(str(tmp_path), backend='sqlite', durable=False) as bank:
+        account = open_funded_account(bank, 10.0)
+    with banking.Bank().open(str(tmp_path), durable=False) as bank:
+        assert bank.backend == 'sqlite'
+        assert bank.find_account(account.account_id).holder is bank.find_customer(account.customer_id)
+
+
+def test_accounts_of_unknown_customers_keep_their_own_holder():
+    account = banking.parse_account("Ada,Lovelace,30,4,9,Checking,12.5\n", {})
+    assert (account.first_name, account.customer_id, account.balance_cents) == ('Ada', 9, 1250)
+
+
+def test_loading_accounts_makes_no_customer_copies(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        for number in range(5):
+            open_funded_account(bank, 10.0, 'Ada', f'Lovelace{number}')
+    made = []
+
+    class CountedCustomer(banking.Customer):
+        __slots__ = ()
+
+        def __init__(self, *args):
+            made.append(args)
+            super().__init__(*args)
+
+    monkeypatch.setattr(banking, 'Customer', CountedCustomer)
+    with banking.Bank().open(path, durable=False) as bank:
+        assert len(bank.index.accounts) == 5
+    assert len(made) == 5  # one per customer, none per account
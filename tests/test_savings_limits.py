@@ -0,0 +1,46 @@
+import datetime
+
+import banking
+from conftest import open_funded_account
+
+
+def test_one_withdraw_a_month_across_reopening(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        saver = open_funded_account(bank, 100.0, age=16)
+        receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+        assert bank.withdraw(saver.account_id, 10.0).success
+        assert bank.withdraw(saver.account_id, 10.0).message == "Already withdrew this month, cannot withdraw"
+        assert bank.transfer(saver.account_id, receiver.account_id, 10.0).success
+    with banking.Bank().open(path, durable=False) as bank:
+        assert not bank.withdraw(saver.account_id, 10.0).success
+        assert bank.transfer(saver.account_id, receiver.account_id, 10.0).message == \
+            "Already a transfer this month, cannot transfer"
+
+
+def test_withdraw_older_than_a_month_does_not_count(bank):
+    saver = open_funded_account(bank, 100.0, age=16)
+    bank.post_adjustments([(saver.account_id, 'Withdraw', 1000)], datetime.datetime.now() - datetime.timedelta(days=40))
+    assert bank.withdraw(saver.account_id, 10.0).success
+
+
+def test_last_times_are_cached_by_the_postings(bank, monkeypatch):
+    saver = open_funded_account(bank, 100.0, age=16)
+    log = bank.storage.log
+    assert log.last_time(saver.account_id, 'Withdraw') is None
+    bank.withdraw(saver.account_id, 10.0)
+
+    def unexpected_read(*args):
+        raise AssertionError("the log was read again")
+
+    monkeypatch.setattr(log, 'last_transaction', unexpected_read)
+    assert log.last_time(saver.account_id, 'Withdraw') == bank.history(saver.account_id)[-1].time
+    assert not bank.withdraw(saver.account_id, 10.0).success
+
+
+def test_last_transaction_without_microseconds_is_read():
+    saver = banking.SavingAccount('Ada', 'Lovelace', 16, 1, 1, 'Savings', 100.0)
+    recent = str(datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(days=1))
+    assert saver.withdraw_error(10.0, [1, 1, 'Withdraw', 1, 0, 10.0, recent]) == "Already withdrew this month, cannot withdraw"
+    old = str(datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(days=31))
+    assert saver.withdraw_error(10.0, [1, 1, 'Withdraw', 1, 0, 10.0, old]) is None
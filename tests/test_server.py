@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+import banking
+import server
+from conftest import open_funded_account
+
+
+def test_routes_answer_lookups_and_postings(bank):
+    account = open_funded_account(bank, 100.0)
+
+    async def requests():
+        service = server.BankServer(bank, workers=4)
+        login = await service.dispatch('GET', f'/customers/{account.customer_id}', {})
+        deposit = await service.dispatch('POST', '/deposit', {'account': account.account_id, 'amount': 5})
+        balance = await service.dispatch('GET', f'/accounts/{account.account_id}', {})
+        missing = await service.dispatch('GET', '/accounts/999', {})
+        service.executor.shutdown()
+        return login, deposit, balance, missing
+
+    login, deposit, balance, missing = asyncio.run(requests())
+    assert login[0] == 200 and login[1]['accounts'][0]['account_id'] == account.account_id
+    assert deposit[0] == 200 and deposit[1]['success']
+    assert balance == (200, {'account_id': account.account_id, 'customer_id': account.customer_id,
+                             'account_type': 'Checking', 'balance': 105.0, 'success': True})
+    assert missing[0] == 404
+
+
+def test_lookups_run_off_the_event_loop(bank, monkeypatch):
+    account = open_funded_account(bank, 100.0)
+    threads = []
+
+    def find_account(accountId):
+        threads.append(threading.current_thread())
+        return banking.Bank.find_account(bank, accountId)
+
+    monkeypatch.setattr(bank, 'find_account', find_account)
+
+    async def requests():
+        service = server.BankServer(bank, workers=2)
+        await service.dispatch('GET', f'/accounts/{account.account_id}', {})
+        await service.dispatch('GET', f'/accounts/{account.account_id}/transactions', {})
+        service.executor.shutdown()
+
+    asyncio.run(requests())
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_invalid_postings_are_bad_requests(bank):
+    account = open_funded_account(bank, 100.0)
+    bodies = [('/deposit', {'account': account.account_id, 'amount': -5}),
+              ('/withdraw', {'account': account.account_id, 'amount': float('nan')}),
+              ('/withdraw', {'account': account.account_id, 'amount': 1.005}),
+              ('/transfer', {'account': account.account_id, 'receiver': account.account_id, 'amount': 0}),
+              ('/deposit', {'account': account.account_id, 'amount': 'ten'}),
+              ('/deposit', {'account': float('inf'), 'amount': 5}),
+              ('/withdraw', {'account': account.account_id}),
+              ('/deposit', [account.account_id, 5])]
+
+    async def requests():
+        service = server.BankServer(bank, workers=2)
+        responses = [await service.dispatch('POST', path, body) for path, body in bodies]
+        service.executor.shutdown()
+        return responses
+
+    responses = asyncio.run(requests())
+    assert [status for status, body in responses] == [400] * len(bodies)
+    assert responses[0][1]['message'] == "Invalid request: The amount must be greater than 0"
+    assert bank.find_account(account.account_id).account_balance == 100.0
+
+
+def test_concurrent_registrations_of_the_same_person_make_one_customer(bank):
+    async def requests():
+        service = server.BankServer(bank, workers=8)
+        body = {'first_name': 'Grace', 'last_name': 'Hopper', 'age': 40}
+        answers = await asyncio.gather(*[service.dispatch('POST', '/customers', body) for _ in range(20)])
+        again = await service.dispatch('POST', '/customers', dict(body, allow_duplicate=True))
+        service.executor.shutdown()
+        return answers, again
+
+    answers, again = asyncio.run(requests())
+    statuses = sorted(status for status, _ in answers)
+    assert statuses == [200] + [409] * 19
+    registered = [body['customer_id'] for status, body in answers if status == 200]
+    assert all(body['customer_ids'] == registered for status, body in answers if status == 409)
+    assert again[0] == 200
+    assert len(bank.find_duplicates('Grace', 'Hopper', 40)) == 2
@@ -0,0 +1,143 @@
+import concurrent.futures
+import random
+import threading
+import time
+
+import pytest
+
+import shards
+
+
+def wait_until_resolved(bank, shard, timeout=30):
+    """
+    Waits until the shard answers again and holds no leg in doubt.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if not bank._call(shard, 'in_doubt'):
+                return
+        except shards.ShardError:
+            pass
+        time.sleep(0.05)
+    raise AssertionError(f"Shard {shard} still holds legs in doubt")
+
+
+def kill(bank, shard):
+    """
+    Kills the worker of the shard and waits until it was restarted.
+    """
+    process = bank._processes[shard]
+    process.kill()
+    process.join()
+    deadline = time.monotonic() + 30
+    while bank._processes[shard] is process and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def total_cents(bank, accountIds):
+    return sum(bank.find_account(accountId).balance_cents for accountId in accountIds)
+
+
+@pytest.fixture(params=[False, True], ids=['buffered', 'durable'])
+def sharded(tmp_path, request):
+    with shards.ShardedBank(str(tmp_path), shards=2, durable=request.param, threads=4) as bank:
+        accountIds = []
+        for number in range(10):
+            customer = bank.register_customer('Ada', f'Lovelace{number}', 30)
+            accountIds.append(bank.open_account(customer.cust_id).value.account_id)
+            bank.deposit(accountIds[-1], 100.0)
+        yield bank, accountIds
+
+
+def test_accounts_are_spread_over_the_shards(sharded):
+    bank, accountIds = sharded
+    assert {shards.shard_of(accountId, 2) for accountId in accountIds} == {0, 1}
+    assert total_cents(bank, accountIds) == 100000
+
+
+def test_cross_shard_transfer_moves_the_amount(sharded):
+    bank, accountIds = sharded
+    source, receiver = accountIds[0], accountIds[1]
+    result = bank.transfer(source, receiver, 30.0)
+    assert result.success and result.value.transaction_type == 'Transfer'
+    assert bank.find_account(source).balance_cents == 7000
+    assert bank.find_account(receiver).balance_cents == 13000
+    assert bank.history(receiver)[-1].transaction_type == 'TransferIn'
+    assert not bank.transfer(source, receiver, 1000.0).success
+    assert total_cents(bank, accountIds) == 100000
+
+
+def test_negative_cross_shard_transfer_is_refused(sharded):
+    bank, accountIds = sharded
+    source, receiver = accountIds[0], accountIds[1]
+    assert not bank.transfer(source, receiver, -30.0).success
+    assert not bank._call(shards.shard_of(source, 2), 'prepare', 'g1', 'debit', source, receiver, -30.0).success
+    assert bank.find_account(receiver).balance_cents == 10000
+    assert total_cents(bank, accountIds) == 100000
+
+
+def test_restarted_worker_commits_a_leg_decided_before_it_died(sharded):
+    bank, accountIds = sharded
+    source, receiver = accountIds[0], accountIds[1]
+    sourceShard, receiverShard = shards.shard_of(source, 2), shards.shard_of(receiver, 2)
+    # The coordinator decided and committed the credit, then the debit's worker died before its commit.
+    assert bank._call(sourceShard, 'prepare', 'g1', 'debit', source, receiver, 25.0).success
+    assert bank._call(receiverShard, 'prepare', 'g1', 'credit', receiver, source, 25.0).success
+    bank._decide('g1')
+    assert bank._resolve(receiverShard, 'commit', 'g1').success
+    kill(bank, sourceShard)
+    wait_until_resolved(bank, sourceShard)
+    assert bank.find_account(source).balance_cents == 7500
+    assert bank.find_account(receiver).balance_cents == 12500
+
+
+def test_killing_a_worker_during_transfers_conserves_the_money(sharded):
+    bank, accountIds = sharded
+    pairs = [(accountId, receiverId) for accountId in accountIds for receiverId in accountIds
+             if shards.shard_of(accountId, 2) != shards.shard_of(receiverId, 2)]
+    stop = threading.Event()
+    done = []
+
+    def post(number):
+        randomizer = random.Random(number)
+        while not stop.is_set():
+            source, receiver = randomizer.choice(pairs)
+            try:
+                done.append(bank.transfer(source, receiver, 1.0).success)
+            except shards.ShardError:
+                pass  # the worker was restarting, the transfer was undone
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(post, number) for number in range(4)]
+        time.sleep(0.3)
+        kill(bank, 0)
+        time.sleep(0.3)
+        stop.set()
+        for future in futures:
+            future.result()
+    for shard in range(2):
+        wait_until_resolved(bank, shard)
+    assert any(done)
+    assert total_cents(bank, accountIds) == 100000
+
+
+def test_reopening_commits_the_decided_legs_and_aborts_the_others(tmp_path):
+    path = str(tmp_path)
+    with shards.ShardedBank(path, shards=2, durable=False) as bank:
+        accountIds = []
+        for number in range(2):
+            customer = bank.register_customer('Ada', f'Lovelace{number}', 30)
+            accountIds.append(bank.open_account(customer.cust_id).value.account_id)
+            bank.deposit(accountIds[-1], 100.0)
+        source, receiver = accountIds
+        for gtid, debited, credited, amount in (('decided', source, receiver, 10.0), ('undecided', receiver, source, 20.0)):
+            assert bank._call(shards.shard_of(debited, 2), 'prepare', gtid, 'debit', debited, credited, amount).success
+            assert bank._call(shards.shard_of(credited, 2), 'prepare', gtid, 'credit', credited, debited, amount).success
+            # The coordinator stops before committing anything.
+            bank._active.add(gtid)
+        bank._decide('decided')
+    with shards.ShardedBank(path, shards=2, durable=False) as bank:
+        assert bank.find_account(source).balance_cents == 9000
+        assert bank.find_account(receiver).balance_cents == 11000
+        assert bank._call(0, 'in_doubt') == [] and bank._call(1, 'in_doubt') == []
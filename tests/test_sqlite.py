@@ -0,0 +1,73 @@
+import os
+import sqlite3
+
+import pytest
+
+import banking
+from conftest import open_funded_account
+
+
+def test_database_bank_survives_reopening(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, backend='sqlite', durable=False) as bank:
+        account = open_funded_account(bank, 100.0)
+        receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+        closed = open_funded_account(bank, 5.0, 'Grace', 'Hopper')
+        bank.transfer(account.account_id, receiver.account_id, 30.0)
+        bank.withdraw(account.account_id, 20.0)
+        bank.close_account(closed.account_id)
+    assert banking.DATABASE_FILE in os.listdir(path) and banking.ACCOUNTS_FILE not in os.listdir(path)
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.backend == 'sqlite'
+        assert bank.find_account(account.account_id).balance_cents == 5000
+        assert bank.find_account(receiver.account_id).balance_cents == 3000
+        assert bank.find_account(closed.account_id) is None
+        assert [transaction.transaction_type for transaction in bank.history_page(account.account_id, 0, 2)] == \
+            ['Withdraw', 'Transfer']
+        assert bank.find_customer(account.customer_id).age == 30
+        # A closed account's ID is not given again.
+        assert open_funded_account(bank, 0, 'Edsger', 'Dijkstra').account_id == closed.account_id + 1
+
+
+def test_posting_is_one_database_transaction(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, backend='sqlite', durable=False) as bank:
+        account = open_funded_account(bank, 100.0)
+        receiver = open_funded_account(bank, 0, 'Alan', 'Turing')
+        bank.transfer(account.account_id, receiver.account_id, 25.0)
+        # Another connection sees the row and both balances together.
+        connection = sqlite3.connect(os.path.join(path, banking.DATABASE_FILE))
+        try:
+            balances = dict(connection.execute("SELECT account_id, balance_cents FROM accounts"))
+            rows = connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+        finally:
+            connection.close()
+    assert balances == {account.account_id: 7500, receiver.account_id: 2500}
+    assert rows == 2
+
+
+def test_text_bank_is_copied_into_the_database(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        accounts = [open_funded_account(bank, 10.0 * number, 'Ada', f'Lovelace{number}').account_id
+                    for number in range(1, 4)]
+        bank.transfer(accounts[2], accounts[0], 5.0)
+        expected = {accountId: (bank.find_account(accountId).balance_cents,
+                                [tuple(transaction) for transaction in bank.history(accountId)])
+                    for accountId in accounts}
+    assert banking.files_to_sqlite(path) == (3, 3, 4)
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.backend == 'sqlite'
+        assert {accountId: (bank.find_account(accountId).balance_cents,
+                            [tuple(transaction) for transaction in bank.history(accountId)])
+                for accountId in accounts} == expected
+
+
+def test_storage_backends_implement_every_method():
+    class Partial(banking.Storage):
+        def load(self, index):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert not banking.FileStorage.__abstractmethods__ and not banking.SQLiteStorage.__abstractmethods__
@@ -0,0 +1,55 @@
+import os
+
+import banking
+from conftest import open_funded_account
+
+
+def test_history_pages_are_read_newest_first(bank):
+    account = open_funded_account(bank, 0)
+    for amount in range(1, 26):
+        bank.deposit(account.account_id, amount)
+    first = bank.history_page(account.account_id, 0, 10)
+    last = bank.history_page(account.account_id, 2, 10)
+    assert [transaction.amount_cents for transaction in first] == [amount * 100 for amount in range(25, 15, -1)]
+    assert [transaction.amount_cents for transaction in last] == [amount * 100 for amount in range(5, 0, -1)]
+    assert len(bank.history(account.account_id)) == 25
+
+
+def test_sidecar_index_is_rebuilt_for_lines_it_does_not_cover(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        account = open_funded_account(bank, 10.0)
+        bank.deposit(account.account_id, 5.0)
+    os.remove(os.path.join(path, banking.TRANSACTION_INDEX_FILE))
+    with banking.Bank().open(path, durable=False) as bank:
+        assert [transaction.amount_cents for transaction in bank.history(account.account_id)] == [1000, 500]
+
+
+def test_partial_last_line_is_cut_off_when_opened(tmp_path):
+    path = str(tmp_path)
+    with banking.Bank().open(path, durable=False) as bank:
+        account = open_funded_account(bank, 10.0)
+        bank.deposit(account.account_id, 5.0)
+    transactionsFile = os.path.join(path, banking.TRANSACTION_FILE)
+    with open(transactionsFile, 'rb') as f:
+        complete = f.read()
+    # A crash while writing transaction 3 left the start of its line.
+    with open(transactionsFile, 'ab') as f:
+        f.write(b'3,1,Depo')
+    with banking.Bank().open(path, durable=False) as bank:
+        assert bank.storage.last_id == 2
+        transaction = bank.deposit(account.account_id, 1.0).value
+        assert transaction.transaction_id == 3
+        assert [t.transaction_id for t in bank.history(account.account_id)] == [1, 2, 3]
+    with open(transactionsFile, 'rb') as f:
+        assert f.read() == complete + banking.transaction_line(transaction).encode()
+
+
+def test_log_of_a_single_partial_line_is_emptied(tmp_path):
+    path = str(tmp_path)
+    with open(os.path.join(path, banking.TRANSACTION_FILE), 'wb') as f:
+        f.write(b'12')
+    log = banking.TransactionLog(os.path.join(path, banking.TRANSACTION_FILE), os.path.join(path, banking.TRANSACTION_INDEX_FILE))
+    assert log.last_id == 0
+    log.close()
+    assert os.path.getsize(os.path.join(path, banking.TRANSACTION_FILE)) == 0